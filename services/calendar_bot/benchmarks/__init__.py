@@ -0,0 +1 @@
+"""Calendar Bot 离线基准测试"""
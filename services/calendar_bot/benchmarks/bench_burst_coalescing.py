@@ -0,0 +1,91 @@
+"""
+连续转发消息的合并基准
+
+模拟多个用户各自快速连续转发一组消息，对比逐条处理与按用户排队 + 防抖合并：
+LLM 调用次数、全部处理完成的耗时，以及每个用户的事件创建顺序是否与发送顺序一致。
+
+用法（在 services/calendar_bot 目录下）:
+    python -m benchmarks.bench_burst_coalescing --users 20 --burst 8 --debounce 0.5
+"""
+import argparse
+import asyncio
+import logging
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from src.database import AsyncDatabaseRepository
+from src.handlers import MessageHandlers
+
+from .fakes import (
+    FakeConfig,
+    FakeEventParser,
+    FakeGoogleCalendar,
+    make_update,
+    make_context,
+)
+
+
+async def run(db, users: int, burst: int, gap: float, debounce: float, llm_latency: float) -> dict:
+    """每个用户以 gap 间隔发送 burst 条消息，等待全部处理完成"""
+    parser = FakeEventParser(latency=llm_latency)
+    calendar = FakeGoogleCalendar(latency=0.02)
+    handlers = MessageHandlers(
+        config=FakeConfig(),
+        db=db,
+        event_parser=parser,
+        google_calendar=calendar,
+        debounce=debounce,
+        max_pending=burst
+    )
+    context = make_context()
+    rng = random.Random(42)
+
+    async def user_session(user_id: int):
+        for i in range(burst):
+            await handlers.process_message(make_update(user_id, f"u{user_id} #{i}"), context)
+            await asyncio.sleep(gap * rng.uniform(0.5, 1.5))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user_session(uid) for uid in range(1, users + 1)))
+    expected = users * burst
+    while len(calendar.created) < expected:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+
+    in_order = all(
+        [s for s in calendar.created if s.startswith(f"u{uid} ")] == [f"u{uid} #{i}" for i in range(burst)]
+        for uid in range(1, users + 1)
+    )
+    return {"elapsed": elapsed, "llm_calls": parser.calls, "events": len(calendar.created), "in_order": in_order}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Burst coalescing benchmark")
+    arg_parser.add_argument("--users", type=int, default=20)
+    arg_parser.add_argument("--burst", type=int, default=8, help="每个用户连续发送的消息数")
+    arg_parser.add_argument("--gap", type=float, default=0.1, help="消息间平均间隔（秒）")
+    arg_parser.add_argument("--debounce", type=float, default=0.5)
+    arg_parser.add_argument("--llm-latency", type=float, default=0.5)
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for name, debounce in (("per-msg", 0.0), ("queued", args.debounce)):
+            db = AsyncDatabaseRepository(str(Path(tmp) / name / "bot.db"))
+            results[name] = asyncio.run(run(db, args.users, args.burst, args.gap, debounce, args.llm_latency))
+            db.close()
+
+    print(f"users={args.users} burst={args.burst} gap={args.gap}s debounce={args.debounce}s llm={args.llm_latency}s")
+    for name, r in results.items():
+        print(
+            f"{name:<8} {r['elapsed']:6.2f}s  llm calls {r['llm_calls']:4d}  "
+            f"events {r['events']:4d}  ordered {'yes' if r['in_order'] else 'NO'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Google Calendar 传输层负载测试
+
+对本地假 Calendar 服务器并发执行 create_event，对比：
+  - shared: 旧实现，所有线程共享同一个 httplib2 service
+  - serial: 线程池大小为 1（单连接串行）
+  - pooled: 每个工作线程独立 service + keep-alive 连接
+
+用法（在 services/calendar_bot 目录下）:
+    python -m benchmarks.bench_calendar_transport --requests 200 --concurrency 16 [--include-shared]
+"""
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+
+import json
+
+import httplib2
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+
+from src.core import EventValidator
+from src.integrations import GoogleCalendarClient
+
+from .fake_calendar_server import FakeCalendarServer
+
+
+class LocalCalendarClient(GoogleCalendarClient):
+    """指向本地假服务器、无需凭证的客户端"""
+
+    def __init__(self, api_endpoint: str, **kwargs):
+        super().__init__(
+            credentials_json="{}",
+            event_validator=EventValidator(valid_categories={"Kimi", "Family"}),
+            **kwargs
+        )
+        self.api_endpoint = api_endpoint
+
+    def _build_service(self):
+        # 改写 rootUrl，让普通请求和 batch 请求都指向本地服务器
+        document = json.loads(get_static_doc('calendar', 'v3'))
+        document['rootUrl'] = self.api_endpoint.split('calendar/v3/')[0]
+        return build_from_document(document, http=httplib2.Http(timeout=self.http_timeout))
+
+
+class SharedServiceClient(LocalCalendarClient):
+    """复现旧实现：单个 service 被所有线程共享"""
+
+    def __init__(self, api_endpoint: str, **kwargs):
+        super().__init__(api_endpoint, **kwargs)
+        self._shared = None
+
+    def get_service(self):
+        if self._shared is None:
+            self._shared = self._build_service()
+        return self._shared
+
+
+def make_event(i: int) -> dict:
+    start = datetime.now() + timedelta(days=1, minutes=30 * i)
+    return {
+        "is_event": True,
+        "is_all_day": False,
+        "category": "Kimi",
+        "summary": f"Load test #{i}",
+        "start_time": start.strftime("%Y-%m-%d %H:%M:00"),
+        "start_timezone": "Asia/Singapore",
+    }
+
+
+async def run_load(client: GoogleCalendarClient, total: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            result = await client.create_event(make_event(i), "primary", "Asia/Singapore", "Kimi")
+            latencies.append(time.perf_counter() - started)
+            if not result[0]:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "elapsed": elapsed,
+        "throughput": total / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calendar transport load test")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.03, help="fake server latency per call (s)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument(
+        "--include-shared",
+        action="store_true",
+        help="also run the legacy shared-service variant (slow: corrupted sockets hit the HTTP timeout)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+
+    variants = [
+        ("serial", lambda ep: LocalCalendarClient(ep, max_workers=1)),
+        ("pooled", lambda ep: LocalCalendarClient(ep, max_workers=args.workers)),
+    ]
+    if args.include_shared:
+        variants.insert(0, ("shared", lambda ep: SharedServiceClient(ep, max_workers=args.workers, http_timeout=5.0)))
+
+    print(f"requests={args.requests} concurrency={args.concurrency} server latency={args.latency}s")
+    for name, factory in variants:
+        with FakeCalendarServer(latency=args.latency) as server:
+            client = factory(server.api_endpoint)
+            result = asyncio.run(run_load(client, args.requests, args.concurrency))
+            client.close()
+        print(
+            f"{name:<7} {result['elapsed']:6.2f}s  {result['throughput']:7.1f} evt/s  "
+            f"p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms  errors {result['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+数据库调用对事件循环的阻塞基准
+
+并发灌入 process_message，分别使用同步 DatabaseRepository（在事件循环内执行 SQL）
+和 AsyncDatabaseRepository（单写线程 + 读连接池），对比事件循环延迟。
+
+用法（在 services/calendar_bot 目录下）:
+    python -m benchmarks.bench_db_event_loop --users 50 --messages 20
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from src.database import DatabaseRepository, AsyncDatabaseRepository
+from src.handlers import MessageHandlers
+
+from .fakes import (
+    FakeConfig,
+    FakeEventParser,
+    FakeGoogleCalendar,
+    BlockingRepositoryAdapter,
+    make_update,
+    make_context,
+)
+
+
+async def monitor_loop_lag(samples: list, stop: asyncio.Event, interval: float = 0.005):
+    """周期性 sleep，记录实际唤醒时间与预期的差值"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - expected))
+
+
+async def flood(db, users: int, messages: int, llm_latency: float, calendar_latency: float) -> dict:
+    """并发执行 process_message 并统计事件循环延迟"""
+    config = FakeConfig()
+    handlers = MessageHandlers(
+        config=config,
+        db=db,
+        event_parser=FakeEventParser(latency=llm_latency),
+        google_calendar=FakeGoogleCalendar(latency=calendar_latency)
+    )
+    context = make_context()
+
+    async def user_session(user_id: int):
+        for i in range(messages):
+            await handlers.process_message(make_update(user_id, f"明天下午3点开会 #{i}"), context)
+
+    samples = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_loop_lag(samples, stop))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user_session(uid) for uid in range(1, users + 1)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await monitor
+
+    samples.sort()
+    return {
+        "elapsed": elapsed,
+        "throughput": users * messages / elapsed,
+        "lag_mean_ms": statistics.mean(samples) * 1000 if samples else 0.0,
+        "lag_p99_ms": samples[int(len(samples) * 0.99) - 1] * 1000 if samples else 0.0,
+        "lag_max_ms": samples[-1] * 1000 if samples else 0.0,
+    }
+
+
+def print_result(name: str, result: dict):
+    print(
+        f"{name:<8} {result['elapsed']:7.2f}s  {result['throughput']:8.1f} msg/s  "
+        f"lag mean {result['lag_mean_ms']:6.2f} ms  p99 {result['lag_p99_ms']:7.2f} ms  "
+        f"max {result['lag_max_ms']:7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DB event-loop lag benchmark")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.02)
+    parser.add_argument("--calendar-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sync_db = BlockingRepositoryAdapter(DatabaseRepository(str(Path(tmp) / "sync" / "bot.db")))
+        before = asyncio.run(flood(sync_db, args.users, args.messages, args.llm_latency, args.calendar_latency))
+
+        async_db = AsyncDatabaseRepository(str(Path(tmp) / "async" / "bot.db"))
+        after = asyncio.run(flood(async_db, args.users, args.messages, args.llm_latency, args.calendar_latency))
+        async_db.close()
+
+    print(f"users={args.users} messages/user={args.messages}")
+    print_result("before", before)
+    print_result("after", after)
+
+
+if __name__ == "__main__":
+    main()
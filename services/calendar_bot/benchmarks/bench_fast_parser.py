@@ -0,0 +1,97 @@
+"""
+规则快速解析的准确率与延迟基准
+
+对语料中的每条消息运行 FastPathParser，统计命中率、命中结果的准确率、
+误命中（应交给 AI 却被规则解析）以及单次解析耗时。
+
+语料格式见 benchmarks/data/fast_parser_corpus.json：固定 now / timezone /
+family_members 保证结果可复现；expected 为 null 表示该消息应交给 AI，
+否则列出期望的 start_time / is_all_day / summary / category。
+
+用法（在 services/calendar_bot 目录下）:
+    python -m benchmarks.bench_fast_parser
+    python -m benchmarks.bench_fast_parser --corpus my_corpus.json --verbose
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytz
+
+from src.core import FastPathParser
+
+from .fakes import FakeConfig
+
+DEFAULT_CORPUS = Path(__file__).parent / "data" / "fast_parser_corpus.json"
+COMPARED_FIELDS = ("start_time", "is_all_day", "summary", "category")
+
+
+def evaluate(corpus: dict, repeat: int, verbose: bool) -> dict:
+    """逐条解析并与期望结果比较"""
+    parser = FastPathParser()
+    family_members = corpus.get("family_members") or FakeConfig().get_family_members()
+    tz = pytz.timezone(corpus["timezone"])
+    now = tz.localize(datetime.strptime(corpus["now"], "%Y-%m-%d %H:%M:%S"))
+
+    stats = {"total": 0, "parseable": 0, "hits": 0, "correct": 0, "wrong": 0, "false_positive": 0}
+    latencies = []
+
+    for case in corpus["cases"]:
+        expected = case["expected"]
+        explicit = case.get("explicit", False)
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = parser.parse(case["text"], corpus["timezone"], family_members, explicit, now=now)
+        latencies.append((time.perf_counter() - started) / repeat)
+
+        stats["total"] += 1
+        stats["parseable"] += expected is not None
+        if result is None:
+            status = "miss" if expected else "ok"
+        else:
+            stats["hits"] += 1
+            if expected is None:
+                stats["false_positive"] += 1
+                status = "FALSE POSITIVE"
+            elif all(result.get(f) == expected[f] for f in COMPARED_FIELDS):
+                stats["correct"] += 1
+                status = "ok"
+            else:
+                stats["wrong"] += 1
+                status = "WRONG"
+
+        if verbose or status not in ("ok", "miss"):
+            shown = {f: result.get(f) for f in COMPARED_FIELDS} if result else None
+            print(f"  [{status:<14}] {case['text']!r} -> {shown}")
+
+    latencies.sort()
+    stats["latency_mean_us"] = statistics.mean(latencies) * 1e6
+    stats["latency_p99_us"] = latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1e6
+    return stats
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Fast-path parser accuracy/latency benchmark")
+    arg_parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="语料 JSON 文件")
+    arg_parser.add_argument("--repeat", type=int, default=200, help="每条消息重复解析次数（测延迟）")
+    arg_parser.add_argument("--verbose", action="store_true", help="打印每条消息的结果")
+    args = arg_parser.parse_args()
+
+    corpus = json.loads(args.corpus.read_text(encoding="utf-8"))
+    stats = evaluate(corpus, args.repeat, args.verbose)
+
+    hit_rate = stats["correct"] / stats["parseable"] if stats["parseable"] else 0.0
+    precision = stats["correct"] / stats["hits"] if stats["hits"] else 0.0
+    print(f"\ncases:           {stats['total']} ({stats['parseable']} simple enough for the fast path)")
+    print(f"hits:            {stats['hits']}")
+    print(f"hit rate:        {hit_rate:.1%} of simple cases answered correctly without the LLM")
+    print(f"precision:       {precision:.1%} ({stats['wrong']} wrong, {stats['false_positive']} false positives)")
+    print(f"latency:         mean {stats['latency_mean_us']:.1f}µs, p99 {stats['latency_p99_us']:.1f}µs")
+
+
+if __name__ == "__main__":
+    main()
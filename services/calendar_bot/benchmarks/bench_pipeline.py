@@ -0,0 +1,209 @@
+"""
+端到端消息处理基准（全部离线）
+
+N 个用户并发调用 MessageHandlers.process_message，使用真实的 EventParser、
+GoogleCalendarClient 和 AsyncDatabaseRepository，只把外部服务换成进程内替身：
+  - AsyncOpenAI：可配置延迟 / 首个分块延迟，返回预设事件 JSON
+  - Calendar service：events().list / insert / delete 在线程池中阻塞 latency 秒
+  - Telegram：合成的文本 / 图片 Update
+
+输出吞吐量、单条消息端到端延迟分位数、事件循环阻塞时间，以及各阶段耗时（来自 tracer）。
+
+用法（在 services/calendar_bot 目录下）:
+    python -m benchmarks.bench_pipeline --users 50 --messages 10 --llm-latency 0.8
+"""
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from src.core import EventParser, EventValidator, FastPathParser, ImagePreprocessor, PromptBuilder
+from src.database import AsyncDatabaseRepository
+from src.handlers import MessageHandlers
+from src.monitoring import tracer
+
+from .bench_db_event_loop import monitor_loop_lag
+from .fakes import (
+    DEFAULT_FAMILY,
+    FakeAsyncOpenAI,
+    FakeConfig,
+    InProcessCalendarClient,
+    make_context,
+    make_photo_bytes,
+    make_photo_update,
+    make_update,
+)
+
+# 规则解析可以处理的简单短语
+SIMPLE_TEXTS = ["明天下午3点开会", "后天上午10点看牙医", "tomorrow 9am standup", "周五晚上7点吃饭"]
+# 需要 AI 的输入
+COMPLEX_TEXTS = [
+    "下周找个时间和 Kiki 的老师聊一下期末成绩，顺便约个家长会",
+    "航班 SQ318 新加坡飞伦敦，3月2日 23:25 起飞，次日 05:50 到达",
+    "提醒我月底之前把保险续上，最好提前一周",
+]
+# 闲聊（以 "?" 开头，替身返回普通文本）
+CHAT_TEXTS = ["?今天天气怎么样", "?你好"]
+
+
+def percentile(samples: list, q: float) -> float:
+    """最近邻分位数"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[max(0, int(round(q * len(ordered))) - 1)]
+
+
+def build_pipeline(args, db_path: str):
+    """构建真实处理链路（外部服务为替身）"""
+    family = DEFAULT_FAMILY
+    valid_categories = {m["name"] for m in family} | {"Family"}
+
+    client = FakeAsyncOpenAI(latency=args.llm_latency, first_token=args.first_token)
+    parser = EventParser(
+        openai_client=client,
+        model_name="fake/model",
+        fast_parser=FastPathParser() if args.fast_path else None,
+        streaming=args.streaming,
+        prompt_builder=PromptBuilder(family)
+    )
+    calendar = InProcessCalendarClient(
+        EventValidator(valid_categories=valid_categories),
+        latency=args.calendar_latency,
+        max_workers=args.calendar_workers,
+        events_cache_ttl=0
+    )
+    db = AsyncDatabaseRepository(db_path)
+    config = FakeConfig()
+    config.conflict_check_mode = args.conflict_mode
+    handlers = MessageHandlers(
+        config=config,
+        db=db,
+        event_parser=parser,
+        google_calendar=calendar,
+        image_preprocessor=ImagePreprocessor() if args.photo_ratio > 0 else None
+    )
+    return handlers, client, calendar, db
+
+
+async def run(args) -> dict:
+    """并发驱动 process_message 并收集指标"""
+    with tempfile.TemporaryDirectory() as tmp:
+        handlers, client, calendar, db = build_pipeline(args, str(Path(tmp) / "bot.db"))
+        context = make_context()
+        photo = make_photo_bytes() if args.photo_ratio > 0 else b""
+        rng = random.Random(args.seed)
+        latencies = []
+
+        def next_update(user_id: int, i: int):
+            roll = rng.random()
+            if roll < args.photo_ratio:
+                return make_photo_update(user_id, photo, latency=args.download_latency)
+            roll -= args.photo_ratio
+            if roll < args.chat_ratio:
+                return make_update(user_id, rng.choice(CHAT_TEXTS))
+            roll -= args.chat_ratio
+            if roll < args.simple_ratio:
+                return make_update(user_id, rng.choice(SIMPLE_TEXTS))
+            return make_update(user_id, f"{rng.choice(COMPLEX_TEXTS)} #{user_id}-{i}")
+
+        async def user_session(user_id: int):
+            for i in range(args.messages):
+                update = next_update(user_id, i)
+                started = time.perf_counter()
+                await handlers.process_message(update, context)
+                latencies.append(time.perf_counter() - started)
+                if args.think:
+                    await asyncio.sleep(args.think * rng.uniform(0.5, 1.5))
+
+        tracer.reset()
+        lag = []
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(monitor_loop_lag(lag, stop))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user_session(uid) for uid in range(1, args.users + 1)))
+        elapsed = time.perf_counter() - started
+
+        stop.set()
+        await monitor
+        calendar.close()
+        if handlers.image_preprocessor:
+            handlers.image_preprocessor.close()
+        db.close()
+
+    total = args.users * args.messages
+    return {
+        "elapsed": elapsed,
+        "throughput": total / elapsed,
+        "latency": latencies,
+        "lag": lag,
+        "llm_calls": client.calls,
+        "events": sum(len(events) for events in calendar.store.events.values()),
+    }
+
+
+def print_report(args, result: dict):
+    lat = [x * 1000 for x in result["latency"]]
+    lag = [x * 1000 for x in result["lag"]]
+    total = args.users * args.messages
+
+    print(
+        f"users={args.users} messages/user={args.messages} llm={args.llm_latency}s "
+        f"calendar={args.calendar_latency}s streaming={args.streaming} fast_path={args.fast_path} "
+        f"conflicts={args.conflict_mode}"
+    )
+    print(f"throughput  {total} msgs in {result['elapsed']:.2f}s = {result['throughput']:.1f} msg/s")
+    print(
+        f"latency ms  p50 {percentile(lat, 0.5):8.1f}  p95 {percentile(lat, 0.95):8.1f}  "
+        f"p99 {percentile(lat, 0.99):8.1f}  max {max(lat, default=0):8.1f}"
+    )
+    print(
+        f"loop lag ms mean {statistics.mean(lag) if lag else 0:6.2f}  p99 {percentile(lag, 0.99):7.2f}  "
+        f"max {max(lag, default=0):7.2f}  blocked total {sum(lag):8.1f}"
+    )
+    print(f"llm calls   {result['llm_calls']}  events created {result['events']}")
+
+    print(f"\n{'stage':<32}{'n':>7}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for row in tracer.snapshot():
+        name = row["stage"] + (f" [{row['model']}]" if row["model"] else "")
+        print(
+            f"{name[:31]:<32}{row['count']:>7}"
+            f"{row['p50'] * 1000:>9.1f}{row['p95'] * 1000:>9.1f}{row['p99'] * 1000:>9.1f}"
+        )
+    counters = tracer.counters()
+    if counters:
+        print("  " + "  ".join(f"{k}={v}" for k, v in sorted(counters.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end message pipeline benchmark")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=10, help="messages per user")
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between a user's messages (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.8)
+    parser.add_argument("--first-token", type=float, default=0.3)
+    parser.add_argument("--calendar-latency", type=float, default=0.15)
+    parser.add_argument("--calendar-workers", type=int, default=8)
+    parser.add_argument("--download-latency", type=float, default=0.1)
+    parser.add_argument("--conflict-mode", default="pipelined")
+    parser.add_argument("--simple-ratio", type=float, default=0.3, help="share of fast-path-eligible texts")
+    parser.add_argument("--chat-ratio", type=float, default=0.1)
+    parser.add_argument("--photo-ratio", type=float, default=0.0)
+    parser.add_argument("--no-streaming", dest="streaming", action="store_false")
+    parser.add_argument("--no-fast-path", dest="fast_path", action="store_false")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    result = asyncio.run(run(args))
+    print_report(args, result)
+
+
+if __name__ == "__main__":
+    main()
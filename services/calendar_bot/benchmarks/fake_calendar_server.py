@@ -0,0 +1,235 @@
+"""
+本地假 Google Calendar 服务器
+实现 Calendar v3 的 events list / insert / delete（含 syncToken 增量同步）
+以及 multipart HTTP batch，支持 HTTP/1.1 keep-alive 和可配置延迟
+"""
+import json
+import itertools
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import urlparse, parse_qs, unquote
+
+
+def _parse_time(value: str, timezone: str = None) -> datetime:
+    """解析 RFC3339 字符串，无偏移时使用 timeZone 字段"""
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=ZoneInfo(timezone or "UTC"))
+    return dt
+
+
+class FakeCalendarStore:
+    """内存中的日历数据"""
+
+    def __init__(self):
+        self.events: Dict[str, Dict[str, Dict]] = {}
+        self.changes: Dict[str, Dict[str, tuple]] = {}
+        self.seq = 0
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _record(self, calendar_id: str, event_id: str, payload: Dict) -> None:
+        """记录变更（调用方持有锁）"""
+        self.seq += 1
+        self.changes.setdefault(calendar_id, {})[event_id] = (self.seq, payload)
+
+    def insert(self, calendar_id: str, body: Dict) -> Dict:
+        with self.lock:
+            event_id = f"fake{next(self._ids)}"
+            event = dict(body, id=event_id, htmlLink=f"https://calendar.example/event?eid={event_id}")
+            self.events.setdefault(calendar_id, {})[event_id] = event
+            self._record(calendar_id, event_id, event)
+            return event
+
+    def delete(self, calendar_id: str, event_id: str) -> bool:
+        with self.lock:
+            if self.events.get(calendar_id, {}).pop(event_id, None) is None:
+                return False
+            self._record(calendar_id, event_id, {"id": event_id, "status": "cancelled"})
+            return True
+
+    def sync(self, calendar_id: str, sync_token: str = None) -> tuple:
+        """返回 (变更列表, 新 token)；token 为空时返回全部事件"""
+        with self.lock:
+            if not sync_token:
+                return list(self.events.get(calendar_id, {}).values()), str(self.seq)
+            since = int(sync_token)
+            changed = [
+                payload for seq, payload in self.changes.get(calendar_id, {}).values()
+                if seq > since
+            ]
+            return changed, str(self.seq)
+
+    def list(self, calendar_id: str, time_min: str = None, time_max: str = None) -> List[Dict]:
+        with self.lock:
+            items = list(self.events.get(calendar_id, {}).values())
+
+        if time_min and time_max:
+            lo, hi = _parse_time(time_min), _parse_time(time_max)
+            selected = []
+            for event in items:
+                start, end = event["start"], event["end"]
+                if "dateTime" not in start or "dateTime" not in end:
+                    continue
+                if (_parse_time(start["dateTime"], start.get("timeZone")) < hi
+                        and _parse_time(end["dateTime"], end.get("timeZone")) > lo):
+                    selected.append(event)
+            items = selected
+        return items
+
+
+class FakeCalendarHandler(BaseHTTPRequestHandler):
+    """Calendar v3 REST 子集"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    store: FakeCalendarStore = None
+    latency: float = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _route(self):
+        parsed = urlparse(self.path)
+        parts = [unquote(p) for p in parsed.path.strip("/").split("/")]
+        # calendar/v3/calendars/{calendarId}/events[/{eventId}]
+        if len(parts) < 5 or parts[:3] != ["calendar", "v3", "calendars"] or parts[4] != "events":
+            return None, None, parse_qs(parsed.query)
+        event_id = parts[5] if len(parts) > 5 else None
+        return parts[3], event_id, parse_qs(parsed.query)
+
+    def _send_json(self, status: int, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _dispatch(self, method: str, path: str, body: bytes) -> tuple:
+        """处理单个子请求，返回 (状态码, JSON 或 None)"""
+        self.path = path
+        calendar_id, event_id, query = self._route()
+        if calendar_id is None:
+            return 404, {"error": {"code": 404, "message": "Not Found"}}
+
+        if method == "POST":
+            return 200, self.store.insert(calendar_id, json.loads(body or b"{}"))
+        if method == "DELETE":
+            if not self.store.delete(calendar_id, event_id):
+                return 404, {"error": {"code": 404, "message": "Not Found"}}
+            return 204, None
+        return 405, {"error": {"code": 405, "message": "Method Not Allowed"}}
+
+    def _handle_batch(self, body: bytes):
+        """处理 multipart/mixed batch 请求（一次延迟）"""
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+        )
+
+        boundary = uuid.uuid4().hex
+        chunks = []
+        for part in message.iter_parts():
+            content_id = part["Content-ID"].strip("<>")
+            raw = part.get_payload(decode=True)
+            head, _, sub_body = raw.partition(b"\r\n\r\n")
+            if not _:
+                head, _, sub_body = raw.partition(b"\n\n")
+            method, path, _ = head.split(b"\n", 1)[0].decode().strip().split(" ", 2)
+
+            status, payload = self._dispatch(method, path, sub_body.strip())
+            response = f"HTTP/1.1 {status} OK\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n"
+            response += json.dumps(payload) if payload is not None else ""
+            chunks.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n{response}\r\n"
+            )
+
+        data = ("".join(chunks) + f"--{boundary}--\r\n").encode()
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/mixed; boundary={boundary}")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        calendar_id, _, query = self._route()
+        if calendar_id is None:
+            return self._send_json(404, {"error": {"code": 404, "message": "Not Found"}})
+        if "timeMax" not in query:
+            # 同步请求（全量或增量）
+            items, next_token = self.store.sync(calendar_id, query.get("syncToken", [None])[0])
+            return self._send_json(200, {"kind": "calendar#events", "items": items, "nextSyncToken": next_token})
+
+        items = self.store.list(
+            calendar_id,
+            query.get("timeMin", [None])[0],
+            query.get("timeMax", [None])[0]
+        )
+        self._send_json(200, {"kind": "calendar#events", "items": items})
+
+    def do_POST(self):
+        body = self._read_body()
+        time.sleep(self.latency)
+        if self.path.startswith("/batch"):
+            return self._handle_batch(body)
+        calendar_id, _, _ = self._route()
+        if calendar_id is None:
+            return self._send_json(404, {"error": {"code": 404, "message": "Not Found"}})
+        self._send_json(200, self.store.insert(calendar_id, json.loads(body or b"{}")))
+
+    def do_DELETE(self):
+        time.sleep(self.latency)
+        calendar_id, event_id, _ = self._route()
+        if calendar_id is None or not self.store.delete(calendar_id, event_id):
+            return self._send_json(404, {"error": {"code": 404, "message": "Not Found"}})
+        self._send_json(204)
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    """客户端断开连接时不打印堆栈"""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+class FakeCalendarServer:
+    """在后台线程运行的假 Calendar 服务器"""
+
+    def __init__(self, latency: float = 0.05, host: str = "127.0.0.1", port: int = 0):
+        self.store = FakeCalendarStore()
+        handler = type("Handler", (FakeCalendarHandler,), {"store": self.store, "latency": latency})
+        self.httpd = _QuietHTTPServer((host, port), handler)
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def root_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def api_endpoint(self) -> str:
+        return f"{self.root_url}calendar/v3/"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
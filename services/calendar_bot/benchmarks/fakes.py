@@ -0,0 +1,457 @@
+"""
+基准测试用的进程内替身
+模拟 Telegram Update / Context、LLM（解析器或 AsyncOpenAI 客户端）和 Google Calendar
+（客户端或 service），不访问任何外部服务
+"""
+import json
+import time
+import asyncio
+import itertools
+from io import BytesIO
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+import pytz
+
+from src.database import RecentUpdates
+from src.integrations import GoogleCalendarClient
+
+from .fake_calendar_server import FakeCalendarStore
+
+
+DEFAULT_FAMILY = [
+    {"name": "Kimi", "role": "Default / Father", "env_var": "GOOGLE_CALENDAR_ID", "icon": "👱‍♂️"},
+    {"name": "Kiki", "role": "Daughter", "env_var": "GOOGLE_CALENDAR_ID_KIKI", "icon": "👧"},
+]
+
+_update_ids = itertools.count(1)
+_message_ids = itertools.count(1)
+
+
+class FakeConfig:
+    """最小化配置对象"""
+
+    def __init__(self, allowed_ids: Optional[List[int]] = None):
+        self.allowed_ids = allowed_ids or list(range(1, 10001))
+        self.llm_model_name = "fake/model"
+        self.google_calendar_id = "primary"
+        self.google_credentials_json = "{}"
+        self.default_timezone = "Asia/Singapore"
+        self.conflict_check_mode = "pipelined"
+
+    def get_family_members(self) -> List[Dict[str, Any]]:
+        return DEFAULT_FAMILY
+
+    def get_calendar_id(self, category: str) -> str:
+        return f"{category.lower()}@calendar"
+
+    def get_calendar_labels(self) -> Dict[str, str]:
+        labels = {self.get_calendar_id(m["name"]): f"{m['icon']} {m['name']}" for m in DEFAULT_FAMILY}
+        labels[self.get_calendar_id("Family")] = "🏠 Family"
+        return labels
+
+
+class FakeSentMessage:
+    """bot 发出的消息"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    async def edit_text(self, text: str, **kwargs):
+        self.text = text
+        return self
+
+    async def delete(self):
+        self.text = None
+        return True
+
+
+class FakeMessage:
+    """用户发来的消息"""
+
+    def __init__(self, text: str, chat_id: int, photo: Optional[list] = None, caption: Optional[str] = None):
+        self.text = text
+        self.caption = caption
+        self.photo = photo or []
+        self.message_id = next(_message_ids)
+        self.chat_id = chat_id
+        self.replies: List[FakeSentMessage] = []
+
+    async def reply_text(self, text: str, **kwargs):
+        sent = FakeSentMessage(text)
+        self.replies.append(sent)
+        return sent
+
+
+def make_update(user_id: int, text: str) -> SimpleNamespace:
+    """构造一条文本消息 Update"""
+    message = FakeMessage(text, chat_id=user_id)
+    return SimpleNamespace(
+        update_id=next(_update_ids),
+        message=message,
+        effective_user=SimpleNamespace(id=user_id),
+        effective_chat=SimpleNamespace(id=user_id),
+        effective_message=message,
+    )
+
+
+class FakeFile:
+    """Telegram File 替身"""
+
+    def __init__(self, data: bytes, latency: float):
+        self.data = data
+        self.latency = latency
+
+    async def download_to_memory(self, out: BytesIO):
+        await asyncio.sleep(self.latency)
+        out.write(self.data)
+
+
+class FakePhotoSize:
+    """Telegram PhotoSize 替身（下载耗时模拟 Telegram 文件服务器）"""
+
+    def __init__(self, width: int, height: int, data: bytes, latency: float = 0.05):
+        self.width = width
+        self.height = height
+        self.file_size = len(data)
+        self._file = FakeFile(data, latency)
+
+    async def get_file(self):
+        return self._file
+
+
+def make_photo_bytes(width: int = 1280, height: int = 960) -> bytes:
+    """生成一张 JPEG（未安装 Pillow 时返回占位字节，预处理器会原样发送）"""
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        return b"\xff\xd8" + bytes(width * height // 20)
+
+    img = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(img)
+    for y in range(40, height - 40, 48):
+        draw.text((60, y), "Concert 2025-03-01 19:30 Esplanade Hall" * 2, fill="black")
+    out = BytesIO()
+    img.save(out, format="JPEG", quality=90)
+    return out.getvalue()
+
+
+def make_photo_update(user_id: int, data: bytes, caption: Optional[str] = None, latency: float = 0.05) -> SimpleNamespace:
+    """构造一条图片消息 Update（含缩略图和原图两个尺寸）"""
+    photo = [
+        FakePhotoSize(320, 240, data[: len(data) // 16], latency),
+        FakePhotoSize(1280, 960, data, latency),
+    ]
+    message = FakeMessage(None, chat_id=user_id, photo=photo, caption=caption)
+    return SimpleNamespace(
+        update_id=next(_update_ids),
+        message=message,
+        effective_user=SimpleNamespace(id=user_id),
+        effective_chat=SimpleNamespace(id=user_id),
+        effective_message=message,
+    )
+
+
+class FakeBot:
+    """只实现处理器会用到的 bot 方法"""
+
+    async def send_chat_action(self, chat_id: int, action: str):
+        return True
+
+
+def make_context() -> SimpleNamespace:
+    """构造 ContextTypes.DEFAULT_TYPE 替身"""
+    return SimpleNamespace(bot=FakeBot(), args=[])
+
+
+class FakeEventParser:
+    """固定延迟、固定输出的解析器"""
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.model_name = "fake/model"
+        self.calls = 0
+
+    async def parse_text_message(self, text, user_timezone, family_members, is_explicit_event=False, on_text=None):
+        return await self.parse_text_messages(text.split("\n"), user_timezone, family_members, is_explicit_event)
+
+    async def parse_text_messages(self, texts, user_timezone, family_members, is_explicit_event=False, on_text=None):
+        """每次调用模拟一次 LLM 请求，每行输出一个事件"""
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        start = datetime.now(pytz.timezone(user_timezone)) + timedelta(days=1)
+        return "EVENT", [{
+            "is_event": True,
+            "is_all_day": False,
+            "category": family_members[0]["name"],
+            "summary": text[:40],
+            "start_time": start.strftime("%Y-%m-%d 15:00:00"),
+        } for text in texts]
+
+
+class FakeGoogleCalendar:
+    """固定延迟的日历客户端（直接返回 create_event 元组）"""
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self._ids = itertools.count(1)
+        self.created: List[str] = []
+
+    async def create_event(self, event_data, calendar_id, user_current_tz, default_category, conflict_mode="pipelined"):
+        self.created.append(event_data["summary"])
+        await asyncio.sleep(self.latency)
+        tz = pytz.timezone(user_current_tz)
+        dt_start = tz.localize(datetime.strptime(event_data["start_time"], "%Y-%m-%d %H:%M:%S"))
+        dt_end = dt_start + timedelta(hours=1)
+        event_id = f"evt{next(self._ids)}"
+        return (
+            True,
+            f"https://calendar.example/{event_id}",
+            [],
+            dt_start,
+            dt_end,
+            calendar_id,
+            event_id,
+            "",
+            False,
+        )
+
+    async def create_events(self, items, user_current_tz, default_category, conflict_mode="pipelined"):
+        return [
+            await self.create_event(event_data, calendar_id, user_current_tz, default_category, conflict_mode)
+            for event_data, calendar_id in items
+        ]
+
+    async def delete_events(self, items):
+        await asyncio.sleep(self.latency)
+        return True, "已删除"
+
+    async def check_conflicts(self, calendar_id, start_dt, end_dt, exclude_event_id=None):
+        await asyncio.sleep(self.latency)
+        return []
+
+    async def delete_event(self, calendar_id, event_id):
+        await asyncio.sleep(self.latency)
+        return True, "已删除"
+
+
+class BlockingRepositoryAdapter:
+    """
+    把同步 DatabaseRepository 包装成 awaitable 接口
+    直接在事件循环线程执行 SQL，复现改造前的阻塞行为
+    """
+
+    def __init__(self, repo):
+        self.repo = repo
+        self.recent_updates = RecentUpdates()
+
+    async def mark_update_processed(self, update_id: int, chat_id: int, message_id: int) -> bool:
+        return self.recent_updates.check_and_add(update_id, chat_id, message_id)
+
+    async def get_user_timezone(self, user_id: int) -> str:
+        return self.repo.get_user_timezone(user_id)
+
+    async def set_user_timezone(self, user_id: int, timezone: str) -> None:
+        self.repo.set_user_timezone(user_id, timezone)
+
+    async def get_user_preference(self, user_id: int, key: str):
+        return self.repo.get_user_preference(user_id, key)
+
+    async def set_user_preference(self, user_id: int, key: str, value: str) -> None:
+        self.repo.set_user_preference(user_id, key, value)
+
+    async def save_event_history(self, user_id, calendar_id, google_event_id, summary) -> int:
+        return self.repo.save_event_history(user_id, calendar_id, google_event_id, summary)
+
+    async def get_event_from_history(self, event_id: int):
+        return self.repo.get_event_from_history(event_id)
+
+    async def get_last_event_summary(self, user_id: int):
+        return self.repo.get_last_event_summary(user_id)
+
+
+# ==================== AsyncOpenAI 替身 ====================
+
+def canned_event_json(text: str, timezone: str = "Asia/Singapore", category: str = "Kimi") -> str:
+    """
+    按输入生成预设的事件 JSON（每行一个事件，时间为明天 15:00 起每行顺延一小时）
+    以 "?" 开头的输入视为闲聊，返回普通文本
+    """
+    if text.startswith("?"):
+        return "好的，这是一条普通聊天回复，不包含日程信息。"
+
+    start = datetime.now(pytz.timezone(timezone)).replace(hour=15, minute=0, second=0, microsecond=0)
+    start += timedelta(days=1)
+    lines = [line.strip() for line in text.split("\n") if line.strip()]
+    events = []
+    for i, line in enumerate(lines):
+        begin = start + timedelta(hours=i)
+        events.append({
+            "is_event": True,
+            "is_all_day": False,
+            "category": category,
+            "summary": line[:40],
+            "start_time": begin.strftime("%Y-%m-%d %H:%M:%S"),
+            "start_timezone": timezone,
+            "end_time": (begin + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S"),
+            "end_timezone": timezone,
+        })
+    if len(events) == 1:
+        return json.dumps(events[0], ensure_ascii=False)
+    return json.dumps({"is_event": True, "events": events}, ensure_ascii=False)
+
+
+class FakeStream:
+    """流式响应：首个分块等待 first_token，其余分块平分剩余延迟"""
+
+    def __init__(self, content: str, first_token: float, rest: float, chunk_size: int):
+        self.chunks = [content[i:i + chunk_size] for i in range(0, len(content), chunk_size)] or [""]
+        self.first_token = first_token
+        self.per_chunk = rest / max(1, len(self.chunks) - 1)
+        self.closed = False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for i, piece in enumerate(self.chunks):
+            await asyncio.sleep(self.first_token if i == 0 else self.per_chunk)
+            if self.closed:
+                return
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeCompletions:
+    """chat.completions 替身"""
+
+    def __init__(self, client: "FakeAsyncOpenAI"):
+        self.client = client
+
+    async def create(self, model: str, messages: List[Dict], stream: bool = False, **kwargs):
+        client = self.client
+        client.calls += 1
+        content = messages[-1]["content"]
+        if isinstance(content, list):
+            # 视觉请求：取文字部分
+            content = next((p["text"] for p in content if p.get("type") == "text"), "")
+        reply = client.reply(content)
+
+        if stream:
+            first_token = min(client.first_token, client.latency)
+            return FakeStream(reply, first_token, client.latency - first_token, client.chunk_size)
+
+        await asyncio.sleep(client.latency)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+
+
+class FakeAsyncOpenAI:
+    """AsyncOpenAI 替身：按配置的延迟返回预设 JSON，支持 stream=True"""
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        first_token: float = 0.2,
+        chunk_size: int = 24,
+        reply: Optional[Callable[[str], str]] = None
+    ):
+        """
+        Args:
+            latency: 完整响应耗时（秒）
+            first_token: 流式模式下首个分块的耗时（秒）
+            chunk_size: 流式分块字符数
+            reply: 根据用户输入生成响应文本，默认 canned_event_json
+        """
+        self.latency = latency
+        self.first_token = first_token
+        self.chunk_size = chunk_size
+        self.reply = reply or canned_event_json
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=FakeCompletions(self))
+
+
+# ==================== Google Calendar service 替身 ====================
+
+class FakeCalendarRequest:
+    """googleapiclient HttpRequest 替身：execute() 在调用线程中阻塞 latency 秒"""
+
+    def __init__(self, func: Callable[[], Any], latency: float):
+        self.func = func
+        self.latency = latency
+
+    def execute(self):
+        time.sleep(self.latency)
+        return self.func()
+
+
+class FakeEventsResource:
+    """events() 资源：list / insert / delete"""
+
+    def __init__(self, store: FakeCalendarStore, latency: float):
+        self.store = store
+        self.latency = latency
+
+    def list(self, calendarId: str, timeMin: str = None, timeMax: str = None, **kwargs):
+        return FakeCalendarRequest(
+            lambda: {"items": self.store.list(calendarId, timeMin, timeMax)},
+            self.latency
+        )
+
+    def insert(self, calendarId: str, body: Dict):
+        return FakeCalendarRequest(lambda: self.store.insert(calendarId, body), self.latency)
+
+    def delete(self, calendarId: str, eventId: str):
+        def run():
+            if not self.store.delete(calendarId, eventId):
+                raise KeyError(f"404 event not found: {eventId}")
+            return ""
+        return FakeCalendarRequest(run, self.latency)
+
+
+class FakeBatchRequest:
+    """BatchHttpRequest 替身：整批只计一次延迟"""
+
+    def __init__(self, callback: Callable, latency: float):
+        self.callback = callback
+        self.latency = latency
+        self.requests = []
+
+    def add(self, request: FakeCalendarRequest, request_id: str = None):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        time.sleep(self.latency)
+        for request_id, request in self.requests:
+            try:
+                self.callback(request_id, request.func(), None)
+            except Exception as e:
+                self.callback(request_id, None, e)
+
+
+class FakeCalendarService:
+    """build('calendar', 'v3') 返回的 service 替身"""
+
+    def __init__(self, store: FakeCalendarStore, latency: float):
+        self.store = store
+        self.latency = latency
+
+    def events(self) -> FakeEventsResource:
+        return FakeEventsResource(self.store, self.latency)
+
+    def new_batch_http_request(self, callback: Callable = None) -> FakeBatchRequest:
+        return FakeBatchRequest(callback, self.latency)
+
+
+class InProcessCalendarClient(GoogleCalendarClient):
+    """使用进程内 service 替身的真实客户端（线程池、冲突检查、缓存逻辑均不变）"""
+
+    def __init__(self, event_validator, latency: float = 0.15, store: Optional[FakeCalendarStore] = None, **kwargs):
+        super().__init__(credentials_json="{}", event_validator=event_validator, **kwargs)
+        self.store = store or FakeCalendarStore()
+        self.latency = latency
+
+    def _build_service(self):
+        return FakeCalendarService(self.store, self.latency)
@@ -0,0 +1,105 @@
+"""
+Webhook 端点本地冒烟测试
+
+不连接 Telegram：启动 WebhookServer 的 aiohttp 应用，向端点投递固定的 Update JSON，
+检查 secret token 校验、非法负载处理，以及 Update 是否进入 Application.update_queue
+并交给原有处理器注册处理。
+
+用法（在 services/calendar_bot 目录下）:
+    python -m benchmarks.webhook_smoke
+"""
+import asyncio
+import json
+import logging
+
+from aiohttp import ClientSession, web
+from telegram import Update
+from telegram.ext import ApplicationBuilder, MessageHandler, filters
+from telegram.request import BaseRequest
+
+from src.server import WebhookServer
+
+SECRET = "smoke-test-secret"
+CANNED_UPDATE = {
+    "update_id": 1001,
+    "message": {
+        "message_id": 42,
+        "date": 1736910000,
+        "chat": {"id": 7, "type": "private", "first_name": "Kimi"},
+        "from": {"id": 7, "is_bot": False, "first_name": "Kimi"},
+        "text": "明天下午3点开会"
+    }
+}
+
+
+class OfflineRequest(BaseRequest):
+    """本地应答 Bot API 请求（getMe 返回固定机器人信息，其余返回成功）"""
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None):
+        result = True
+        if url.endswith("/getMe"):
+            result = {"id": 123456, "is_bot": True, "first_name": "SmokeBot", "username": "smoke_bot"}
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+
+async def main():
+    application = (
+        ApplicationBuilder()
+        .token("123456:SMOKE-TEST")
+        .request(OfflineRequest())
+        .get_updates_request(OfflineRequest())
+        .build()
+    )
+    await application.initialize()
+    received = []
+
+    async def record(update: Update, context):
+        received.append(update.message.text)
+
+    application.add_handler(MessageHandler(filters.ALL, record))
+
+    server = WebhookServer(application, "http://127.0.0.1", SECRET, url_path="/telegram", port=0)
+    runner = web.AppRunner(server.build_web_app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/telegram"
+
+    checks = []
+    async with ClientSession() as session:
+        async with session.post(url, json=CANNED_UPDATE, headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"}) as r:
+            checks.append(("wrong secret -> 403", r.status == 403))
+        async with session.post(url, data="not json", headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}) as r:
+            checks.append(("malformed body -> 400", r.status == 400))
+        async with session.post(url, json=CANNED_UPDATE, headers={"X-Telegram-Bot-Api-Secret-Token": SECRET}) as r:
+            checks.append(("valid update -> 200", r.status == 200))
+        async with session.get(f"http://127.0.0.1:{port}/healthz") as r:
+            checks.append(("healthz -> 200", r.status == 200))
+
+    checks.append(("update queued", application.update_queue.qsize() == 1))
+
+    # 与 Application 的 update 分发流程一致：从队列取出并交给已注册的处理器
+    update = application.update_queue.get_nowait()
+    await application.process_update(update)
+    checks.append(("handler received canned text", received == [CANNED_UPDATE["message"]["text"]]))
+
+    await runner.cleanup()
+    await application.shutdown()
+
+    for name, ok in checks:
+        print(f"{'✅' if ok else '❌'} {name}")
+    if not all(ok for _, ok in checks):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main())
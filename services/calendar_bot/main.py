@@ -1,17 +1,30 @@
 """
 Calendar Bot 主程序
 """
+import os
+import signal
+import asyncio
 import logging
-from collections import deque
 
 from openai import AsyncOpenAI
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, CallbackQueryHandler, filters
 
-from src.config import load_config
-from src.database import DatabaseRepository
-from src.core import EventParser, EventValidator
-from src.integrations import GoogleCalendarClient, ZeaburClient
-from src.handlers import CommandHandlers, MessageHandlers, CallbackHandlers
+from src.config import load_config, load_auth_lists
+from src.database import AsyncDatabaseRepository
+from src.core import (
+    EventParser,
+    EventValidator,
+    FastPathParser,
+    ImagePreprocessor,
+    LLMResponseCache,
+    ModelRouter,
+    PromptBuilder,
+    ResilientLLM
+)
+from src.integrations import GoogleCalendarClient, FreeBusyIndex, ZeaburClient
+from src.handlers import Authorizer, CommandHandlers, MessageHandlers, CallbackHandlers
+from src.monitoring import tracer
+from src.server import WebhookServer, MetricsServer
 
 
 def setup_logging(log_level: str):
@@ -31,34 +44,105 @@ def main():
     logger = logging.getLogger(__name__)
     logger.info("🤖 Calendar Bot v3.0 (Refactored) Starting...")
 
-    # 初始化数据库
-    db = DatabaseRepository(config.database_path)
+    # 阶段耗时追踪
+    tracer.configure(window=config.trace_window, log_spans=config.trace_log_spans)
 
-    # 初始化 OpenAI 客户端
+    # 初始化数据库（异步仓库，避免 SQLite 调用阻塞事件循环）
+    db = AsyncDatabaseRepository(
+        config.database_path,
+        cache_metrics_hook=lambda event, user_id: tracer.count(f"timezone_cache_{event}")
+    )
+
+    # 初始化 OpenAI 客户端（重试与超时由 ResilientLLM 统一控制，客户端自身不重试）
     openai_client = AsyncOpenAI(
         api_key=config.openrouter_api_key,
         base_url=config.openrouter_base_url,
-        timeout=60.0
+        timeout=config.llm_attempt_timeout,
+        max_retries=0
     )
 
-    # 初始化事件解析器
-    event_parser = EventParser(
-        openai_client=openai_client,
-        model_name=config.llm_model_name
+    # LLM 容错：超时重试、总时限、熔断与备用模型回退
+    llm_models = config.llm_models
+    llm = ResilientLLM(
+        models=llm_models,
+        attempt_timeout=config.llm_attempt_timeout,
+        max_attempts=config.llm_max_attempts,
+        deadline=config.llm_deadline,
+        breaker_threshold=config.llm_breaker_threshold,
+        breaker_reset=config.llm_breaker_reset
+    )
+    if len(llm_models) > 1:
+        logger.info(f"🔀 LLM fallback models: {', '.join(llm_models[1:])}")
+
+    # 模型路由：文本 / 图片各用各的模型，答案未通过校验时升级
+    llm_routes = config.llm_routes
+    model_router = ModelRouter(
+        routes=llm_routes,
+        prices=config.get_model_prices(),
+        cost_weight=config.llm_router_cost_weight,
+        explore_rate=config.llm_router_explore
+    )
+    logger.info(
+        f"🧭 LLM routes: text={','.join(llm_routes['text'])} vision={','.join(llm_routes['vision'])} "
+        f"escalation={','.join(llm_routes['escalation']) or '-'}"
     )
 
+    # 初始化 LLM 响应缓存（可选）
+    response_cache = None
+    if config.llm_cache_ttl > 0:
+        response_cache = LLMResponseCache(
+            db_path=os.path.join(os.path.dirname(config.database_path), "llm_cache.db"),
+            ttl=config.llm_cache_ttl,
+            max_entries=config.llm_cache_max_entries
+        )
+
     # 初始化事件验证器
     family_members = config.get_family_members()
     valid_categories = {m["name"] for m in family_members}
     valid_categories.add("Family")
     event_validator = EventValidator(valid_categories=valid_categories)
 
+    # 初始化事件解析器
+    event_parser = EventParser(
+        openai_client=openai_client,
+        model_name=llm_routes["text"][0],
+        response_cache=response_cache,
+        fast_parser=FastPathParser() if config.fast_path_parser else None,
+        streaming=config.llm_streaming,
+        prompt_builder=PromptBuilder(config.get_family_members()),
+        llm=llm,
+        router=model_router,
+        validator=event_validator
+    )
+
+    # 初始化图片预处理器（可选）
+    image_preprocessor = None
+    if config.image_max_edge > 0:
+        image_preprocessor = ImagePreprocessor(
+            max_edge=config.image_max_edge,
+            quality=config.image_quality,
+            image_format=config.image_format,
+            crop_to_text=config.image_crop_to_text
+        )
+
     # 初始化 Google Calendar 客户端
     google_calendar = GoogleCalendarClient(
         credentials_json=config.google_credentials_json,
-        event_validator=event_validator
+        event_validator=event_validator,
+        events_cache_ttl=config.events_cache_ttl
     )
 
+    # 初始化本地忙闲索引（可选）
+    freebusy_index = None
+    if config.freebusy_sync_interval > 0:
+        freebusy_index = FreeBusyIndex(
+            google_calendar=google_calendar,
+            db=db,
+            calendar_labels=config.get_calendar_labels(),
+            sync_interval=config.freebusy_sync_interval
+        )
+        google_calendar.freebusy = freebusy_index
+
     # 初始化 Zeabur 客户端（可选）
     zeabur_client = None
     if config.zeabur_api_token:
@@ -68,38 +152,96 @@ def main():
         )
         logger.info("✅ Zeabur client initialized")
 
+    # 初始化授权检查（启动时解析一次，SIGHUP 时重新读取 AUTH_FILE 或 .env）
+    user_ids, chat_ids = load_auth_lists(config) if config.auth_file else (config.allowed_ids, config.allowed_chats)
+    authorizer = Authorizer(
+        user_ids,
+        chat_ids,
+        reply_interval=config.auth_reply_interval,
+        loader=lambda: load_auth_lists(config)
+    )
+
     # 初始化处理器
     command_handlers = CommandHandlers(
         config=config,
         db=db,
         google_calendar=google_calendar,
-        zeabur_client=zeabur_client
+        zeabur_client=zeabur_client,
+        authorizer=authorizer
     )
 
-    processed_ids = deque(maxlen=200)  # 防止重复处理
     message_handlers = MessageHandlers(
         config=config,
         db=db,
         event_parser=event_parser,
         google_calendar=google_calendar,
-        processed_ids_queue=processed_ids
+        image_preprocessor=image_preprocessor,
+        debounce=config.message_debounce,
+        max_pending=config.message_max_pending,
+        max_concurrency=config.message_concurrency,
+        authorizer=authorizer
     )
 
     callback_handlers = CallbackHandlers(
         config=config,
         db=db,
-        google_calendar=google_calendar
+        google_calendar=google_calendar,
+        authorizer=authorizer
     )
 
+    # /metrics 单独监听（Webhook 模式下也不挂在对公网开放的 Webhook 端口上）
+    metrics_server = None
+    if config.metrics_enabled:
+        if config.webhook_url and config.metrics_port == config.webhook_port:
+            raise ValueError("METRICS_PORT must differ from the webhook PORT")
+        metrics_server = MetricsServer(tracer, listen=config.metrics_listen, port=config.metrics_port)
+
+    async def on_startup(application):
+        """应用启动后：加载忙闲索引并开始后台同步，注册 SIGHUP 重新加载授权列表"""
+        if freebusy_index:
+            await freebusy_index.start()
+        if metrics_server:
+            await metrics_server.start()
+        if hasattr(signal, "SIGHUP"):
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, authorizer.reload)
+
+    async def on_stop(application):
+        """应用停止接收 Update 后：等待排队消息处理完毕（此时仍可发送回复）"""
+        if message_handlers.queue:
+            await message_handlers.queue.close(timeout=config.shutdown_drain_timeout)
+
+    async def on_shutdown(application):
+        """应用关闭时：停止后台任务并释放资源"""
+        if freebusy_index:
+            await freebusy_index.stop()
+        if metrics_server:
+            await metrics_server.stop()
+        google_calendar.close()
+        if response_cache:
+            response_cache.close()
+        if image_preprocessor:
+            image_preprocessor.close()
+        db.close()
+
     # 创建 Telegram 应用
-    app = ApplicationBuilder().token(config.telegram_token).build()
+    app = (
+        ApplicationBuilder()
+        .token(config.telegram_token)
+        .post_init(on_startup)
+        .post_stop(on_stop)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
 
     # 注册命令处理器
     app.add_handler(CommandHandler("start", command_handlers.start_handler))
     app.add_handler(CommandHandler("status", command_handlers.status_handler))
     app.add_handler(CommandHandler("today", command_handlers.today_handler))
+    app.add_handler(CommandHandler("week", command_handlers.week_handler))
     app.add_handler(CommandHandler("travel", command_handlers.travel_handler))
     app.add_handler(CommandHandler("home", command_handlers.home_handler))
+    app.add_handler(CommandHandler("conflicts", command_handlers.conflicts_handler))
+    app.add_handler(CommandHandler("perf", command_handlers.perf_handler))
     app.add_handler(CommandHandler("restartsingboxupdater", command_handlers.restart_singbox_handler))
 
     # 注册消息处理器
@@ -115,9 +257,25 @@ def main():
     # 启动 Bot
     logger.info("✅ Calendar Bot v3.0 Started Successfully!")
     logger.info(f"📊 Configured for {len(family_members)} family members")
-    logger.info(f"🔑 Authorized users: {len(config.allowed_ids)}")
+    logger.info(f"🔑 Authorized users: {len(authorizer.user_ids)}")
+    if authorizer.chat_ids is not None:
+        logger.info(f"💬 Authorized chats: {len(authorizer.chat_ids)}")
+
+    # Webhook 模式：处理器注册不变，只替换接收 Update 的方式
+    if config.webhook_url:
+        if not config.webhook_secret:
+            raise ValueError("WEBHOOK_SECRET is required when WEBHOOK_URL is set")
 
-    app.run_polling()
+        server = WebhookServer(
+            application=app,
+            webhook_url=config.webhook_url,
+            secret_token=config.webhook_secret,
+            url_path=config.webhook_path,
+            port=config.webhook_port
+        )
+        asyncio.run(server.run())
+    else:
+        app.run_polling()
 
 
 if __name__ == '__main__':
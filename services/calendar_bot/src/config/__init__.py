@@ -1,4 +1,4 @@
 """配置模块"""
-from .settings import CalendarBotConfig, load_config
+from .settings import CalendarBotConfig, load_config, load_auth_lists
 
-__all__ = ["CalendarBotConfig", "load_config"]
+__all__ = ["CalendarBotConfig", "load_config", "load_auth_lists"]
@@ -3,10 +3,12 @@
 使用 Pydantic 进行环境变量验证
 """
 import os
+import re
 import json
 import logging
-from typing import Optional, List, Dict, Any
-from pydantic import Field, field_validator
+from typing import Optional, List, Dict, Any, FrozenSet, Tuple
+from dotenv import dotenv_values
+from pydantic import Field, PrivateAttr, field_validator
 from pydantic_settings import BaseSettings
 
 
@@ -24,6 +26,12 @@ class CalendarBotConfig(BaseSettings):
     # Telegram 配置
     telegram_token: str = Field(..., alias="TELEGRAM_TOKEN")
     allowed_user_ids: str = Field(..., alias="ALLOWED_USER_IDS")
+    # 群组会话白名单（逗号分隔，未设置时不限制会话；私聊不受限制）
+    allowed_chat_ids: Optional[str] = Field(None, alias="ALLOWED_CHAT_IDS")
+    # 同一未授权用户两次"未授权"回复的最小间隔（秒），0 表示不回复
+    auth_reply_interval: float = Field(default=60.0, alias="AUTH_REPLY_INTERVAL")
+    # 授权列表文件（.env 格式，包含 ALLOWED_USER_IDS / ALLOWED_CHAT_IDS），设置后启动和 SIGHUP 时从该文件读取
+    auth_file: Optional[str] = Field(None, alias="AUTH_FILE")
 
     # OpenRouter AI 配置
     openrouter_api_key: str = Field(..., alias="OPENROUTER_API_KEY")
@@ -31,11 +39,29 @@ class CalendarBotConfig(BaseSettings):
         default="https://openrouter.ai/api/v1",
         alias="OPENROUTER_BASE_URL"
     )
+    # 逗号分隔的模型列表：第一个为主模型，其余为主模型熔断或失败时依次使用的备用模型
     llm_model_name: str = Field(
         default="google/gemini-3-flash-preview",
         alias="LLM_MODEL_NAME"
     )
 
+    # 模型路由（逗号分隔，格式同 LLM_MODEL_NAME）：文本消息 / 图片消息的候选模型（未设置时使用 LLM_MODEL_NAME），
+    # 以及答案未通过事件校验时升级使用的更强模型（未设置时不升级）
+    llm_text_model: Optional[str] = Field(None, alias="LLM_TEXT_MODEL")
+    llm_vision_model: Optional[str] = Field(None, alias="LLM_VISION_MODEL")
+    llm_escalation_model: Optional[str] = Field(None, alias="LLM_ESCALATION_MODEL")
+    # 各模型价格（JSON，{"模型": 每百万 token 美元}），以及每 1 美分成本折合多少秒延迟
+    llm_model_prices: Optional[str] = Field(None, alias="LLM_MODEL_PRICES")
+    llm_router_cost_weight: float = Field(default=1.0, alias="LLM_ROUTER_COST_WEIGHT")
+    llm_router_explore: float = Field(default=0.05, alias="LLM_ROUTER_EXPLORE")
+
+    # LLM 容错：单次尝试超时、每个模型尝试次数、一条消息的总时限（秒）、熔断阈值与恢复探测间隔（秒）
+    llm_attempt_timeout: float = Field(default=20.0, alias="LLM_ATTEMPT_TIMEOUT")
+    llm_max_attempts: int = Field(default=2, alias="LLM_MAX_ATTEMPTS")
+    llm_deadline: float = Field(default=45.0, alias="LLM_DEADLINE")
+    llm_breaker_threshold: int = Field(default=5, alias="LLM_BREAKER_THRESHOLD")
+    llm_breaker_reset: float = Field(default=30.0, alias="LLM_BREAKER_RESET")
+
     # Google Calendar 配置
     google_credentials_json: str = Field(..., alias="GOOGLE_CREDENTIALS_JSON")
     google_calendar_id: str = Field(..., alias="GOOGLE_CALENDAR_ID")
@@ -51,6 +77,54 @@ class CalendarBotConfig(BaseSettings):
     zeabur_api_token: Optional[str] = Field(None, alias="ZEABUR_API_TOKEN")
     zeabur_targets: Optional[str] = Field(None, alias="ZEABUR_TARGETS")
 
+    # 冲突检查模式: pipelined / sequential / deferred / off
+    conflict_check_mode: str = Field(default="pipelined", alias="CONFLICT_CHECK_MODE")
+
+    # 本地忙闲索引增量同步间隔（秒），0 表示禁用索引
+    freebusy_sync_interval: int = Field(default=300, alias="FREEBUSY_SYNC_INTERVAL")
+
+    # /today、/week 事件列表缓存时间（秒），0 表示不缓存
+    events_cache_ttl: int = Field(default=60, alias="EVENTS_CACHE_TTL")
+
+    # LLM 响应缓存（与数据库同目录的 SQLite 文件），TTL 为 0 表示禁用
+    llm_cache_ttl: int = Field(default=21600, alias="LLM_CACHE_TTL")
+    llm_cache_max_entries: int = Field(default=1000, alias="LLM_CACHE_MAX_ENTRIES")
+
+    # 简单事件短语使用规则解析，跳过 AI
+    fast_path_parser: bool = Field(default=True, alias="FAST_PATH_PARSER")
+
+    # 文本消息使用流式输出（聊天回复渐进显示，事件 JSON 闭合即开始创建）
+    llm_streaming: bool = Field(default=True, alias="LLM_STREAMING")
+
+    # 图片预处理（需要 Pillow）：长边上限为 0 表示不处理
+    image_max_edge: int = Field(default=1280, alias="IMAGE_MAX_EDGE")
+    image_quality: int = Field(default=80, alias="IMAGE_QUALITY")
+    image_format: str = Field(default="jpeg", alias="IMAGE_FORMAT")
+    image_crop_to_text: bool = Field(default=False, alias="IMAGE_CROP_TO_TEXT")
+
+    # 按用户排队：处理期间到达的后续消息的合并窗口（秒，空闲用户的消息总是立即处理；0 表示不排队）、
+    # 单用户排队上限、总并发
+    message_debounce: float = Field(default=1.5, alias="MESSAGE_DEBOUNCE")
+    message_max_pending: int = Field(default=10, alias="MESSAGE_MAX_PENDING")
+    message_concurrency: int = Field(default=8, alias="MESSAGE_CONCURRENCY")
+
+    # Webhook 模式（设置 WEBHOOK_URL 时启用，否则使用轮询）
+    webhook_url: Optional[str] = Field(None, alias="WEBHOOK_URL")
+    webhook_secret: Optional[str] = Field(None, alias="WEBHOOK_SECRET")
+    webhook_path: str = Field(default="/telegram", alias="WEBHOOK_PATH")
+    webhook_port: int = Field(default=8080, alias="PORT")
+
+    # 阶段耗时追踪：Prometheus /metrics（单独监听 METRICS_LISTEN:METRICS_PORT，不挂在 Webhook 端口上）、
+    # 每个阶段保留的最近样本数、是否以 INFO 级别输出每个 Span
+    metrics_enabled: bool = Field(default=False, alias="METRICS_ENABLED")
+    metrics_listen: str = Field(default="0.0.0.0", alias="METRICS_LISTEN")
+    metrics_port: int = Field(default=9100, alias="METRICS_PORT")
+    trace_window: int = Field(default=500, alias="TRACE_WINDOW")
+    trace_log_spans: bool = Field(default=False, alias="TRACE_LOG_SPANS")
+
+    # 停机时等待排队消息处理完毕的最长时间（秒）
+    shutdown_drain_timeout: float = Field(default=20.0, alias="SHUTDOWN_DRAIN_TIMEOUT")
+
     # 应用配置
     default_timezone: str = Field(default="Asia/Singapore", alias="DEFAULT_HOME_TZ")
     database_path: str = Field(default="data/calendar_bot_v2.db", alias="DB_PATH")
@@ -58,6 +132,9 @@ class CalendarBotConfig(BaseSettings):
     # 日志配置
     log_level: str = Field(default="INFO", alias="LOG_LEVEL")
 
+    # 解析后的家庭成员配置（首次调用 get_family_members 时生成）
+    _family_members: Optional[List[Dict[str, Any]]] = PrivateAttr(default=None)
+
     class Config:
         case_sensitive = True
         env_file = ".env"
@@ -71,14 +148,92 @@ class CalendarBotConfig(BaseSettings):
             raise ValueError("ALLOWED_USER_IDS cannot be empty")
         return [int(x.strip()) for x in v.split(",") if x.strip()]
 
+    @field_validator("allowed_chat_ids")
+    @classmethod
+    def parse_chat_ids(cls, v: Optional[str]) -> Optional[List[int]]:
+        """解析允许的会话 ID（空值表示不限制）"""
+        if not v or not v.strip():
+            return None
+        return [int(x.strip()) for x in v.split(",") if x.strip()]
+
+    @field_validator("conflict_check_mode")
+    @classmethod
+    def validate_conflict_check_mode(cls, v: str) -> str:
+        """验证冲突检查模式"""
+        modes = ("pipelined", "sequential", "deferred", "off")
+        v = v.strip().lower()
+        if v not in modes:
+            raise ValueError(f"CONFLICT_CHECK_MODE must be one of: {', '.join(modes)}")
+        return v
+
+    @field_validator("webhook_secret")
+    @classmethod
+    def validate_webhook_secret(cls, v: Optional[str]) -> Optional[str]:
+        """验证 Webhook secret（Telegram 只允许 1-256 个 A-Z a-z 0-9 _ - 字符）"""
+        if v is not None and not re.fullmatch(r"[A-Za-z0-9_-]{1,256}", v):
+            raise ValueError("WEBHOOK_SECRET must be 1-256 characters of A-Z, a-z, 0-9, _ and -")
+        return v
+
+    @field_validator("image_format")
+    @classmethod
+    def validate_image_format(cls, v: str) -> str:
+        """验证图片输出格式"""
+        v = v.strip().lower()
+        if v not in ("jpeg", "webp"):
+            raise ValueError("IMAGE_FORMAT must be one of: jpeg, webp")
+        return v
+
     @property
-    def allowed_ids(self) -> List[int]:
-        """获取解析后的用户 ID 列表"""
-        return self.parse_user_ids(self.allowed_user_ids)
+    def allowed_ids(self) -> FrozenSet[int]:
+        """获取允许的用户 ID 集合（ALLOWED_USER_IDS 已在加载配置时解析）"""
+        return frozenset(self.allowed_user_ids)
+
+    @property
+    def llm_models(self) -> List[str]:
+        """按优先级排列的模型列表"""
+        return self._split_models(self.llm_model_name)
+
+    @staticmethod
+    def _split_models(value: Optional[str]) -> List[str]:
+        return [m.strip() for m in (value or "").split(",") if m.strip()]
+
+    @property
+    def llm_routes(self) -> Dict[str, List[str]]:
+        """模型路由：{路由: 候选模型列表}"""
+        return {
+            "text": self._split_models(self.llm_text_model) or self.llm_models,
+            "vision": self._split_models(self.llm_vision_model) or self.llm_models,
+            "escalation": self._split_models(self.llm_escalation_model),
+        }
+
+    def get_model_prices(self) -> Dict[str, float]:
+        """解析模型价格配置（每百万 token 美元）"""
+        if not self.llm_model_prices:
+            return {}
+        try:
+            return {model: float(price) for model, price in json.loads(self.llm_model_prices).items()}
+        except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+            logging.error("❌ LLM_MODEL_PRICES JSON 格式错误，成本按 0 计")
+            return {}
+
+    @property
+    def allowed_chats(self) -> Optional[FrozenSet[int]]:
+        """获取允许的会话 ID 集合，未设置时返回 None"""
+        if self.allowed_chat_ids is None:
+            return None
+        return frozenset(self.allowed_chat_ids)
 
     def get_family_members(self) -> List[Dict[str, Any]]:
         """
-        获取家庭成员配置
+        获取家庭成员配置（只解析一次，之后返回同一份结果）
+        """
+        if self._family_members is None:
+            self._family_members = self._load_family_members()
+        return self._family_members
+
+    def _load_family_members(self) -> List[Dict[str, Any]]:
+        """
+        解析家庭成员配置
         优先使用 FAMILY_CONFIG 环境变量，否则使用默认配置
         """
         if self.family_config:
@@ -115,6 +270,23 @@ class CalendarBotConfig(BaseSettings):
             }
         ]
 
+    def get_calendar_labels(self) -> Dict[str, str]:
+        """
+        获取所有已配置日历的显示名称
+
+        Returns:
+            {calendar_id: "图标 名称"}
+        """
+        labels = {}
+        for member in self.get_family_members():
+            calendar_id = self.get_calendar_id(member["name"])
+            labels.setdefault(calendar_id, f"{member.get('icon', '📅')} {member['name']}")
+
+        if self.google_calendar_id_family:
+            labels.setdefault(self.google_calendar_id_family, "🏠 Family")
+
+        return labels
+
     def get_calendar_id(self, category: str) -> str:
         """
         根据分类获取对应的日历 ID
@@ -140,3 +312,28 @@ class CalendarBotConfig(BaseSettings):
 def load_config() -> CalendarBotConfig:
     """加载配置"""
     return CalendarBotConfig()
+
+
+def load_auth_lists(config: CalendarBotConfig) -> Tuple[FrozenSet[int], Optional[FrozenSet[int]]]:
+    """
+    读取授权列表（启动及 SIGHUP 时调用）
+
+    设置 AUTH_FILE 时从该文件读取，修改文件后 SIGHUP 即可生效；否则重新加载配置，
+    进程环境变量优先于 .env，只有写在 .env 中的授权列表能通过 SIGHUP 更新
+
+    Args:
+        config: 当前配置
+
+    Returns:
+        (允许的用户 ID, 允许的会话 ID 或 None)
+    """
+    if not config.auth_file:
+        reloaded = load_config()
+        return reloaded.allowed_ids, reloaded.allowed_chats
+
+    values = dotenv_values(config.auth_file)
+    if "ALLOWED_USER_IDS" not in values:
+        raise ValueError(f"ALLOWED_USER_IDS missing in {config.auth_file}")
+    user_ids = CalendarBotConfig.parse_user_ids(values["ALLOWED_USER_IDS"] or "")
+    chat_ids = CalendarBotConfig.parse_chat_ids(values.get("ALLOWED_CHAT_IDS"))
+    return frozenset(user_ids), None if chat_ids is None else frozenset(chat_ids)
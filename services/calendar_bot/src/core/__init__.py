@@ -1,6 +1,12 @@
 """核心业务逻辑模块"""
 from .event_parser import EventParser
 from .event_validator import EventValidator
+from .fast_parser import FastPathParser
+from .image_preprocessor import ImagePreprocessor
+from .llm_resilience import CircuitBreaker, LLMUnavailableError, ResilientLLM
+from .model_router import ModelRouter
+from .prompts import PromptBuilder
+from .response_cache import LLMResponseCache
 from .timezone_utils import (
     resolve_timezone,
     get_timezone_display_name,
@@ -12,6 +18,14 @@ from .timezone_utils import (
 __all__ = [
     "EventParser",
     "EventValidator",
+    "FastPathParser",
+    "ImagePreprocessor",
+    "CircuitBreaker",
+    "LLMUnavailableError",
+    "ResilientLLM",
+    "ModelRouter",
+    "PromptBuilder",
+    "LLMResponseCache",
     "resolve_timezone",
     "get_timezone_display_name",
     "smart_fix_year",
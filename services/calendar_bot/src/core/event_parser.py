@@ -3,36 +3,214 @@
 使用 AI 解析自然语言并生成事件数据
 """
 import re
+import copy
 import json
+import time
 import base64
 import logging
-from typing import Optional, Tuple, Any, Dict
+from typing import Optional, Tuple, Any, Dict, List, Callable, Awaitable
 from io import BytesIO
 from datetime import datetime
 
 import pytz
 from openai import AsyncOpenAI
 
-from .prompts import get_system_prompt
+from .prompts import PromptBuilder
+from .response_cache import LLMResponseCache, is_time_relative
+from .fast_parser import FastPathParser, FAST_PATH_MODEL
+from .llm_resilience import LLMUnavailableError, ResilientLLM
+from .model_router import ModelRouter, ROUTE_ESCALATION, ROUTE_TEXT, ROUTE_VISION
+from .event_validator import EventValidator
+from ..monitoring import tracer
 
 logger = logging.getLogger(__name__)
 
+# 流式聊天回复回调：参数为目前累计的完整文本
+TextCallback = Callable[[str], Awaitable[None]]
+
+
+class JsonStreamScanner:
+    """
+    增量 JSON 扫描器
+
+    逐块喂入流式输出，跟踪括号深度（忽略字符串内的括号），
+    顶层对象/数组闭合时立即返回其完整文本，无需等待生成结束
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """
+        喂入一段输出
+
+        Args:
+            chunk: 新增文本
+
+        Returns:
+            顶层 JSON 闭合时返回其文本，否则返回 None
+        """
+        for ch in chunk:
+            if not self._started:
+                if ch not in "{[":
+                    continue
+                self._started = True
+
+            self._buffer.append(ch)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    return "".join(self._buffer)
+        return None
+
 
 class EventParser:
     """事件解析器"""
 
-    def __init__(self, openai_client: AsyncOpenAI, model_name: str):
+    def __init__(
+        self,
+        openai_client: AsyncOpenAI,
+        model_name: str,
+        response_cache: Optional[LLMResponseCache] = None,
+        fast_parser: Optional[FastPathParser] = None,
+        streaming: bool = False,
+        prompt_builder: Optional[PromptBuilder] = None,
+        llm: Optional[ResilientLLM] = None,
+        router: Optional[ModelRouter] = None,
+        validator: Optional[EventValidator] = None
+    ):
         """
         初始化解析器
 
         Args:
             openai_client: OpenAI 客户端
             model_name: 模型名称
+            response_cache: 文本消息的 LLM 响应缓存（可选）
+            fast_parser: 规则快速解析器，简单短语命中时跳过 AI（可选）
+            streaming: 文本消息是否使用流式输出
+            prompt_builder: 启动时创建的系统 Prompt 构建器（可选）
+            llm: 重试 / 熔断 / 模型回退调用器（默认只使用 model_name）
+            router: 模型路由器，文本 / 图片分别使用各自的模型（可选，默认都使用 llm 的模型列表）
+            validator: 事件验证器，AI 返回的事件未通过校验时升级到更强的模型重试（需要路由器配置升级模型）
         """
         self.client = openai_client
         self.model_name = model_name
+        self.response_cache = response_cache
+        self.fast_parser = fast_parser
+        self.streaming = streaming
+        self.prompt_builder = prompt_builder
+        self.llm = llm or ResilientLLM([model_name])
+        self.router = router
+        self.validator = validator
+
+    def _prompt_builder_for(self, family_members: list) -> PromptBuilder:
+        """返回与家庭成员配置对应的 Prompt 构建器（配置一致时复用启动时创建的实例）"""
+        if self.prompt_builder is None or self.prompt_builder.family_members != family_members:
+            self.prompt_builder = PromptBuilder(family_members)
+        return self.prompt_builder
+
+    async def _call_llm(
+        self,
+        route: str,
+        operation: Callable[[str], Awaitable[str]],
+        prompt_chars: int,
+        images: int = 0
+    ) -> Tuple[str, str]:
+        """按路由调用 AI（未配置路由器时使用 llm 的模型列表），返回 (输出文本, 实际使用的模型)"""
+        if self.router and self.router.has_route(route):
+            return await self.router.call(self.llm, route, operation, prompt_chars, images)
+        return await self.llm.call(operation)
+
+    def _route_models(self, route: str) -> List[str]:
+        """该路由可能产出答案的模型（含升级模型），用作响应缓存键"""
+        if self.router and self.router.has_route(route):
+            models = list(self.router.routes[route])
+            if self.router.has_route(ROUTE_ESCALATION):
+                models += self.router.routes[ROUTE_ESCALATION]
+            return models
+        return list(self.llm.models)
+
+    def _rejected_by_validator(self, events: List[Dict], family_members: list) -> Optional[str]:
+        """
+        用验证器检查 AI 返回的事件（在副本上检查，不修改原事件）
+
+        Returns:
+            第一个未通过校验的原因，全部通过时返回 None
+        """
+        if not self.validator:
+            return None
+        default_category = family_members[0]["name"] if family_members else "Family"
+        for event in events:
+            is_valid, err_msg = self.validator.validate_and_fix_payload(copy.deepcopy(event), default_category)
+            if not is_valid:
+                return err_msg
+        return None
+
+    async def _escalate(
+        self,
+        content: str,
+        model: str,
+        operation: Callable[[str], Awaitable[str]],
+        prompt_chars: int,
+        family_members: list,
+        images: int = 0
+    ) -> Tuple[str, str]:
+        """
+        首个答案包含事件但未通过校验时，升级到更强的模型重新生成
+
+        Args:
+            content: 首个答案
+            model: 首个答案使用的模型
+            operation: 接收模型名称、返回输出文本的协程函数
+            prompt_chars: 输入字符数
+            family_members: 家庭成员配置
+            images: 输入图片数
+
+        Returns:
+            (输出文本, 模型)：升级后的答案通过校验时使用升级结果，否则保留首个答案
+        """
+        if not self.router or not self.router.has_route(ROUTE_ESCALATION):
+            return content, model
+
+        msg_type, result = self.parse_content(content)
+        if msg_type != "EVENT":
+            return content, model
+        reason = self._rejected_by_validator(result, family_members)
+        if reason is None:
+            return content, model
+
+        logger.info(f"⬆️ Answer from {model} rejected ({reason}), escalating")
+        self.router.record_escalation(model)
+        try:
+            escalated, escalated_model = await self.router.call(
+                self.llm, ROUTE_ESCALATION, operation, prompt_chars, images
+            )
+        except LLMUnavailableError as e:
+            logger.warning(f"⚠️ Escalation failed, keeping first answer: {e}")
+            return content, model
 
-    def extract_json_from_text(self, text: str) -> Optional[Dict]:
+        msg_type, result = self.parse_content(escalated)
+        if msg_type == "EVENT" and self._rejected_by_validator(result, family_members) is None:
+            return escalated, escalated_model
+        logger.warning(f"⚠️ Escalated answer from {escalated_model} still invalid, keeping first answer")
+        return content, model
+
+    def extract_json_from_text(self, text: str) -> Optional[Any]:
         """
         从文本中提取 JSON
 
@@ -40,7 +218,7 @@ class EventParser:
             text: 包含 JSON 的文本
 
         Returns:
-            解析后的字典或 None
+            解析后的字典/列表或 None
         """
         # 尝试直接解析
         try:
@@ -58,6 +236,30 @@ class EventParser:
 
         return None
 
+    @staticmethod
+    def extract_events(data: Any) -> List[Dict]:
+        """
+        从解析后的 JSON 中取出事件列表
+
+        支持单个事件对象、{"is_event": true, "events": [...]} 以及事件数组
+
+        Args:
+            data: 解析后的 JSON
+
+        Returns:
+            事件列表（可能为空）
+        """
+        if isinstance(data, list):
+            return [e for e in data if isinstance(e, dict) and e.get('is_event', True)]
+
+        if not isinstance(data, dict) or not data.get('is_event'):
+            return []
+
+        if isinstance(data.get('events'), list):
+            return [dict(e, is_event=True) for e in data['events'] if isinstance(e, dict)]
+
+        return [data]
+
     async def parse_response(self, response: Any) -> Tuple[str, Any]:
         """
         解析 AI 响应
@@ -66,15 +268,35 @@ class EventParser:
             response: AI 响应对象
 
         Returns:
-            (消息类型, 内容) - ("EVENT", dict) 或 ("TEXT", str)
+            (消息类型, 内容) - ("EVENT", [dict, ...]) 或 ("TEXT", str)
+        """
+        return self.parse_content(response.choices[0].message.content)
+
+    def _parse_model_output(self, content: str, model: str) -> Tuple[str, Any]:
+        """解析 AI 输出，并在事件上标记实际使用的模型（回退时用于回复展示）"""
+        msg_type, result = self.parse_content(content)
+        if msg_type == "EVENT":
+            for event in result:
+                event["_model"] = model
+        return msg_type, result
+
+    def parse_content(self, content: str) -> Tuple[str, Any]:
+        """
+        解析 AI 响应文本
+
+        Args:
+            content: AI 返回的原始文本
+
+        Returns:
+            (消息类型, 内容) - ("EVENT", [dict, ...]) 或 ("TEXT", str)
         """
-        content = response.choices[0].message.content
         clean_content = content.replace("```json", "").replace("```", "").strip()
 
         data = self.extract_json_from_text(clean_content)
 
-        if data and isinstance(data, dict) and data.get('is_event'):
-            return "EVENT", data
+        events = self.extract_events(data)
+        if events:
+            return "EVENT", events
 
         return "TEXT", content
 
@@ -83,7 +305,8 @@ class EventParser:
         text: str,
         user_timezone: str,
         family_members: list,
-        is_explicit_event: bool = False
+        is_explicit_event: bool = False,
+        on_text: Optional[TextCallback] = None
     ) -> Tuple[str, Any]:
         """
         解析纯文本消息
@@ -93,45 +316,217 @@ class EventParser:
             user_timezone: 用户时区
             family_members: 家庭成员配置
             is_explicit_event: 是否为显式事件请求
+            on_text: 流式模式下聊天回复的增量回调（可选）
 
         Returns:
             (消息类型, 内容)
         """
         # 生成当前时间
         tz = pytz.timezone(user_timezone)
-        current_time = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S")
+        now = datetime.now(tz)
+        current_time = now.strftime("%Y-%m-%d %H:%M:%S")
+
+        # 简单短语走规则解析
+        if self.fast_parser:
+            event = self.fast_parser.parse(
+                text,
+                user_timezone=user_timezone,
+                family_members=family_members,
+                is_explicit_event=is_explicit_event,
+                now=now
+            )
+            if event:
+                logger.info("⚡ Fast-path parser hit")
+                tracer.count("fast_path_hit")
+                event["_model"] = FAST_PATH_MODEL
+                return "EVENT", [event]
+
+        # 查询缓存（包含"2小时后"等相对当前时刻表达的消息不走缓存）
+        cache_key = None
+        if self.response_cache and not is_time_relative(text):
+            cache_key = self.response_cache.make_key(
+                model_name="|".join(self._route_models(ROUTE_TEXT)),
+                text=text,
+                user_timezone=user_timezone,
+                date_bucket=now.strftime("%Y-%m-%d"),
+                prompt_context={
+                    "members": self._prompt_builder_for(family_members).fingerprint,
+                    "explicit": is_explicit_event
+                }
+            )
+            try:
+                cached = await self.response_cache.get(cache_key)
+            except Exception as e:
+                logger.warning(f"⚠️ LLM cache read error: {e}")
+                cached = None
+            if cached is not None:
+                logger.info("⚡ LLM response cache hit")
+                tracer.count("llm_cache_hit")
+                cached_content, cached_model = cached
+                return self._parse_model_output(cached_content, cached_model or self.model_name)
+            tracer.count("llm_cache_miss")
 
         # 生成系统 Prompt
-        system_prompt = get_system_prompt(
+        system_prompt = self._prompt_builder_for(family_members).build(
             user_timezone=user_timezone,
             current_time=current_time,
-            family_members=family_members,
             is_explicit_event_mode=is_explicit_event
         )
 
-        # 调用 AI
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": text}
+        ]
+
+        # 调用 AI（文本模型；超时重试、熔断与模型回退由 self.llm 处理，答案未通过校验时升级）
+        prompt_chars = len(system_prompt) + len(text)
         try:
+            content, model = await self._call_llm(
+                ROUTE_TEXT,
+                lambda model: self._complete_text(messages, model, on_text),
+                prompt_chars
+            )
+            content, model = await self._escalate(
+                content,
+                model,
+                lambda model: self._complete_text(messages, model, None),
+                prompt_chars,
+                family_members
+            )
+        except Exception as e:
+            logger.error(f"❌ AI parsing error: {e}")
+            raise
+
+        if cache_key and content:
+            try:
+                await self.response_cache.set(cache_key, content, model)
+            except Exception as e:
+                logger.warning(f"⚠️ LLM cache write error: {e}")
+
+        return self._parse_model_output(content, model)
+
+    async def _complete_text(self, messages: List[Dict], model: str, on_text: Optional[TextCallback]) -> str:
+        """对指定模型发起一次文本请求（每次尝试单独记录耗时）"""
+        with tracer.span("llm.text", model=model, streaming=self.streaming):
+            if self.streaming:
+                return await self._stream_completion(messages, model, on_text)
             response = await self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": text}
-                ],
+                model=model,
+                messages=messages,
                 temperature=0.3
             )
+            return response.choices[0].message.content
+
+    async def parse_text_messages(
+        self,
+        texts: List[str],
+        user_timezone: str,
+        family_members: list,
+        is_explicit_event: bool = False,
+        on_text: Optional[TextCallback] = None
+    ) -> Tuple[str, Any]:
+        """
+        解析同一用户连续发送的多条文本消息
 
-            return await self.parse_response(response)
+        全部命中规则解析时不调用 AI；否则按顺序合并为一条输入，
+        一次 AI 调用返回多个事件
 
-        except Exception as e:
-            logger.error(f"❌ AI parsing error: {e}")
-            raise
+        Args:
+            texts: 按到达顺序排列的文本
+            user_timezone: 用户时区
+            family_members: 家庭成员配置
+            is_explicit_event: 是否为显式事件请求
+            on_text: 流式模式下聊天回复的增量回调（可选）
+
+        Returns:
+            (消息类型, 内容)
+        """
+        if len(texts) > 1 and self.fast_parser:
+            now = datetime.now(pytz.timezone(user_timezone))
+            events = [
+                self.fast_parser.parse(t, user_timezone, family_members, is_explicit_event, now=now)
+                for t in texts
+            ]
+            if all(events):
+                logger.info(f"⚡ Fast-path parser hit for {len(events)} messages")
+                tracer.count("fast_path_hit", len(events))
+                for event in events:
+                    event["_model"] = FAST_PATH_MODEL
+                return "EVENT", events
+
+        return await self.parse_text_message(
+            text="\n".join(texts),
+            user_timezone=user_timezone,
+            family_members=family_members,
+            is_explicit_event=is_explicit_event,
+            on_text=on_text
+        )
+
+    async def _stream_completion(self, messages: List[Dict], model: str, on_text: Optional[TextCallback]) -> str:
+        """
+        流式调用 AI
+
+        根据第一个非空白字符判断输出类型：以 {、[ 或 ``` 开头视为 JSON，
+        顶层对象闭合且包含事件时立即结束读取，日历插入无需等待剩余输出；
+        否则视为聊天回复，每收到新内容就通过 on_text 回调累计文本。
+
+        Args:
+            messages: 对话消息
+            model: 模型名称
+            on_text: 聊天回复的增量回调（可选）
+
+        Returns:
+            AI 输出文本（JSON 提前结束时为该 JSON 文本）
+        """
+        start = time.perf_counter()
+        stream = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0.3,
+            stream=True
+        )
+
+        parts: List[str] = []
+        scanner = JsonStreamScanner()
+        is_json = None
+
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                parts.append(delta)
+
+                if is_json is None:
+                    head = "".join(parts).lstrip()
+                    if not head:
+                        continue
+                    is_json = head[0] in "{[`"
+                    tracer.observe("llm.first_token", time.perf_counter() - start, model=model)
+
+                if not is_json:
+                    if on_text:
+                        await on_text("".join(parts))
+                    continue
+
+                json_text = scanner.feed(delta)
+                if json_text is not None and self.extract_events(self.extract_json_from_text(json_text)):
+                    logger.info("⚡ Event JSON closed, stop reading stream")
+                    return json_text
+        finally:
+            await stream.close()
+
+        return "".join(parts)
 
     async def parse_image_message(
         self,
         image_bytes: bytes,
         caption: str,
         user_timezone: str,
-        family_members: list
+        family_members: list,
+        mime_type: str = "image/jpeg"
     ) -> Tuple[str, Any]:
         """
         解析图片消息（带可选文字说明）
@@ -141,6 +536,7 @@ class EventParser:
             caption: 图片说明文字
             user_timezone: 用户时区
             family_members: 家庭成员配置
+            mime_type: 图片 MIME 类型
 
         Returns:
             (消息类型, 内容)
@@ -150,10 +546,9 @@ class EventParser:
         current_time = datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S")
 
         # 生成系统 Prompt
-        system_prompt = get_system_prompt(
+        system_prompt = self._prompt_builder_for(family_members).build(
             user_timezone=user_timezone,
             current_time=current_time,
-            family_members=family_members,
             is_explicit_event_mode=False
         )
 
@@ -163,30 +558,42 @@ class EventParser:
         # 用户提示词
         user_prompt = caption.strip() if caption else "Extract event details from this image."
 
-        # 调用 AI（视觉模型）
-        try:
-            response = await self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": user_prompt},
                     {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": user_prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{b64_image}"
-                                }
-                            }
-                        ]
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:{mime_type};base64,{b64_image}"
+                        }
                     }
-                ],
-                max_tokens=1000
-            )
-
-            return await self.parse_response(response)
+                ]
+            }
+        ]
 
+        # 调用 AI（视觉模型，答案未通过校验时升级）
+        prompt_chars = len(system_prompt) + len(user_prompt)
+        operation = lambda model: self._complete_image(messages, model, len(image_bytes))
+        try:
+            content, model = await self._call_llm(ROUTE_VISION, operation, prompt_chars, images=1)
+            content, model = await self._escalate(
+                content, model, operation, prompt_chars, family_members, images=1
+            )
         except Exception as e:
             logger.error(f"❌ Image parsing error: {e}")
             raise
+
+        return self._parse_model_output(content, model)
+
+    async def _complete_image(self, messages: List[Dict], model: str, image_size: int) -> str:
+        """对指定模型发起一次视觉请求"""
+        with tracer.span("llm.image", model=model, image_bytes=image_size):
+            response = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=1000
+            )
+            return response.choices[0].message.content
@@ -0,0 +1,402 @@
+"""
+规则快速解析
+识别"明天下午3点开会"、"tomorrow 3pm dentist"这类简单事件短语，
+高置信度命中时直接生成与 AI 相同结构的事件 JSON，跳过 LLM 调用
+"""
+import re
+import logging
+from datetime import datetime, date, timedelta
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple
+
+import pytz
+
+logger = logging.getLogger(__name__)
+
+CN_DIGITS = {"零": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+CN_WEEKDAYS = {"一": 0, "二": 1, "三": 2, "四": 3, "五": 4, "六": 5, "日": 6, "天": 6}
+EN_WEEKDAYS = {
+    "mon": 0, "monday": 0, "tue": 1, "tues": 1, "tuesday": 1, "wed": 2, "wednesday": 2,
+    "thu": 3, "thur": 3, "thurs": 3, "thursday": 3, "fri": 4, "friday": 4,
+    "sat": 5, "saturday": 5, "sun": 6, "sunday": 6
+}
+EN_MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3, "apr": 4, "april": 4,
+    "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7, "aug": 8, "august": 8,
+    "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10, "nov": 11, "november": 11,
+    "dec": 12, "december": 12
+}
+CN_RELATIVE_DAYS = {"今天": 0, "今日": 0, "明天": 1, "明日": 1, "后天": 2, "大后天": 3}
+EN_RELATIVE_DAYS = {"today": 0, "tomorrow": 1, "tmr": 1, "tmrw": 1, "day after tomorrow": 2}
+
+CN_NUM = r"\d{1,2}|[零一二两三四五六七八九十]{1,3}"
+EN_WEEKDAY_RE = "|".join(sorted(EN_WEEKDAYS, key=len, reverse=True))
+EN_MONTH_RE = "|".join(sorted(EN_MONTHS, key=len, reverse=True))
+
+# ==================== 日期 ====================
+
+CN_DATE_PATTERNS = [
+    ("relative", re.compile(r"大后天|后天|明天|明日|今天|今日")),
+    ("week", re.compile(r"(?P<which>下下|下|这|本)?(?:个)?(?:周|星期|礼拜)(?P<wd>[一二三四五六日天])")),
+    ("month_day", re.compile(rf"(?P<month>{CN_NUM})月(?P<day>{CN_NUM})[日号]")),
+]
+EN_DATE_PATTERNS = [
+    ("relative", re.compile(r"\b(?:on\s+)?(?:the\s+)?(day after tomorrow|tomorrow|tmrw|tmr|today)\b")),
+    ("week", re.compile(rf"\b(?:on\s+)?(?:(?P<which>this|next)\s+)?(?P<wd>{EN_WEEKDAY_RE})\b")),
+    ("month_day", re.compile(rf"\b(?:on\s+)?(?P<month>{EN_MONTH_RE})\.?\s+(?P<day>\d{{1,2}})(?:st|nd|rd|th)?\b")),
+    ("day_month", re.compile(rf"\b(?:on\s+)?(?P<day>\d{{1,2}})(?:st|nd|rd|th)?\s+(?P<month>{EN_MONTH_RE})\b")),
+]
+
+# ==================== 时间 ====================
+
+CN_PERIOD = r"早上|早晨|上午|中午|下午|傍晚|晚上|夜里|凌晨"
+CN_TIME_PATTERNS = [
+    re.compile(
+        rf"(?P<period>{CN_PERIOD})?\s*(?P<hour>{CN_NUM})\s*点\s*"
+        r"(?P<minute>半|一刻|三刻|\d{1,2}\s*分?|[零一二两三四五六七八九十]{2,3}\s*分?|[一二三四五六七八九十]\s*分)?"
+    ),
+    re.compile(rf"(?P<period>{CN_PERIOD})?\s*(?P<hour>\d{{1,2}})[:：](?P<minute>\d{{2}})"),
+]
+EN_TIME_PATTERNS = [
+    re.compile(r"\b(?:at\s+)?(?P<hour>\d{1,2})(?:[:.](?P<minute>\d{2}))?\s*(?P<ampm>am|pm|a\.m\.|p\.m\.)(?!\w)"),
+    re.compile(r"\b(?:at\s+)?(?P<hour>\d{1,2}):(?P<minute>\d{2})\b"),
+    re.compile(r"\b(?:at\s+)?(?P<noon>noon|midday)\b"),
+]
+
+# ==================== 低置信度信号 ====================
+
+# 问句 / 闲聊
+QUESTION_PATTERN = re.compile(
+    r"[?？]|吗|呢|怎么|什么|多少|几点|哪|谁|为什么|是不是|有没有"
+    r"|^(what|when|where|why|how|who|which|is|are|do|does|did|can|could|should|will|would)\b",
+    re.IGNORECASE
+)
+# 时间段、重复、时区、地点、时长等需要 AI 判断的信息
+AMBIGUOUS_PATTERN = re.compile(
+    rf"每|到|至|~|～|—|-|直到|以后|之后|时间|在|从|周|星期|礼拜|月|号|今晚|今早|{CN_PERIOD}"
+    r"|\b(every|daily|weekly|monthly|until|till|through|from|between|for|in|at|to|and"
+    r"|utc|gmt|time|tz|pst|pdt|pt|est|edt|et|cst|cdt|mst|mdt|bst|cet|cest|sgt|jst|hkt|ist|aest"
+    r"|next|last|week|weekend|month|year|morning|afternoon|evening|tonight|night)\b|@|&",
+    re.IGNORECASE
+)
+# 取消、否定、改期：是对已有日程的操作或否定句，不能当作新事件（含 不 / 没 / 未 的一律交给 AI）
+CANCEL_PATTERN = re.compile(
+    r"取消|不|没|未|别|推迟|延期|延后|提前到|改到|改成|改期|挪到"
+    r"|\b(cancel\w*|postpone\w*|reschedul\w*|delay\w*|move\w*|don'?t|do\s+not|not|no|never)\b",
+    re.IGNORECASE
+)
+# 只去掉提醒类前缀（"去机场接人"的"去"属于标题）
+LEADING_FILLERS = re.compile(
+    r"^(?:(?:请)?提醒我|记得|帮我记(?:一下)?|remind\s+me\s+(?:to\s+)?)\s*",
+    re.IGNORECASE
+)
+CONNECTORS = " \t,，。.!！:：;；、的"
+
+# 规则解析得到的事件在回复中展示的"模型"
+FAST_PATH_MODEL = "fast-path"
+FAMILY_WORDS = re.compile(r"全家|家庭|一家|\bfamily\b", re.IGNORECASE)
+
+MAX_SUMMARY_LENGTH = 40
+
+
+def cn_to_int(value: str) -> Optional[int]:
+    """
+    将阿拉伯数字或中文数字（0-99）转换为整数
+
+    Args:
+        value: 数字字符串，如 "3"、"十二"、"二十三"
+
+    Returns:
+        整数，无法解析返回 None
+    """
+    if value.isdigit():
+        return int(value)
+
+    if "十" in value:
+        tens, _, ones = value.partition("十")
+        tens_value = CN_DIGITS.get(tens, None) if tens else 1
+        ones_value = CN_DIGITS.get(ones, None) if ones else 0
+        if tens_value is None or ones_value is None:
+            return None
+        return tens_value * 10 + ones_value
+
+    if len(value) == 1:
+        return CN_DIGITS.get(value)
+    return None
+
+
+@lru_cache(maxsize=32)
+def _member_pattern(names: Tuple[str, ...]) -> Optional[re.Pattern]:
+    """家庭成员名称匹配（按成员配置缓存）"""
+    if not names:
+        return None
+    alternatives = "|".join(re.escape(n) for n in sorted(names, key=len, reverse=True))
+    return re.compile(rf"(?<![A-Za-z])({alternatives})(?![A-Za-z])", re.IGNORECASE)
+
+
+class FastPathParser:
+    """规则快速解析器"""
+
+    def parse(
+        self,
+        text: str,
+        user_timezone: str,
+        family_members: List[Dict[str, Any]],
+        is_explicit_event: bool = False,
+        now: Optional[datetime] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        尝试解析简单事件短语
+
+        只处理"日期 + 时间 + 标题"（任意顺序）的单个事件；仅有日期的待办只在
+        显式事件模式（/event）下处理。任何不确定的情况都返回 None 交给 AI。
+
+        Args:
+            text: 消息文本
+            user_timezone: 用户时区
+            family_members: 家庭成员配置
+            is_explicit_event: 是否为显式事件请求
+            now: 当前时间（测试/基准用，默认取用户时区的当前时间）
+
+        Returns:
+            与 AI 输出结构一致的事件字典，未命中返回 None
+        """
+        text = text.strip()
+        if not text or "\n" in text or QUESTION_PATTERN.search(text):
+            return None
+
+        if now is None:
+            now = datetime.now(pytz.timezone(user_timezone))
+        today = now.date()
+
+        is_chinese = re.search(r"[一-鿿]", text) is not None
+        date_patterns = CN_DATE_PATTERNS if is_chinese else EN_DATE_PATTERNS
+        time_patterns = CN_TIME_PATTERNS if is_chinese else EN_TIME_PATTERNS
+        working = text if is_chinese else text.lower()
+
+        # 日期：必须恰好出现一次
+        date_match = self._find_single(working, date_patterns)
+        if date_match is None:
+            return None
+        kind, match = date_match
+        event_date = self._resolve_date(kind, match, today, is_chinese)
+        if event_date is None:
+            return None
+        working = self._cut(working, match)
+
+        # 时间：最多出现一次
+        time_match = self._find_single(working, [("time", p) for p in time_patterns], allow_none=True)
+        if time_match is False:
+            return None
+
+        event_time = None
+        if time_match is not None:
+            event_time = self._resolve_time(time_match[1], is_chinese)
+            if event_time is None:
+                return None
+            working = self._cut(working, time_match[1])
+        elif not is_explicit_event:
+            return None
+
+        summary = self._clean_summary(working, text if not is_chinese else None)
+        if summary is None:
+            return None
+
+        category = self._resolve_category(text, family_members)
+        if category is None:
+            return None
+
+        return {
+            "is_event": True,
+            "is_all_day": event_time is None,
+            "category": category,
+            "summary": summary,
+            "start_time": (
+                event_date.strftime("%Y-%m-%d") if event_time is None
+                else f"{event_date:%Y-%m-%d} {event_time[0]:02d}:{event_time[1]:02d}:00"
+            ),
+            "recurrence": []
+        }
+
+    @staticmethod
+    def _find_single(text: str, patterns, allow_none: bool = False):
+        """
+        查找唯一匹配
+
+        Args:
+            text: 待匹配文本
+            patterns: [(类型, 正则), ...]
+            allow_none: 是否允许没有匹配
+
+        Returns:
+            恰好一处匹配时返回 (类型, match)；没有匹配返回 None；
+            多处匹配（如两个日期）有歧义，allow_none 时返回 False，否则返回 None
+        """
+        found = []
+        for kind, pattern in patterns:
+            for match in pattern.finditer(text):
+                if not any(match.start() < m.end() and m.start() < match.end() for _, m in found):
+                    found.append((kind, match))
+
+        if len(found) == 1:
+            return found[0]
+        if not found and allow_none:
+            return None
+        return False if allow_none else None
+
+    @staticmethod
+    def _cut(text: str, match: re.Match) -> str:
+        """从文本中移除匹配片段（用空格占位，避免前后文字粘连）"""
+        return f"{text[:match.start()]} {text[match.end():]}"
+
+    @staticmethod
+    def _resolve_date(kind: str, match: re.Match, today: date, is_chinese: bool) -> Optional[date]:
+        """将日期表达解析为具体日期"""
+        if kind == "relative":
+            key = match.group(0) if is_chinese else match.group(1)
+            offset = (CN_RELATIVE_DAYS if is_chinese else EN_RELATIVE_DAYS)[key]
+            return today + timedelta(days=offset)
+
+        if kind == "week":
+            which = match.group("which")
+            wd_raw = match.group("wd")
+            weekday = CN_WEEKDAYS[wd_raw] if is_chinese else EN_WEEKDAYS[wd_raw]
+            monday = today - timedelta(days=today.weekday())
+
+            if which in ("下", "下下"):
+                weeks = 1 if which == "下" else 2
+                return monday + timedelta(weeks=weeks, days=weekday)
+            if which in ("这", "本", "this"):
+                target = monday + timedelta(days=weekday)
+                return target if target >= today else None
+            if which == "next":
+                # 英文 "next friday" 指本周还是下周因人而异，交给 AI
+                return None
+
+            # 单独的星期几：取即将到来的那天，恰好是今天时有歧义
+            delta = (weekday - today.weekday()) % 7
+            return today + timedelta(days=delta) if delta else None
+
+        month = cn_to_int(match.group("month")) if is_chinese else EN_MONTHS[match.group("month")]
+        day = cn_to_int(match.group("day"))
+        if month is None or day is None:
+            return None
+        try:
+            target = date(today.year, month, day)
+            if target < today:
+                target = date(today.year + 1, month, day)
+        except ValueError:
+            return None
+        return target
+
+    @staticmethod
+    def _resolve_time(match: re.Match, is_chinese: bool) -> Optional[Tuple[int, int]]:
+        """
+        将时间表达解析为 (小时, 分钟)
+
+        没有上下午标记的 1-12 点有歧义（"3点"可能是 3:00 或 15:00），不处理；
+        两位数补零的写法（"09:30"）和 13 点以后视为 24 小时制。
+        """
+        groups = match.groupdict()
+        if groups.get("noon"):
+            return 12, 0
+
+        hour_raw = groups["hour"]
+        hour = cn_to_int(hour_raw)
+        if hour is None or hour > 23:
+            return None
+
+        minute_raw = (groups.get("minute") or "").strip().rstrip("分").strip()
+        if not minute_raw:
+            minute = 0
+        elif minute_raw == "半":
+            minute = 30
+        elif minute_raw == "一刻":
+            minute = 15
+        elif minute_raw == "三刻":
+            minute = 45
+        else:
+            minute = cn_to_int(minute_raw)
+        if minute is None or minute > 59:
+            return None
+
+        if is_chinese:
+            period = groups.get("period")
+            if period in ("下午", "傍晚", "晚上", "夜里"):
+                if hour in (0, 12):
+                    return None
+                if hour < 12:
+                    hour += 12
+            elif period == "中午":
+                if hour in (1, 2):
+                    hour += 12
+                elif hour not in (11, 12):
+                    return None
+            elif period in ("早上", "早晨", "上午", "凌晨"):
+                if hour > 12 or (hour == 12 and period != "上午"):
+                    return None
+            elif hour <= 12 and not (hour_raw.isdigit() and len(hour_raw) == 2 and hour_raw.startswith("0")):
+                return None
+            return hour, minute
+
+        ampm = groups.get("ampm")
+        if ampm:
+            if hour < 1 or hour > 12:
+                return None
+            if ampm.startswith("p") and hour != 12:
+                hour += 12
+            elif ampm.startswith("a") and hour == 12:
+                hour = 0
+            return hour, minute
+
+        if hour <= 12 and not (len(hour_raw) == 2 and hour_raw.startswith("0")):
+            return None
+        return hour, minute
+
+    @staticmethod
+    def _clean_summary(working: str, original: Optional[str]) -> Optional[str]:
+        """
+        提取标题，剩余内容含有需要 AI 判断的信息时返回 None
+
+        Args:
+            working: 移除日期、时间后的文本
+            original: 英文消息的原文（用于保留大小写），中文为 None
+        """
+        summary = " ".join(working.split()).strip(CONNECTORS)
+        summary = LEADING_FILLERS.sub("", summary).strip(CONNECTORS)
+
+        if not summary or len(summary) > MAX_SUMMARY_LENGTH:
+            return None
+        if re.search(r"\d", summary) or AMBIGUOUS_PATTERN.search(summary) or CANCEL_PATTERN.search(summary):
+            return None
+
+        if original is not None:
+            # 英文标题保留原文大小写，首字母大写
+            index = " ".join(original.split()).lower().find(summary)
+            if index >= 0:
+                summary = " ".join(original.split())[index:index + len(summary)]
+            summary = summary[0].upper() + summary[1:]
+
+        return summary
+
+    @staticmethod
+    def _resolve_category(text: str, family_members: List[Dict[str, Any]]) -> Optional[str]:
+        """
+        根据提到的家庭成员确定分类
+
+        没有提到成员时使用第一个成员（与 AI 未给出分类时的默认值一致），
+        提到多个成员时有歧义，返回 None
+        """
+        pattern = _member_pattern(tuple(m["name"] for m in family_members))
+        names = set()
+        if pattern:
+            names = {m.group(1).lower() for m in pattern.finditer(text)}
+
+        if FAMILY_WORDS.search(text):
+            return "Family" if not names else None
+        if len(names) > 1:
+            return None
+        if names:
+            name = names.pop()
+            return next(m["name"] for m in family_members if m["name"].lower() == name)
+        return family_members[0]["name"] if family_members else None
@@ -0,0 +1,158 @@
+"""
+图片预处理
+选择合适的 Telegram 图片尺寸，缩放并重新编码后再发送给视觉模型，
+减少上传字节数和图片 token
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Optional, Sequence, Tuple, Any
+
+try:
+    from PIL import Image, ImageFilter, ImageOps
+except ImportError:  # Pillow 为可选依赖，未安装时原样发送
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FORMATS = {"jpeg": ("JPEG", "image/jpeg"), "webp": ("WEBP", "image/webp")}
+
+# 文字区域裁剪：边缘强度阈值、四周留白比例、最少节省面积
+TEXT_EDGE_THRESHOLD = 40
+TEXT_CROP_PADDING = 0.03
+TEXT_CROP_MIN_SAVING = 0.15
+
+
+def select_photo_size(photo_sizes: Sequence[Any], max_edge: int) -> Any:
+    """
+    选择长边不小于 max_edge 的最小尺寸（都不够大时取最大尺寸）
+
+    Args:
+        photo_sizes: Telegram PhotoSize 列表（含 width / height）
+        max_edge: 目标长边像素
+
+    Returns:
+        选中的 PhotoSize
+    """
+    ordered = sorted(photo_sizes, key=lambda p: max(p.width, p.height))
+    for photo in ordered:
+        if max(photo.width, photo.height) >= max_edge:
+            return photo
+    return ordered[-1]
+
+
+class ImagePreprocessor:
+    """图片预处理器"""
+
+    def __init__(
+        self,
+        max_edge: int = 1280,
+        quality: int = 80,
+        image_format: str = "jpeg",
+        crop_to_text: bool = False,
+        max_workers: int = 2
+    ):
+        """
+        初始化预处理器
+
+        Args:
+            max_edge: 缩放后长边的最大像素
+            quality: 编码质量（1-100）
+            image_format: 输出格式，jpeg / webp
+            crop_to_text: 是否裁剪到文字区域
+            max_workers: 图像处理线程数
+        """
+        self.max_edge = max_edge
+        self.quality = quality
+        self.pil_format, self.mime_type = IMAGE_FORMATS[image_format.lower()]
+        self.crop_to_text = crop_to_text
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image")
+
+        if Image is None:
+            logger.warning("⚠️ Pillow not installed, images will be sent without preprocessing")
+
+    async def process(self, image_bytes: bytes) -> Tuple[bytes, str]:
+        """
+        在线程池中预处理图片（不阻塞事件循环）
+
+        Args:
+            image_bytes: 原始图片数据
+
+        Returns:
+            (处理后的图片数据, MIME 类型)，处理失败时返回原图
+        """
+        if Image is None:
+            return image_bytes, "image/jpeg"
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, self._process_sync, image_bytes)
+        except Exception as e:
+            logger.warning(f"⚠️ Image preprocessing failed, sending original: {e}")
+            return image_bytes, "image/jpeg"
+
+    def _process_sync(self, image_bytes: bytes) -> Tuple[bytes, str]:
+        """缩放、裁剪并重新编码"""
+        with Image.open(BytesIO(image_bytes)) as img:
+            original_size = img.size
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+
+            if self.crop_to_text:
+                box = self._text_bbox(img)
+                if box:
+                    img = img.crop(box)
+
+            img.thumbnail((self.max_edge, self.max_edge), Image.LANCZOS)
+
+            out = BytesIO()
+            img.save(out, format=self.pil_format, quality=self.quality, optimize=True)
+
+        # 尺寸未变且重新编码没有变小时保留原图（视觉 token 只与尺寸有关）
+        processed = out.getvalue()
+        if img.size == original_size and len(processed) >= len(image_bytes):
+            return image_bytes, "image/jpeg"
+
+        logger.info(f"🖼️ Image preprocessed: {len(image_bytes)} -> {len(processed)} bytes ({img.width}x{img.height})")
+        return processed, self.mime_type
+
+    @staticmethod
+    def _text_bbox(img) -> Optional[Tuple[int, int, int, int]]:
+        """
+        估算文字区域（高边缘密度区域的外接矩形）
+
+        在缩略图上做边缘检测并二值化，取非零像素的外接矩形并留白；
+        节省面积不足时返回 None，避免误裁掉有用内容
+
+        Returns:
+            (left, top, right, bottom) 或 None
+        """
+        probe = img.convert("L")
+        probe.thumbnail((512, 512))
+        scale_x = img.width / probe.width
+        scale_y = img.height / probe.height
+
+        # 边缘检测在图片外框上会产生伪边缘，去掉最外圈像素
+        edges = probe.filter(ImageFilter.FIND_EDGES).point(lambda v: 255 if v > TEXT_EDGE_THRESHOLD else 0)
+        inner = edges.crop((1, 1, edges.width - 1, edges.height - 1)).getbbox()
+        if not inner:
+            return None
+        bbox = (inner[0] + 1, inner[1] + 1, inner[2] + 1, inner[3] + 1)
+
+        pad_x = img.width * TEXT_CROP_PADDING
+        pad_y = img.height * TEXT_CROP_PADDING
+        left = max(0, int(bbox[0] * scale_x - pad_x))
+        top = max(0, int(bbox[1] * scale_y - pad_y))
+        right = min(img.width, int(bbox[2] * scale_x + pad_x))
+        bottom = min(img.height, int(bbox[3] * scale_y + pad_y))
+
+        saved = 1 - ((right - left) * (bottom - top)) / (img.width * img.height)
+        if saved < TEXT_CROP_MIN_SAVING:
+            return None
+        return left, top, right, bottom
+
+    def close(self) -> None:
+        """关闭线程池"""
+        self._executor.shutdown(wait=True)
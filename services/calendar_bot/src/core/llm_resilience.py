@@ -0,0 +1,226 @@
+"""
+LLM 调用容错
+单次尝试超时、带抖动的指数退避重试、整条消息的总时限，以及按模型的熔断器；
+主模型熔断或重试耗尽时按顺序回退到备用模型，避免用户等待整整一分钟
+"""
+import time
+import random
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Sequence, Tuple, TypeVar
+
+from openai import APIConnectionError, APIStatusError, RateLimitError
+
+from ..monitoring import tracer
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 熔断器状态
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class LLMUnavailableError(Exception):
+    """所有模型都失败、熔断或超出总时限"""
+
+    def __init__(self, message: str, last_error: Optional[BaseException] = None):
+        super().__init__(f"{message}: {last_error}" if last_error else message)
+        self.last_error = last_error
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    连续失败达到阈值后打开，期间直接拒绝；经过 reset_timeout 后进入半开状态，
+    放行一次探测请求，成功则关闭，失败则重新打开
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Args:
+            failure_threshold: 打开熔断所需的连续失败次数
+            reset_timeout: 打开后多久允许探测（秒）
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        """当前是否允许发起请求"""
+        if self.state == BREAKER_CLOSED:
+            return True
+
+        now = time.monotonic()
+        if self.state == BREAKER_OPEN:
+            if now - self._opened_at < self.reset_timeout:
+                return False
+            self.state = BREAKER_HALF_OPEN
+            self._probe_at = None
+
+        # 半开：同一时间只放行一个探测请求（探测迟迟没有结果时再放行一个）
+        if self._probe_at is not None and now - self._probe_at < self.reset_timeout:
+            return False
+        self._probe_at = now
+        return True
+
+    def record_success(self) -> None:
+        """请求成功（或服务端正常响应）"""
+        if self.state != BREAKER_CLOSED:
+            logger.info("✅ LLM circuit breaker closed")
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self._probe_at = None
+
+    def record_failure(self) -> None:
+        """请求失败（超时、连接错误、限流、5xx）"""
+        self.failures += 1
+        if self.state == BREAKER_HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != BREAKER_OPEN:
+                tracer.count("llm_breaker_open")
+            self.state = BREAKER_OPEN
+            self._opened_at = time.monotonic()
+            self._probe_at = None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """超时、连接错误、限流和 5xx 可以重试；其余 4xx 重试无意义"""
+    if isinstance(error, (asyncio.TimeoutError, APIConnectionError, RateLimitError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+class ResilientLLM:
+    """带重试、总时限、熔断与模型回退的 LLM 调用器"""
+
+    def __init__(
+        self,
+        models: Sequence[str],
+        attempt_timeout: float = 20.0,
+        max_attempts: int = 2,
+        deadline: float = 45.0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 4.0,
+        breaker_threshold: int = 5,
+        breaker_reset: float = 30.0
+    ):
+        """
+        初始化
+
+        Args:
+            models: 按优先级排列的模型列表（第一个为主模型）
+            attempt_timeout: 单次尝试超时（秒，流式调用包括读完整个流）
+            max_attempts: 每个模型最多尝试次数
+            deadline: 一条消息所有尝试的总时限（秒）
+            backoff_base: 重试退避基数（秒）
+            backoff_max: 单次退避上限（秒）
+            breaker_threshold: 熔断所需的连续失败次数
+            breaker_reset: 熔断后多久探测恢复（秒）
+        """
+        if not models:
+            raise ValueError("At least one model is required")
+        self.models = list(models)
+        self.attempt_timeout = attempt_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.deadline = deadline
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        """获取模型对应的熔断器"""
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = self._breakers[model] = CircuitBreaker(self.breaker_threshold, self.breaker_reset)
+        return breaker
+
+    def _backoff(self, attempt: int) -> float:
+        """全抖动指数退避"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def call(
+        self,
+        operation: Callable[[str], Awaitable[T]],
+        models: Optional[Sequence[str]] = None
+    ) -> Tuple[T, str]:
+        """
+        按模型优先级执行一次 LLM 操作
+
+        Args:
+            operation: 接收模型名称、发起请求并返回结果的协程函数
+            models: 本次使用的模型列表（默认使用初始化时的列表）
+
+        Returns:
+            (结果, 实际使用的模型)
+
+        Raises:
+            LLMUnavailableError: 所有模型均失败、熔断或超出总时限
+            其他异常: operation 自身的非 API 错误原样抛出
+        """
+        models = list(models or self.models)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        last_error: Optional[BaseException] = None
+
+        for index, model in enumerate(models):
+            breaker = self.breaker(model)
+            if not breaker.allow():
+                logger.warning(f"⚡ LLM circuit open, skipping {model}")
+                tracer.count("llm_breaker_skip")
+                continue
+
+            for attempt in range(self.max_attempts):
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise LLMUnavailableError("LLM deadline exceeded", last_error)
+
+                try:
+                    result = await asyncio.wait_for(operation(model), min(self.attempt_timeout, remaining))
+                except Exception as e:
+                    if not isinstance(e, (asyncio.TimeoutError, APIConnectionError, APIStatusError)):
+                        # operation 自身的错误（与服务状态无关）：结束可能进行中的探测后原样抛出
+                        if breaker.state == BREAKER_HALF_OPEN:
+                            breaker.record_success()
+                        raise
+                    last_error = e
+
+                    if not is_retryable(e):
+                        # 服务端正常响应了 4xx（如模型不存在）：不计入熔断，直接换下一个模型
+                        breaker.record_success()
+                        logger.warning(f"⚠️ LLM request rejected by {model}: {e}")
+                        break
+
+                    breaker.record_failure()
+                    tracer.count("llm_retry")
+                    logger.warning(
+                        f"⚠️ LLM attempt {attempt + 1}/{self.max_attempts} failed on {model}: "
+                        f"{type(e).__name__}: {e}"
+                    )
+                    if breaker.state == BREAKER_OPEN or attempt + 1 >= self.max_attempts:
+                        break
+
+                    delay = self._backoff(attempt)
+                    if delay >= deadline - loop.time():
+                        break
+                    await asyncio.sleep(delay)
+                    continue
+
+                breaker.record_success()
+                if index > 0:
+                    logger.info(f"🔀 LLM fallback used: {model}")
+                    tracer.count("llm_fallback")
+                return result, model
+
+        raise LLMUnavailableError("All LLM models failed", last_error)
+
+    def status(self) -> Dict[str, str]:
+        """各模型熔断器状态"""
+        return {model: self.breaker(model).state for model in self.models}
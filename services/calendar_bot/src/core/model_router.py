@@ -0,0 +1,237 @@
+"""
+模型路由
+文本消息走便宜快速的文本模型，图片走视觉模型，首个答案未通过校验时才升级到更强的模型；
+按模型统计延迟、错误率和估算成本（指数加权平均），据此调整同一路由内候选模型的顺序
+"""
+import time
+import random
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..monitoring import tracer
+from .llm_resilience import ResilientLLM
+
+logger = logging.getLogger(__name__)
+
+ROUTE_TEXT = "text"
+ROUTE_VISION = "vision"
+ROUTE_ESCALATION = "escalation"
+
+ROUTES = (ROUTE_TEXT, ROUTE_VISION, ROUTE_ESCALATION)
+
+# 成本估算：约 4 个字符一个 token，每张图片按固定 token 数计
+CHARS_PER_TOKEN = 4
+IMAGE_TOKENS = 1000
+
+
+@dataclass
+class ModelStats:
+    """单个模型的调用统计（latency / cost / error_rate 为指数加权平均）"""
+    calls: int = 0
+    errors: int = 0
+    escalations: int = 0
+    latency: float = 0.0
+    cost: float = 0.0
+    error_rate: float = 0.0
+    total_cost: float = 0.0
+
+
+class ModelRouter:
+    """按路由选择模型"""
+
+    def __init__(
+        self,
+        routes: Dict[str, Sequence[str]],
+        prices: Optional[Dict[str, float]] = None,
+        cost_weight: float = 1.0,
+        explore_rate: float = 0.05,
+        min_samples: int = 5,
+        alpha: float = 0.2,
+        seed: Optional[int] = None
+    ):
+        """
+        初始化路由器
+
+        Args:
+            routes: {路由: 候选模型列表}，列表顺序为配置的偏好顺序（便宜 / 快的在前）
+            prices: {模型: 每百万 token 的美元价格}，未配置的模型成本按 0 计
+            cost_weight: 每 1 美分成本折合多少秒延迟（用于综合评分）
+            explore_rate: 随机尝试非首选模型的概率（保持统计新鲜）
+            min_samples: 样本数达到该值前按配置顺序优先使用，先积累统计
+            alpha: 指数加权平均系数
+            seed: 随机种子（测试用）
+        """
+        self.routes = {route: list(dict.fromkeys(models)) for route, models in routes.items() if models}
+        self.prices = prices or {}
+        self.cost_weight = cost_weight
+        self.explore_rate = explore_rate
+        self.min_samples = min_samples
+        self.alpha = alpha
+        self._stats: Dict[str, ModelStats] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+    def has_route(self, route: str) -> bool:
+        """是否配置了该路由"""
+        return route in self.routes
+
+    def _stats_for(self, model: str) -> ModelStats:
+        stats = self._stats.get(model)
+        if stats is None:
+            stats = self._stats[model] = ModelStats()
+        return stats
+
+    def _base_score(self, model: str) -> Optional[Tuple[float, float]]:
+        """
+        不含升级项的评分，样本不足时返回 None
+
+        Returns:
+            ((延迟 + 成本折算) × (1 + 2 × 错误率), 升级率)
+        """
+        with self._lock:
+            stats = self._stats.get(model)
+            if stats is None or stats.calls < self.min_samples:
+                return None
+            base = (stats.latency + self.cost_weight * stats.cost * 100) * (1 + 2 * stats.error_rate)
+            return base, stats.escalations / stats.calls
+
+    def score(self, model: str) -> Optional[float]:
+        """
+        综合评分（越小越好），样本不足时返回 None
+
+        评分 = 基础评分 + 升级率 × 升级路由中最好的基础评分
+        （升级模型只取基础评分，模型互为升级目标时也不会递归）
+        """
+        scored = self._base_score(model)
+        if scored is None:
+            return None
+        base, escalation_rate = scored
+
+        if escalation_rate and ROUTE_ESCALATION in self.routes:
+            escalation_scores = [
+                s[0] for s in (self._base_score(m) for m in self.routes[ROUTE_ESCALATION] if m != model)
+                if s is not None
+            ]
+            if escalation_scores:
+                base += escalation_rate * min(escalation_scores)
+        return base
+
+    def models_for(self, route: str) -> List[str]:
+        """
+        返回该路由的候选模型（按评分排序，也作为失败时的回退顺序）
+
+        Args:
+            route: 路由名称
+
+        Returns:
+            模型列表
+        """
+        candidates = self.routes[route]
+        if len(candidates) < 2:
+            return list(candidates)
+
+        if self._rng.random() < self.explore_rate:
+            pick = self._rng.choice(candidates)
+            return [pick] + [m for m in candidates if m != pick]
+
+        # 样本不足的模型排在前面（按配置顺序），先积累统计；之后按评分排序
+        def key(item):
+            index, model = item
+            score = self.score(model)
+            return (score is not None, score or 0.0, index)
+
+        return [model for _, model in sorted(enumerate(candidates), key=key)]
+
+    def estimate_cost(self, model: str, tokens: float) -> float:
+        """估算一次调用的美元成本"""
+        return tokens / 1_000_000 * self.prices.get(model, 0.0)
+
+    def record(self, route: str, model: str, latency: float, tokens: float, error: bool = False) -> None:
+        """
+        记录一次调用结果
+
+        Args:
+            route: 路由名称
+            model: 模型名称
+            latency: 耗时（秒）
+            tokens: 估算的 token 数
+            error: 是否失败
+        """
+        cost = 0.0 if error else self.estimate_cost(model, tokens)
+        with self._lock:
+            stats = self._stats_for(model)
+            a = self.alpha if stats.calls else 1.0
+            stats.calls += 1
+            stats.error_rate += a * ((1.0 if error else 0.0) - stats.error_rate)
+            if error:
+                stats.errors += 1
+            else:
+                stats.latency += a * (latency - stats.latency)
+                stats.cost += a * (cost - stats.cost)
+                stats.total_cost += cost
+
+        tracer.observe(f"route.{route}", latency, model=model, error=error)
+        if cost:
+            tracer.count(f"llm_cost_microusd:{model}", int(cost * 1_000_000))
+
+    def record_escalation(self, model: str) -> None:
+        """记录某模型的答案未通过校验、需要升级"""
+        with self._lock:
+            self._stats_for(model).escalations += 1
+        tracer.count("llm_escalation")
+
+    async def call(
+        self,
+        llm: ResilientLLM,
+        route: str,
+        operation: Callable[[str], Awaitable[str]],
+        prompt_chars: int,
+        images: int = 0
+    ) -> Tuple[str, str]:
+        """
+        按路由选择模型并调用（重试、熔断与回退仍由 ResilientLLM 处理）
+
+        Args:
+            llm: 容错调用器
+            route: 路由名称
+            operation: 接收模型名称、返回输出文本的协程函数
+            prompt_chars: 输入字符数（用于成本估算）
+            images: 输入图片数
+
+        Returns:
+            (输出文本, 实际使用的模型)
+        """
+        async def measured(model: str) -> str:
+            started = time.perf_counter()
+            try:
+                content = await operation(model)
+            except BaseException:
+                self.record(route, model, time.perf_counter() - started, 0, error=True)
+                raise
+            tokens = (prompt_chars + len(content or "")) / CHARS_PER_TOKEN + images * IMAGE_TOKENS
+            self.record(route, model, time.perf_counter() - started, tokens)
+            return content
+
+        tracer.count(f"route_{route}")
+        return await llm.call(measured, models=self.models_for(route))
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        """各模型统计快照"""
+        with self._lock:
+            rows = [
+                {
+                    "model": model,
+                    "calls": s.calls,
+                    "errors": s.errors,
+                    "escalations": s.escalations,
+                    "latency": s.latency,
+                    "cost": s.cost,
+                    "total_cost": s.total_cost,
+                }
+                for model, s in sorted(self._stats.items())
+            ]
+        for row in rows:
+            row["score"] = self.score(row["model"])
+        return rows
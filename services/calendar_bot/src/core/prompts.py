@@ -21,43 +21,48 @@ def generate_role_description(family_members: List[Dict[str, Any]]) -> str:
     return desc
 
 
-def get_system_prompt(
-    user_timezone: str,
-    current_time: str,
-    family_members: List[Dict[str, Any]],
-    is_explicit_event_mode: bool = False
-) -> str:
+class PromptBuilder:
     """
-    生成系统 Prompt
-
-    Args:
-        user_timezone: 用户时区
-        current_time: 当前时间
-        family_members: 家庭成员列表
-        is_explicit_event_mode: 是否为显式事件模式
+    系统 Prompt 构建器
 
-    Returns:
-        系统 Prompt 字符串
+    启动时按家庭成员配置预先生成两种模式（普通 / 显式事件）的静态前缀，
+    每条消息只在末尾追加当前时间和时区。静态内容放在最前面，
+    相同前缀可以命中 OpenRouter 上游模型的 prompt 缓存。
     """
-    # 聊天指令
-    chat_instruction = ""
-    if not is_explicit_event_mode:
-        chat_instruction = (
-            "If input is clearly NOT an event/task (e.g. casual chat), "
-            "reply naturally in plain text. DO NOT output JSON."
-        )
-    else:
-        chat_instruction = "User explicitly requested an event. You MUST return JSON."
-
-    # 生成角色描述
-    role_description = generate_role_description(family_members)
-
-    # 成员列表
-    members_list = "|".join([m['name'] for m in family_members] + ["Family"])
-
-    return f"""
-    Current User Context: {current_time} (Timezone: {user_timezone}).
 
+    def __init__(self, family_members: List[Dict[str, Any]]):
+        """
+        初始化构建器
+
+        Args:
+            family_members: 家庭成员配置列表
+        """
+        self.family_members = family_members
+        self.fingerprint = "|".join(f"{m['name']}:{m['role']}" for m in family_members)
+        self._prefixes = {
+            False: self._build_prefix(family_members, is_explicit_event_mode=False),
+            True: self._build_prefix(family_members, is_explicit_event_mode=True),
+        }
+
+    @staticmethod
+    def _build_prefix(family_members: List[Dict[str, Any]], is_explicit_event_mode: bool) -> str:
+        """生成与时间无关的静态部分"""
+        # 聊天指令
+        if not is_explicit_event_mode:
+            chat_instruction = (
+                "If input is clearly NOT an event/task (e.g. casual chat), "
+                "reply naturally in plain text. DO NOT output JSON."
+            )
+        else:
+            chat_instruction = "User explicitly requested an event. You MUST return JSON."
+
+        # 生成角色描述
+        role_description = generate_role_description(family_members)
+
+        # 成员列表
+        members_list = "|".join([m['name'] for m in family_members] + ["Family"])
+
+        return f"""
     【Task】Parse request into Google Calendar Event JSON.
     {chat_instruction}
 
@@ -73,9 +78,14 @@ def get_system_prompt(
       -> No need for timezones or end_time.
 
     【RULE 3: Date Logic】
-    - Missing year? Assume UPCOMING relative to Now ({current_time}).
+    - Missing year? Assume UPCOMING relative to Now (see Current User Context below).
     - Validate Weekday.
 
+    【RULE 4: Multiple Events】
+    - Input contains several events (e.g. itinerary with multiple flights, poster with several sessions)?
+      -> Output {{"is_event": true, "events": [<event>, <event>, ...]}} where each <event> follows the schema below.
+    - Single event: output the schema below directly.
+
     【Output JSON】
     {{
         "is_event": true,
@@ -90,4 +100,42 @@ def get_system_prompt(
         "description": "...",
         "recurrence": []
     }}
+"""
+
+    def build(self, user_timezone: str, current_time: str, is_explicit_event_mode: bool = False) -> str:
+        """
+        生成系统 Prompt（静态前缀 + 当前上下文）
+
+        Args:
+            user_timezone: 用户时区
+            current_time: 当前时间
+            is_explicit_event_mode: 是否为显式事件模式
+
+        Returns:
+            系统 Prompt 字符串
+        """
+        return (
+            f"{self._prefixes[is_explicit_event_mode]}\n"
+            f"    Current User Context: {current_time} (Timezone: {user_timezone}).\n"
+        )
+
+
+def get_system_prompt(
+    user_timezone: str,
+    current_time: str,
+    family_members: List[Dict[str, Any]],
+    is_explicit_event_mode: bool = False
+) -> str:
+    """
+    生成系统 Prompt（一次性构建，长期运行请使用 PromptBuilder）
+
+    Args:
+        user_timezone: 用户时区
+        current_time: 当前时间
+        family_members: 家庭成员列表
+        is_explicit_event_mode: 是否为显式事件模式
+
+    Returns:
+        系统 Prompt 字符串
     """
+    return PromptBuilder(family_members).build(user_timezone, current_time, is_explicit_event_mode)
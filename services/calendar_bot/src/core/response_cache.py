@@ -0,0 +1,209 @@
+"""
+LLM 响应缓存
+以 (路由模型, 规范化文本, 用户时区, 当地日期, 提示词指纹) 为键缓存原始响应，
+持久化到 SQLite，支持 TTL 过期和 LRU 淘汰
+"""
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 依赖"当前时刻"而非"当前日期"的相对时间表达，结果可能跨天，不走缓存
+RELATIVE_TIME_PATTERN = re.compile(
+    r"(\bin\s+(a|an|half\s+an|\d+(\.\d+)?)\s*(min|mins|minute|minutes|hr|hrs|hour|hours)\b"
+    r"|\b(\d+(\.\d+)?|a|an)\s*(min|mins|minute|minutes|hr|hrs|hour|hours)\s+(from\s+now|later)\b"
+    r"|\b(right\s+now|now|asap)\b"
+    r"|([\d一二两三四五六七八九十半]+\s*(个)?\s*(分钟|小时|钟头)\s*(后|之后|以后))"
+    r"|现在|马上|立刻|一会儿?|待会儿?|稍后)",
+    re.IGNORECASE
+)
+
+
+def normalize_text(text: str) -> str:
+    """
+    规范化消息文本（全半角统一、大小写、空白）
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        规范化后的文本
+    """
+    text = unicodedata.normalize("NFKC", text)
+    return " ".join(text.lower().split())
+
+
+def is_time_relative(text: str) -> bool:
+    """消息是否包含相对当前时刻的时间表达（如"2小时后"、"in 30 minutes"）"""
+    return bool(RELATIVE_TIME_PATTERN.search(unicodedata.normalize("NFKC", text)))
+
+
+class LLMResponseCache:
+    """LLM 响应缓存（SQLite）"""
+
+    def __init__(self, db_path: str, ttl: float = 21600.0, max_entries: int = 1000):
+        """
+        初始化缓存
+
+        Args:
+            db_path: 缓存数据库文件路径
+            ttl: 过期时间（秒）
+            max_entries: 最大条目数，超出时淘汰最久未使用的条目
+        """
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        # 单线程执行所有 SQLite 操作，连接只在该线程使用
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-cache")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor.submit(self._init_db).result()
+
+        logger.info(f"✅ LLM response cache initialized: {db_path} (ttl={ttl}s, max={max_entries})")
+
+    def _init_db(self) -> None:
+        """建表（在缓存线程执行）"""
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_response_cache ("
+                " key TEXT PRIMARY KEY,"
+                " content TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_used_at REAL NOT NULL,"
+                " model TEXT)"
+            )
+            # 旧版缓存表没有 model 列
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(llm_response_cache)")}
+            if "model" not in columns:
+                self._conn.execute("ALTER TABLE llm_response_cache ADD COLUMN model TEXT")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_llm_response_cache_last_used "
+                "ON llm_response_cache (last_used_at)"
+            )
+
+    @staticmethod
+    def make_key(
+        model_name: str,
+        text: str,
+        user_timezone: str,
+        date_bucket: str,
+        prompt_context: Any = None
+    ) -> str:
+        """
+        生成缓存键
+
+        Args:
+            model_name: 模型名称（或路由的候选模型标识）
+            text: 用户消息
+            user_timezone: 用户时区
+            date_bucket: 用户当地日期（YYYY-MM-DD），保证"明天"等相对日期解析一致
+            prompt_context: 其他影响提示词的参数（如家庭成员、显式事件模式）
+
+        Returns:
+            SHA-256 十六进制字符串
+        """
+        raw = json.dumps(
+            [model_name, normalize_text(text), user_timezone, date_bucket, prompt_context],
+            ensure_ascii=False,
+            sort_keys=True
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        读取缓存（命中时刷新最近使用时间）
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            (原始响应内容, 生成该响应的模型)，未命中或已过期返回 None
+        """
+        def run():
+            now = time.time()
+            row = self._conn.execute(
+                "SELECT content, created_at, model FROM llm_response_cache WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            with self._conn:
+                if now - row[1] > self.ttl:
+                    self._conn.execute("DELETE FROM llm_response_cache WHERE key = ?", (key,))
+                    return None
+                self._conn.execute(
+                    "UPDATE llm_response_cache SET last_used_at = ? WHERE key = ?",
+                    (now, key)
+                )
+            return row[0], row[2]
+
+        entry = await self._run(run)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    async def set(self, key: str, content: str, model: Optional[str] = None) -> None:
+        """
+        写入缓存，并按 LRU 淘汰超出上限的条目
+
+        Args:
+            key: 缓存键
+            content: 原始响应内容
+            model: 生成该响应的模型
+        """
+        def run():
+            now = time.time()
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_response_cache "
+                    "(key, content, created_at, last_used_at, model) VALUES (?, ?, ?, ?, ?)",
+                    (key, content, now, now, model)
+                )
+                self._conn.execute(
+                    "DELETE FROM llm_response_cache WHERE created_at < ?",
+                    (now - self.ttl,)
+                )
+                self._conn.execute(
+                    "DELETE FROM llm_response_cache WHERE key IN ("
+                    " SELECT key FROM llm_response_cache"
+                    " ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+
+        await self._run(run)
+
+    def stats(self) -> Dict[str, int]:
+        """命中统计"""
+        return {"hits": self.hits, "misses": self.misses}
+
+    async def _run(self, func):
+        """在缓存线程中执行"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func)
+
+    def close(self) -> None:
+        """关闭线程池和连接"""
+        self._executor.shutdown(wait=True)
+        if self._conn:
+            self._conn.close()
+            self._conn = None
@@ -1,5 +1,30 @@
 """数据库模块"""
-from .models import Base, UserState, EventHistory
+from .models import (
+    Base,
+    UserState,
+    EventHistory,
+    EventBatch,
+    UserPreference,
+    CalendarSyncState,
+    CalendarEventIndex,
+    ProcessedUpdate,
+)
 from .repository import DatabaseRepository
+from .async_repository import AsyncDatabaseRepository
+from .timezone_cache import UserTimezoneCache
+from .update_dedup import RecentUpdates
 
-__all__ = ["Base", "UserState", "EventHistory", "DatabaseRepository"]
+__all__ = [
+    "Base",
+    "UserState",
+    "EventHistory",
+    "EventBatch",
+    "UserPreference",
+    "CalendarSyncState",
+    "CalendarEventIndex",
+    "ProcessedUpdate",
+    "DatabaseRepository",
+    "AsyncDatabaseRepository",
+    "UserTimezoneCache",
+    "RecentUpdates",
+]
@@ -0,0 +1,500 @@
+"""
+异步数据库访问层
+单写线程 + 只读连接池（WAL 模式），接口与 DatabaseRepository 一致但全部可 await
+"""
+import os
+import asyncio
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, Tuple, Callable, Any, Dict, List, Iterable
+
+from sqlalchemy import create_engine
+
+from .models import Base
+from ..monitoring import tracer
+from .timezone_cache import UserTimezoneCache, MetricsHook
+from .update_dedup import RecentUpdates
+
+logger = logging.getLogger(__name__)
+
+# 与 SQLAlchemy 写入 SQLite 的 DateTime 格式保持一致
+SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+DEFAULT_TIMEZONE = "Asia/Singapore"
+
+
+def _stage_name(func: Callable) -> str:
+    """
+    追踪阶段名：取定义该闭包的仓库方法名，如 save_event_history 内的 insert -> db.save_event_history
+    """
+    parts = func.__qualname__.split(".")
+    if "<locals>" in parts:
+        return f"db.{parts[parts.index('<locals>') - 1]}"
+    return f"db.{func.__name__}"
+
+
+class AsyncDatabaseRepository:
+    """异步数据库仓库"""
+
+    def __init__(
+        self,
+        db_path: str,
+        read_pool_size: int = 4,
+        cache_metrics_hook: Optional[MetricsHook] = None,
+        dedup_capacity: int = 2000
+    ):
+        """
+        初始化数据库连接
+
+        Args:
+            db_path: 数据库文件路径
+            read_pool_size: 只读连接池大小
+            cache_metrics_hook: 时区缓存命中/未命中回调（可选）
+            dedup_capacity: 去重记录保留的消息数
+        """
+        # 确保目录存在
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db_path = db_path
+
+        # 复用 ORM 模型建表，保证与同步仓库的表结构一致
+        engine = create_engine(f"sqlite:///{db_path}")
+        Base.metadata.create_all(engine)
+        engine.dispose()
+
+        # 每个线程持有自己的连接
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+        # 单写线程：所有写操作串行执行，避免 SQLite 写锁竞争
+        self._writer = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="sqlite-writer",
+            initializer=self._init_connection,
+            initargs=(False,)
+        )
+
+        # 只读连接池：WAL 模式下读操作不会被写操作阻塞
+        self._readers = ThreadPoolExecutor(
+            max_workers=read_pool_size,
+            thread_name_prefix="sqlite-reader",
+            initializer=self._init_connection,
+            initargs=(True,)
+        )
+
+        # 在写线程上开启 WAL（持久化到数据库文件）
+        self._writer.submit(self._enable_wal).result()
+
+        # 时区缓存（启动时整表预热）
+        self.timezone_cache = UserTimezoneCache(metrics_hook=cache_metrics_hook)
+        self.timezone_cache.warm(self._readers.submit(self._load_all_timezones).result())
+
+        # 已处理消息（启动时加载最近的记录，识别重启后重放的消息）
+        self.recent_updates = RecentUpdates(capacity=dedup_capacity)
+        self.recent_updates.warm(self._readers.submit(self._load_recent_updates).result())
+
+        logger.info(f"✅ Async database initialized: {db_path} (WAL, {read_pool_size} readers)")
+
+    def _init_connection(self, read_only: bool) -> None:
+        """为当前线程创建连接"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA busy_timeout = 5000")
+        if read_only:
+            conn.execute("PRAGMA query_only = ON")
+        self._local.conn = conn
+
+        with self._connections_lock:
+            self._connections.append(conn)
+
+    def _enable_wal(self) -> None:
+        """开启 WAL 模式"""
+        conn = self._local.conn
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+
+    def _load_all_timezones(self) -> dict:
+        """读取 user_state 全表（在读线程执行）"""
+        rows = self._local.conn.execute(
+            "SELECT user_id, current_timezone FROM user_state"
+        ).fetchall()
+        return {user_id: tz for user_id, tz in rows}
+
+    def _load_recent_updates(self) -> list:
+        """读取最近处理过的消息（在读线程执行），按处理顺序从旧到新"""
+        rows = self._local.conn.execute(
+            "SELECT update_id, chat_id, message_id FROM processed_update ORDER BY id DESC LIMIT ?",
+            (self.recent_updates.capacity,)
+        ).fetchall()
+        return rows[::-1]
+
+    async def _read(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """在只读连接池中执行"""
+        loop = asyncio.get_running_loop()
+        with tracer.span(_stage_name(func)):
+            return await loop.run_in_executor(self._readers, lambda: func(self._local.conn))
+
+    async def _write(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """在写线程中执行（自动提交）"""
+        def run():
+            conn = self._local.conn
+            with conn:
+                return func(conn)
+
+        loop = asyncio.get_running_loop()
+        with tracer.span(_stage_name(func)):
+            return await loop.run_in_executor(self._writer, run)
+
+    def close(self) -> None:
+        """关闭线程池和所有连接"""
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+    # ==================== 用户状态相关 ====================
+
+    async def get_user_timezone(self, user_id: int) -> str:
+        """
+        获取用户时区（优先读缓存，命中时不离开事件循环）
+
+        Args:
+            user_id: 用户 ID
+
+        Returns:
+            时区字符串
+        """
+        cached = self.timezone_cache.get(user_id)
+        if cached is not None:
+            return cached
+        version = self.timezone_cache.version
+
+        def query(conn):
+            return conn.execute(
+                "SELECT current_timezone FROM user_state WHERE user_id = ?",
+                (user_id,)
+            ).fetchone()
+
+        row = await self._read(query)
+        timezone = row[0] if row else DEFAULT_TIMEZONE
+
+        # 读库期间 set_user_timezone 可能已写入新值，此时不回填旧值
+        self.timezone_cache.fill(user_id, timezone, version)
+        return timezone
+
+    async def set_user_timezone(self, user_id: int, timezone: str) -> None:
+        """
+        设置用户时区
+
+        Args:
+            user_id: 用户 ID
+            timezone: 时区字符串
+        """
+        now = datetime.utcnow().strftime(SQLITE_DATETIME_FORMAT)
+
+        def upsert(conn):
+            conn.execute(
+                "INSERT INTO user_state (user_id, current_timezone, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET "
+                "current_timezone = excluded.current_timezone, updated_at = excluded.updated_at",
+                (user_id, timezone, now)
+            )
+
+        await self._write(upsert)
+
+        # 写穿：写线程提交成功后更新缓存
+        self.timezone_cache.set(user_id, timezone)
+        logger.info(f"✅ User {user_id} timezone set to {timezone}")
+
+    # ==================== 消息去重相关 ====================
+
+    async def mark_update_processed(self, update_id: int, chat_id: int, message_id: int) -> bool:
+        """
+        记录消息为已处理（内存中 O(1) 判重，新消息写穿到数据库）
+
+        Args:
+            update_id: Telegram update_id
+            chat_id: 聊天 ID
+            message_id: 消息 ID
+
+        Returns:
+            True 表示新消息，False 表示重复
+        """
+        if not self.recent_updates.check_and_add(update_id, chat_id, message_id):
+            return False
+
+        now = datetime.utcnow().strftime(SQLITE_DATETIME_FORMAT)
+        keep = self.recent_updates.capacity
+
+        def write(conn):
+            cursor = conn.execute(
+                "INSERT INTO processed_update (update_id, chat_id, message_id, created_at) VALUES (?, ?, ?, ?)",
+                (update_id, chat_id, message_id, now)
+            )
+            conn.execute("DELETE FROM processed_update WHERE id <= ?", (cursor.lastrowid - keep,))
+
+        await self._write(write)
+        return True
+
+    # ==================== 用户偏好相关 ====================
+
+    async def get_user_preference(self, user_id: int, key: str) -> Optional[str]:
+        """
+        获取用户偏好
+
+        Args:
+            user_id: 用户 ID
+            key: 偏好键
+
+        Returns:
+            偏好值或 None
+        """
+        def query(conn):
+            return conn.execute(
+                "SELECT value FROM user_preference WHERE user_id = ? AND key = ?",
+                (user_id, key)
+            ).fetchone()
+
+        row = await self._read(query)
+        return row[0] if row else None
+
+    async def set_user_preference(self, user_id: int, key: str, value: str) -> None:
+        """
+        设置用户偏好
+
+        Args:
+            user_id: 用户 ID
+            key: 偏好键
+            value: 偏好值
+        """
+        now = datetime.utcnow().strftime(SQLITE_DATETIME_FORMAT)
+
+        def upsert(conn):
+            conn.execute(
+                "INSERT INTO user_preference (user_id, key, value, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(user_id, key) DO UPDATE SET "
+                "value = excluded.value, updated_at = excluded.updated_at",
+                (user_id, key, value, now)
+            )
+
+        await self._write(upsert)
+        logger.info(f"✅ User {user_id} preference {key} set to {value}")
+
+    # ==================== 事件历史相关 ====================
+
+    async def save_event_history(
+        self,
+        user_id: int,
+        calendar_id: str,
+        google_event_id: str,
+        summary: str
+    ) -> int:
+        """
+        保存事件历史
+
+        Args:
+            user_id: 用户 ID
+            calendar_id: 日历 ID
+            google_event_id: Google 事件 ID
+            summary: 事件标题
+
+        Returns:
+            记录 ID
+        """
+        now = datetime.utcnow().strftime(SQLITE_DATETIME_FORMAT)
+
+        def insert(conn):
+            cursor = conn.execute(
+                "INSERT INTO event_history (user_id, calendar_id, google_event_id, summary, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (user_id, calendar_id, google_event_id, summary, now)
+            )
+            return cursor.lastrowid
+
+        record_id = await self._write(insert)
+        logger.info(f"✅ Event history saved: {summary} (ID: {record_id})")
+        return record_id
+
+    async def save_event_history_batch(
+        self,
+        user_id: int,
+        items: List[Tuple[str, str, str]]
+    ) -> int:
+        """
+        在一个事务中保存多条事件历史和对应的批量撤回记录
+
+        Args:
+            user_id: 用户 ID
+            items: [(calendar_id, google_event_id, summary), ...]
+
+        Returns:
+            批量记录 ID
+        """
+        now = datetime.utcnow().strftime(SQLITE_DATETIME_FORMAT)
+
+        def insert(conn):
+            record_ids = []
+            for calendar_id, google_event_id, summary in items:
+                cursor = conn.execute(
+                    "INSERT INTO event_history (user_id, calendar_id, google_event_id, summary, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (user_id, calendar_id, google_event_id, summary, now)
+                )
+                record_ids.append(str(cursor.lastrowid))
+
+            cursor = conn.execute(
+                "INSERT INTO event_batch (user_id, record_ids, created_at) VALUES (?, ?, ?)",
+                (user_id, ",".join(record_ids), now)
+            )
+            return cursor.lastrowid
+
+        batch_id = await self._write(insert)
+        logger.info(f"✅ Event batch saved: {len(items)} events (ID: {batch_id})")
+        return batch_id
+
+    async def get_event_batch(self, batch_id: int) -> List[Tuple[str, str, str]]:
+        """
+        获取批量记录中的所有事件
+
+        Args:
+            batch_id: 批量记录 ID
+
+        Returns:
+            [(calendar_id, google_event_id, summary), ...]，记录不存在时为空列表
+        """
+        def query(conn):
+            row = conn.execute("SELECT record_ids FROM event_batch WHERE id = ?", (batch_id,)).fetchone()
+            if not row or not row[0]:
+                return []
+
+            record_ids = [int(x) for x in row[0].split(",")]
+            placeholders = ",".join("?" * len(record_ids))
+            return conn.execute(
+                f"SELECT calendar_id, google_event_id, summary FROM event_history "
+                f"WHERE id IN ({placeholders}) ORDER BY id",
+                record_ids
+            ).fetchall()
+
+        return [tuple(row) for row in await self._read(query)]
+
+    async def get_event_from_history(self, event_id: int) -> Optional[Tuple[str, str, str]]:
+        """
+        从历史中获取事件信息
+
+        Args:
+            event_id: 记录 ID
+
+        Returns:
+            (calendar_id, google_event_id, summary) 或 None
+        """
+        def query(conn):
+            return conn.execute(
+                "SELECT calendar_id, google_event_id, summary FROM event_history WHERE id = ?",
+                (event_id,)
+            ).fetchone()
+
+        row = await self._read(query)
+        if row:
+            return (row[0], row[1], row[2])
+        return None
+
+    async def get_last_event_summary(self, user_id: int) -> Optional[Tuple[str, str]]:
+        """
+        获取用户最近的事件摘要
+
+        Args:
+            user_id: 用户 ID
+
+        Returns:
+            (summary, created_at) 或 None
+        """
+        def query(conn):
+            return conn.execute(
+                "SELECT summary, created_at FROM event_history WHERE user_id = ? "
+                "ORDER BY id DESC LIMIT 1",
+                (user_id,)
+            ).fetchone()
+
+        row = await self._read(query)
+        if row:
+            created_at = datetime.fromisoformat(row[1])
+            return (row[0], created_at.strftime("%Y-%m-%d %H:%M:%S"))
+        return None
+
+    # ==================== 日历索引相关 ====================
+
+    async def load_calendar_index(self) -> Dict[str, Tuple[Optional[str], List[Tuple[str, str, float, float]]]]:
+        """
+        加载所有日历的同步状态和事件索引
+
+        Returns:
+            {calendar_id: (sync_token, [(event_id, summary, start_ts, end_ts), ...])}
+        """
+        def query(conn):
+            result = {}
+            for calendar_id, sync_token in conn.execute(
+                "SELECT calendar_id, sync_token FROM calendar_sync_state"
+            ):
+                result[calendar_id] = (sync_token, [])
+
+            for calendar_id, event_id, summary, start_ts, end_ts in conn.execute(
+                "SELECT calendar_id, event_id, summary, start_ts, end_ts FROM calendar_event_index"
+            ):
+                if calendar_id in result:
+                    result[calendar_id][1].append((event_id, summary, start_ts, end_ts))
+            return result
+
+        return await self._read(query)
+
+    async def save_calendar_index(
+        self,
+        calendar_id: str,
+        upserts: Iterable[Tuple[str, str, float, float]],
+        deleted_ids: Iterable[str],
+        sync_token: Optional[str] = None,
+        reset: bool = False
+    ) -> None:
+        """
+        保存日历事件索引变更
+
+        Args:
+            calendar_id: 日历 ID
+            upserts: 新增/更新的事件 [(event_id, summary, start_ts, end_ts), ...]
+            deleted_ids: 删除的事件 ID
+            sync_token: 新的同步 token（None 表示不修改）
+            reset: 是否先清空该日历的索引（全量同步）
+        """
+        now = datetime.utcnow().strftime(SQLITE_DATETIME_FORMAT)
+        upserts = list(upserts)
+        deleted_ids = list(deleted_ids)
+
+        def write(conn):
+            if reset:
+                conn.execute("DELETE FROM calendar_event_index WHERE calendar_id = ?", (calendar_id,))
+
+            conn.executemany(
+                "INSERT INTO calendar_event_index (calendar_id, event_id, summary, start_ts, end_ts) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(calendar_id, event_id) DO UPDATE SET "
+                "summary = excluded.summary, start_ts = excluded.start_ts, end_ts = excluded.end_ts",
+                [(calendar_id, *row) for row in upserts]
+            )
+            conn.executemany(
+                "DELETE FROM calendar_event_index WHERE calendar_id = ? AND event_id = ?",
+                [(calendar_id, event_id) for event_id in deleted_ids]
+            )
+
+            if sync_token is not None or reset:
+                conn.execute(
+                    "INSERT INTO calendar_sync_state (calendar_id, sync_token, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(calendar_id) DO UPDATE SET "
+                    "sync_token = excluded.sync_token, updated_at = excluded.updated_at",
+                    (calendar_id, sync_token, now)
+                )
+
+        await self._write(write)
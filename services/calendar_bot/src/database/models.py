@@ -3,7 +3,7 @@
 使用 SQLAlchemy ORM
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, create_engine
+from sqlalchemy import Column, Integer, String, DateTime, Float, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -35,3 +35,69 @@ class EventHistory(Base):
 
     def __repr__(self):
         return f"<EventHistory(id={self.id}, summary={self.summary})>"
+
+
+class EventBatch(Base):
+    """批量创建记录表（一次撤回对应多条事件历史）"""
+    __tablename__ = "event_batch"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    record_ids = Column(String, nullable=False)  # 逗号分隔的 event_history.id
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<EventBatch(id={self.id}, records={self.record_ids})>"
+
+
+class UserPreference(Base):
+    """用户偏好表（键值对）"""
+    __tablename__ = "user_preference"
+
+    user_id = Column(Integer, primary_key=True)
+    key = Column(String, primary_key=True)
+    value = Column(String, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<UserPreference(user_id={self.user_id}, {self.key}={self.value})>"
+
+
+class CalendarSyncState(Base):
+    """日历增量同步状态表"""
+    __tablename__ = "calendar_sync_state"
+
+    calendar_id = Column(String, primary_key=True)
+    sync_token = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<CalendarSyncState(calendar_id={self.calendar_id})>"
+
+
+class CalendarEventIndex(Base):
+    """日历事件时间索引表（只保存冲突检查需要的字段）"""
+    __tablename__ = "calendar_event_index"
+
+    calendar_id = Column(String, primary_key=True)
+    event_id = Column(String, primary_key=True)
+    summary = Column(String, nullable=False, default="")
+    start_ts = Column(Float, nullable=False)
+    end_ts = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<CalendarEventIndex(calendar_id={self.calendar_id}, event_id={self.event_id})>"
+
+
+class ProcessedUpdate(Base):
+    """已处理的 Telegram 消息（重启后去重，只保留最近的记录）"""
+    __tablename__ = "processed_update"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    update_id = Column(Integer, nullable=False, index=True)
+    chat_id = Column(Integer, nullable=False)
+    message_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ProcessedUpdate(update_id={self.update_id}, chat_id={self.chat_id}, message_id={self.message_id})>"
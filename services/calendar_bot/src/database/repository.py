@@ -7,7 +7,8 @@ import logging
 from typing import Optional, Tuple
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
-from .models import Base, UserState, EventHistory
+from .models import Base, UserState, EventHistory, UserPreference
+from .timezone_cache import UserTimezoneCache, MetricsHook
 
 logger = logging.getLogger(__name__)
 
@@ -15,12 +16,13 @@ logger = logging.getLogger(__name__)
 class DatabaseRepository:
     """数据库仓库"""
 
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, cache_metrics_hook: Optional[MetricsHook] = None):
         """
         初始化数据库连接
 
         Args:
             db_path: 数据库文件路径
+            cache_metrics_hook: 时区缓存命中/未命中回调（可选）
         """
         # 确保目录存在
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
@@ -42,6 +44,10 @@ class DatabaseRepository:
             bind=self.engine
         )
 
+        # 时区缓存（启动时整表预热）
+        self.timezone_cache = UserTimezoneCache(metrics_hook=cache_metrics_hook)
+        self.warm_timezone_cache()
+
         logger.info(f"✅ Database initialized: {db_path}")
 
     def get_session(self) -> Session:
@@ -50,9 +56,15 @@ class DatabaseRepository:
 
     # ==================== 用户状态相关 ====================
 
+    def warm_timezone_cache(self) -> None:
+        """从 user_state 表预热时区缓存"""
+        with self.get_session() as session:
+            rows = session.query(UserState.user_id, UserState.current_timezone).all()
+        self.timezone_cache.warm({user_id: tz for user_id, tz in rows})
+
     def get_user_timezone(self, user_id: int) -> str:
         """
-        获取用户时区
+        获取用户时区（优先读缓存）
 
         Args:
             user_id: 用户 ID
@@ -60,11 +72,17 @@ class DatabaseRepository:
         Returns:
             时区字符串
         """
+        cached = self.timezone_cache.get(user_id)
+        if cached is not None:
+            return cached
+        version = self.timezone_cache.version
+
         with self.get_session() as session:
             user_state = session.query(UserState).filter_by(user_id=user_id).first()
-            if user_state:
-                return user_state.current_timezone
-            return "Asia/Singapore"  # 默认时区
+            timezone = user_state.current_timezone if user_state else "Asia/Singapore"  # 默认时区
+
+        self.timezone_cache.fill(user_id, timezone, version)
+        return timezone
 
     def set_user_timezone(self, user_id: int, timezone: str) -> None:
         """
@@ -86,7 +104,47 @@ class DatabaseRepository:
                 session.add(user_state)
 
             session.commit()
-            logger.info(f"✅ User {user_id} timezone set to {timezone}")
+
+        # 写穿：数据库提交成功后更新缓存
+        self.timezone_cache.set(user_id, timezone)
+        logger.info(f"✅ User {user_id} timezone set to {timezone}")
+
+    # ==================== 用户偏好相关 ====================
+
+    def get_user_preference(self, user_id: int, key: str) -> Optional[str]:
+        """
+        获取用户偏好
+
+        Args:
+            user_id: 用户 ID
+            key: 偏好键
+
+        Returns:
+            偏好值或 None
+        """
+        with self.get_session() as session:
+            pref = session.query(UserPreference).filter_by(user_id=user_id, key=key).first()
+            return pref.value if pref else None
+
+    def set_user_preference(self, user_id: int, key: str, value: str) -> None:
+        """
+        设置用户偏好
+
+        Args:
+            user_id: 用户 ID
+            key: 偏好键
+            value: 偏好值
+        """
+        with self.get_session() as session:
+            pref = session.query(UserPreference).filter_by(user_id=user_id, key=key).first()
+
+            if pref:
+                pref.value = value
+            else:
+                session.add(UserPreference(user_id=user_id, key=key, value=value))
+
+            session.commit()
+            logger.info(f"✅ User {user_id} preference {key} set to {value}")
 
     # ==================== 事件历史相关 ====================
 
@@ -0,0 +1,125 @@
+"""
+用户时区缓存
+进程内写穿缓存，user_state 表很小，启动时整表预热；
+未命中后从数据库回填时带版本检查，避免覆盖期间写入的新时区
+"""
+import threading
+import logging
+from typing import Optional, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# 指标回调：(事件名, user_id)，事件名为 "hit" / "miss"
+MetricsHook = Callable[[str, int], None]
+
+
+class UserTimezoneCache:
+    """用户时区缓存"""
+
+    def __init__(self, metrics_hook: Optional[MetricsHook] = None):
+        """
+        初始化缓存
+
+        Args:
+            metrics_hook: 命中/未命中回调（可选）
+        """
+        self._data: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        # 每次写入 / 失效递增，回填时据此判断读库期间缓存是否变化
+        self._version = 0
+        self.metrics_hook = metrics_hook
+        self.hits = 0
+        self.misses = 0
+
+    def warm(self, entries: Dict[int, str]) -> None:
+        """
+        批量预热
+
+        Args:
+            entries: {user_id: timezone}
+        """
+        with self._lock:
+            self._data.update(entries)
+            self._version += 1
+        logger.info(f"✅ Timezone cache warmed: {len(entries)} users")
+
+    def get(self, user_id: int) -> Optional[str]:
+        """
+        读取缓存
+
+        Args:
+            user_id: 用户 ID
+
+        Returns:
+            时区字符串，未命中返回 None
+        """
+        with self._lock:
+            timezone = self._data.get(user_id)
+            if timezone is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        self._emit("hit" if timezone is not None else "miss", user_id)
+        return timezone
+
+    @property
+    def version(self) -> int:
+        """当前版本（未命中后、读库前获取，回填时传给 fill）"""
+        with self._lock:
+            return self._version
+
+    def set(self, user_id: int, timezone: str) -> None:
+        """写入缓存（数据库写成功后调用）"""
+        with self._lock:
+            self._data[user_id] = timezone
+            self._version += 1
+
+    def fill(self, user_id: int, timezone: str, version: int) -> bool:
+        """
+        未命中后回填从数据库读到的时区
+
+        读库期间有任何写入或失效（版本变化），或该用户已有缓存时不回填，
+        避免较早读到的旧值覆盖 set_user_timezone 写入的新值
+
+        Args:
+            user_id: 用户 ID
+            timezone: 读到的时区
+            version: 读库前获取的 version
+
+        Returns:
+            是否已回填
+        """
+        with self._lock:
+            if self._version != version or user_id in self._data:
+                return False
+            self._data[user_id] = timezone
+            return True
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """
+        失效缓存
+
+        Args:
+            user_id: 用户 ID，None 表示清空全部
+        """
+        with self._lock:
+            if user_id is None:
+                self._data.clear()
+            else:
+                self._data.pop(user_id, None)
+            self._version += 1
+
+    def stats(self) -> Dict[str, int]:
+        """命中统计"""
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+    def _emit(self, event: str, user_id: int) -> None:
+        """调用指标回调，回调异常不影响主流程"""
+        if not self.metrics_hook:
+            return
+        try:
+            self.metrics_hook(event, user_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Timezone cache metrics hook error: {e}")
@@ -0,0 +1,59 @@
+"""
+已处理消息去重
+有界的插入顺序字典，O(1) 查询、先进先出淘汰；由仓库在启动时从数据库预热，
+重启后 Telegram 重放的消息也能被识别
+"""
+import threading
+from collections import OrderedDict
+from typing import Iterable, Tuple
+
+
+class RecentUpdates:
+    """最近处理过的消息集合"""
+
+    def __init__(self, capacity: int = 2000):
+        """
+        初始化
+
+        Args:
+            capacity: 最多记录的消息数
+        """
+        self.capacity = capacity
+        self._keys: "OrderedDict[tuple, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys) // 2
+
+    def warm(self, entries: Iterable[Tuple[int, int, int]]) -> None:
+        """
+        批量预热
+
+        Args:
+            entries: [(update_id, chat_id, message_id), ...]，按处理时间从旧到新
+        """
+        with self._lock:
+            for update_id, chat_id, message_id in entries:
+                self._add(update_id, chat_id, message_id)
+
+    def check_and_add(self, update_id: int, chat_id: int, message_id: int) -> bool:
+        """
+        判断是否为新消息，是则记录
+
+        update_id 或 (chat_id, message_id) 任一已出现即视为重复
+
+        Returns:
+            True 表示新消息，False 表示重复
+        """
+        with self._lock:
+            if ("u", update_id) in self._keys or ("m", chat_id, message_id) in self._keys:
+                return False
+            self._add(update_id, chat_id, message_id)
+            return True
+
+    def _add(self, update_id: int, chat_id: int, message_id: int) -> None:
+        """记录并淘汰最旧的条目（调用方持有锁）"""
+        self._keys[("u", update_id)] = None
+        self._keys[("m", chat_id, message_id)] = None
+        while len(self._keys) > self.capacity * 2:
+            self._keys.popitem(last=False)
@@ -1,7 +1,7 @@
 """处理器模块"""
-from .auth import check_auth
+from .auth import Authorizer, check_auth
 from .command_handlers import CommandHandlers
 from .message_handlers import MessageHandlers
 from .callback_handlers import CallbackHandlers
 
-__all__ = ["check_auth", "CommandHandlers", "MessageHandlers", "CallbackHandlers"]
+__all__ = ["Authorizer", "check_auth", "CommandHandlers", "MessageHandlers", "CallbackHandlers"]
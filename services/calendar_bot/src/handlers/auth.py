@@ -1,24 +1,178 @@
 """
 鉴权处理
+启动时构建一次授权集合（frozenset），每条 Update 只做 O(1) 查找；
+收到 SIGHUP 时重新读取配置，未授权提示按用户限频，避免被陌生消息刷屏放大
 """
+import time
+import logging
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Tuple
+
 from telegram import Update
 
+logger = logging.getLogger(__name__)
+
+# 重新加载回调：返回 (允许的用户 ID, 允许的会话 ID 或 None)
+AuthLoader = Callable[[], Tuple[Iterable[int], Optional[Iterable[int]]]]
+
+# 限频记录超过该数量时清理过期条目
+MAX_REPLY_TRACKED = 1000
+
+
+class Authorizer:
+    """用户 / 会话授权检查"""
+
+    def __init__(
+        self,
+        allowed_user_ids: Iterable[int],
+        allowed_chat_ids: Optional[Iterable[int]] = None,
+        reply_interval: float = 60.0,
+        loader: Optional[AuthLoader] = None
+    ):
+        """
+        初始化授权检查
+
+        Args:
+            allowed_user_ids: 允许的用户 ID
+            allowed_chat_ids: 允许的群组会话 ID，None 表示不限制（私聊始终按用户判断）
+            reply_interval: 同一未授权用户两次提示的最小间隔（秒），0 表示不提示
+            loader: 重新加载授权列表的回调（SIGHUP 时调用）
+        """
+        self.user_ids: FrozenSet[int] = frozenset(allowed_user_ids)
+        self.chat_ids: Optional[FrozenSet[int]] = None if allowed_chat_ids is None else frozenset(allowed_chat_ids)
+        self.reply_interval = reply_interval
+        self.loader = loader
+        self._last_reply: Dict[int, float] = {}
+
+    @classmethod
+    def from_config(cls, config, loader: Optional[AuthLoader] = None) -> "Authorizer":
+        """
+        从配置对象构建
+
+        Args:
+            config: 配置对象
+            loader: 重新加载回调
+
+        Returns:
+            Authorizer 实例
+        """
+        return cls(
+            allowed_user_ids=config.allowed_ids,
+            allowed_chat_ids=getattr(config, "allowed_chats", None),
+            reply_interval=getattr(config, "auth_reply_interval", 60.0),
+            loader=loader
+        )
+
+    def is_allowed(self, user_id: int, chat_id: Optional[int] = None) -> bool:
+        """
+        判断用户在该会话中是否有权限
+
+        Args:
+            user_id: 用户 ID
+            chat_id: 会话 ID（私聊时与用户 ID 相同）
+
+        Returns:
+            是否有权限
+        """
+        if user_id not in self.user_ids:
+            return False
+        if self.chat_ids is None or chat_id is None or chat_id == user_id:
+            return True
+        return chat_id in self.chat_ids
+
+    async def check(self, update: Update) -> bool:
+        """
+        检查 Update 是否有权限，未授权用户按间隔回复提示
 
-async def check_auth(update: Update, allowed_ids: list) -> bool:
+        Args:
+            update: Telegram Update 对象
+
+        Returns:
+            是否有权限
+        """
+        user = update.effective_user
+        if user is None:
+            return False
+        chat = update.effective_chat
+        chat_id = chat.id if chat else None
+
+        if self.is_allowed(user.id, chat_id):
+            return True
+
+        # 授权用户在未授权群组中：静默忽略，不在群里回复
+        if user.id in self.user_ids:
+            logger.debug(f"Ignored update from unauthorized chat {chat_id}")
+            return False
+
+        message = update.effective_message
+        if message is not None and self._should_reply(user.id):
+            logger.warning(f"⛔️ Unauthorized user: {user.id}")
+            await message.reply_text(f"⛔️ 未授权 ID: {user.id}")
+        return False
+
+    def _should_reply(self, user_id: int) -> bool:
+        """未授权提示限频：间隔内只回复一次"""
+        if self.reply_interval <= 0:
+            return False
+
+        now = time.monotonic()
+        last = self._last_reply.get(user_id)
+        if last is not None and now - last < self.reply_interval:
+            return False
+
+        if len(self._last_reply) >= MAX_REPLY_TRACKED:
+            self._last_reply = {
+                uid: ts for uid, ts in self._last_reply.items()
+                if now - ts < self.reply_interval
+            }
+        self._last_reply[user_id] = now
+        return True
+
+    def reload(self) -> bool:
+        """
+        重新加载授权列表（SIGHUP 信号处理函数），加载失败时保留原列表
+
+        Returns:
+            是否加载成功
+        """
+        if self.loader is None:
+            return False
+        old_users = len(self.user_ids)
+        old_chats = "any" if self.chat_ids is None else len(self.chat_ids)
+        try:
+            user_ids, chat_ids = self.loader()
+            self.user_ids = frozenset(user_ids)
+            self.chat_ids = None if chat_ids is None else frozenset(chat_ids)
+        except Exception as e:
+            logger.error(f"❌ Failed to reload authorization list, keeping current: {e}")
+            return False
+
+        self._last_reply.clear()
+        chats = "any" if self.chat_ids is None else len(self.chat_ids)
+        logger.info(
+            f"🔑 Authorization reloaded: users {old_users} → {len(self.user_ids)}, "
+            f"chats {old_chats} → {chats}"
+        )
+        return True
+
+
+async def check_auth(update: Update, authorizer) -> bool:
     """
     检查用户是否有权限
 
     Args:
         update: Telegram Update 对象
-        allowed_ids: 允许的用户 ID 列表
+        authorizer: Authorizer，或允许的用户 ID 集合
 
     Returns:
         是否有权限
     """
+    if isinstance(authorizer, Authorizer):
+        return await authorizer.check(update)
+
     user_id = update.effective_user.id
 
-    if user_id not in allowed_ids:
-        await update.message.reply_text(f"⛔️ 未授权 ID: {user_id}")
+    if user_id not in authorizer:
+        await update.effective_message.reply_text(f"⛔️ 未授权 ID: {user_id}")
         return False
 
     return True
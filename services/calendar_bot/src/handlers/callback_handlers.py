@@ -5,7 +5,7 @@ import logging
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from .auth import check_auth
+from .auth import Authorizer
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +13,7 @@ logger = logging.getLogger(__name__)
 class CallbackHandlers:
     """回调处理器"""
 
-    def __init__(self, config, db, google_calendar):
+    def __init__(self, config, db, google_calendar, authorizer=None):
         """
         初始化处理器
 
@@ -21,8 +21,10 @@ class CallbackHandlers:
             config: 配置对象
             db: 数据库仓库
             google_calendar: Google Calendar 客户端
+            authorizer: 授权检查（未提供时按配置构建）
         """
         self.config = config
+        self.authorizer = authorizer or Authorizer.from_config(config)
         self.db = db
         self.google_calendar = google_calendar
 
@@ -31,14 +33,14 @@ class CallbackHandlers:
         query = update.callback_query
         await query.answer()
 
-        if not await check_auth(update, self.config.allowed_ids):
+        if not await self.authorizer.check(update):
             return
 
         # 撤回事件
         if query.data.startswith("undo:"):
             try:
                 record_id = int(query.data.split(":")[1])
-                event_info = self.db.get_event_from_history(record_id)
+                event_info = await self.db.get_event_from_history(record_id)
 
                 if not event_info:
                     await query.edit_message_text("❌ 记录已过期")
@@ -63,3 +65,31 @@ class CallbackHandlers:
             except Exception as e:
                 logger.error(f"❌ Callback error: {e}")
                 await query.edit_message_text("❌ 操作失败")
+
+        # 批量撤回
+        elif query.data.startswith("undo_batch:"):
+            try:
+                batch_id = int(query.data.split(":")[1])
+                events = await self.db.get_event_batch(batch_id)
+
+                if not events:
+                    await query.edit_message_text("❌ 记录已过期")
+                    return
+
+                # 一个 batch 请求删除全部事件
+                success, msg = await self.google_calendar.delete_events(
+                    [(calendar_id, google_event_id) for calendar_id, google_event_id, _ in events]
+                )
+
+                summaries = "\n".join(f"~~{summary}~~" for _, _, summary in events)
+                if success:
+                    await query.edit_message_text(
+                        f"🗑️ **已撤回 {len(events)} 个事件**\n{summaries}",
+                        parse_mode='Markdown'
+                    )
+                else:
+                    await query.edit_message_text(f"❌ 失败: {msg}")
+
+            except Exception as e:
+                logger.error(f"❌ Callback error: {e}")
+                await query.edit_message_text("❌ 操作失败")
@@ -9,8 +9,10 @@ import pytz
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from .auth import check_auth
+from .auth import Authorizer
 from ..core.timezone_utils import get_chinese_weekday
+from ..integrations.google_calendar import CONFLICT_MODES, day_range, parse_event_datetime
+from ..monitoring import tracer
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +20,7 @@ logger = logging.getLogger(__name__)
 class CommandHandlers:
     """命令处理器"""
 
-    def __init__(self, config, db, google_calendar, zeabur_client):
+    def __init__(self, config, db, google_calendar, zeabur_client, authorizer=None):
         """
         初始化处理器
 
@@ -27,16 +29,19 @@ class CommandHandlers:
             db: 数据库仓库
             google_calendar: Google Calendar 客户端
             zeabur_client: Zeabur 客户端
+            authorizer: 授权检查（未提供时按配置构建）
         """
         self.config = config
+        self.authorizer = authorizer or Authorizer.from_config(config)
         self.db = db
         self.google_calendar = google_calendar
         self.zeabur_client = zeabur_client
         self.family_members = config.get_family_members()
+        self.calendar_labels = config.get_calendar_labels()
 
     async def start_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """处理 /start 命令"""
-        if not await check_auth(update, self.config.allowed_ids):
+        if not await self.authorizer.check(update):
             return
 
         default_name = self.family_members[0]['name']
@@ -47,21 +52,21 @@ class CommandHandlers:
             "2. **任务**: \"记得买牛奶\" (自动设为全天)\n"
             "3. **发图**: 识别海报/机票\n"
             "4. **控制**: `/restartsingboxupdater`\n"
-            "5. **指令**: `/today`, `/event`, `/travel`, `/status`"
+            "5. **指令**: `/today`, `/week`, `/event`, `/travel`, `/status`, `/conflicts`, `/perf`"
         )
         await update.message.reply_text(msg, parse_mode='Markdown')
 
     async def status_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """处理 /status 命令"""
-        if not await check_auth(update, self.config.allowed_ids):
+        if not await self.authorizer.check(update):
             return
 
         user_id = update.effective_user.id
-        tz_str = self.db.get_user_timezone(user_id)
+        tz_str = await self.db.get_user_timezone(user_id)
         now = datetime.now(pytz.timezone(tz_str)).strftime('%Y-%m-%d %H:%M')
 
         creds_ok = "✅ OK" if self.config.google_credentials_json else "❌ Missing"
-        last_evt = self.db.get_last_event_summary(user_id)
+        last_evt = await self.db.get_last_event_summary(user_id)
         last_info = f"{last_evt[0]} ({last_evt[1]})" if last_evt else "无"
 
         members_str = ", ".join([m['name'] for m in self.family_members])
@@ -78,46 +83,76 @@ class CommandHandlers:
 
     async def today_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """处理 /today 命令"""
-        if not await check_auth(update, self.config.allowed_ids):
+        if not await self.authorizer.check(update):
             return
 
-        user_tz = self.db.get_user_timezone(update.effective_user.id)
+        await self._send_agenda(update, days=1)
+
+    async def week_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """处理 /week 命令"""
+        if not await self.authorizer.check(update):
+            return
+
+        await self._send_agenda(update, days=7)
+
+    async def _send_agenda(self, update: Update, days: int):
+        """并发查询所有家庭日历，合并后按开始时间发送"""
+        user_tz = await self.db.get_user_timezone(update.effective_user.id)
         tz_obj = pytz.timezone(user_tz)
-        now = datetime.now(tz_obj)
+        start, end = day_range(user_tz, days)
+
+        title = "今日日程" if days == 1 else f"未来 {days} 天日程"
+        date_range = start.strftime('%Y-%m-%d')
+        if days > 1:
+            date_range += f" ~ {end.strftime('%m-%d')}"
 
         status_msg = await update.message.reply_text("🔍 查询中...")
 
         try:
-            # 使用主日历
-            calendar_id = self.config.google_calendar_id or "primary"
-            events = await self.google_calendar.list_today_events(calendar_id, user_tz)
-
-            if not events:
-                await status_msg.edit_text(f"📅 今天 ({now.strftime('%Y-%m-%d')}) 暂无日程。")
+            events, failed = await self.google_calendar.list_events_multi(
+                list(self.calendar_labels),
+                start.isoformat(),
+                end.isoformat()
+            )
+
+            if not events and not failed:
+                await status_msg.edit_text(f"📅 {title} ({date_range}) 暂无日程。")
                 return
 
-            text = f"📅 **今日日程** ({now.strftime('%Y-%m-%d')})\n"
-            for i, event in enumerate(events, 1):
-                start = event['start'].get('dateTime', event['start'].get('date'))
+            text = f"📅 **{title}** ({date_range})\n"
+            current_day = None
+            for i, (calendar_id, event) in enumerate(events, 1):
                 summary = event.get('summary', '无标题')
+                label = self.calendar_labels.get(calendar_id, '📅')
 
                 time_str = "全天"
-                if 'T' in start:
-                    dt = datetime.fromisoformat(start)
-                    dt_local = dt.astimezone(tz_obj)
+                if 'dateTime' in event['start']:
+                    dt_local = parse_event_datetime(event['start']).astimezone(tz_obj)
                     time_str = dt_local.strftime('%H:%M')
+                    event_day = dt_local.date()
+                else:
+                    event_day = datetime.strptime(event['start']['date'], '%Y-%m-%d').date()
+
+                # 多天视图按日期分组
+                if days > 1 and event_day != current_day:
+                    current_day = event_day
+                    text += f"\n**{event_day.strftime('%m-%d')} ({get_chinese_weekday(event_day)})**\n"
 
-                text += f"{i}. {time_str} {summary}\n"
+                text += f"{i}. {time_str} {label}: {summary}\n"
+
+            if failed:
+                names = ", ".join(self.calendar_labels.get(cid, cid) for cid in failed)
+                text += f"\n⚠️ 查询失败: {names}"
 
             await status_msg.edit_text(text, parse_mode='Markdown')
 
         except Exception as e:
-            logger.error(f"❌ Today handler error: {e}")
+            logger.error(f"❌ Agenda handler error: {e}")
             await status_msg.edit_text(f"❌ 查询失败: {str(e)}")
 
     async def travel_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """处理 /travel 命令"""
-        if not await check_auth(update, self.config.allowed_ids):
+        if not await self.authorizer.check(update):
             return
 
         if not context.args:
@@ -139,25 +174,80 @@ class CommandHandlers:
 
         try:
             pytz.timezone(final_tz)
-            self.db.set_user_timezone(update.effective_user.id, final_tz)
+            await self.db.set_user_timezone(update.effective_user.id, final_tz)
             await update.message.reply_text(f"✈️ Switched: `{final_tz}`", parse_mode='Markdown')
         except pytz.UnknownTimeZoneError:
             await update.message.reply_text("❌ Invalid Timezone")
 
     async def home_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """处理 /home 命令"""
-        if not await check_auth(update, self.config.allowed_ids):
+        if not await self.authorizer.check(update):
             return
 
-        self.db.set_user_timezone(update.effective_user.id, self.config.default_timezone)
+        await self.db.set_user_timezone(update.effective_user.id, self.config.default_timezone)
         await update.message.reply_text(
             f"🏠 Home: `{self.config.default_timezone}`",
             parse_mode='Markdown'
         )
 
+    async def conflicts_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """处理 /conflicts 命令（设置冲突检查模式）"""
+        if not await self.authorizer.check(update):
+            return
+
+        user_id = update.effective_user.id
+
+        if not context.args:
+            current = (
+                await self.db.get_user_preference(user_id, "conflict_mode")
+                or self.config.conflict_check_mode
+            )
+            await update.message.reply_text(
+                f"⚔️ 冲突检查: `{current}`\n"
+                f"Usage: /conflicts {'|'.join(CONFLICT_MODES)}",
+                parse_mode='Markdown'
+            )
+            return
+
+        mode = context.args[0].lower()
+        if mode not in CONFLICT_MODES:
+            await update.message.reply_text(f"❌ Usage: /conflicts {'|'.join(CONFLICT_MODES)}")
+            return
+
+        await self.db.set_user_preference(user_id, "conflict_mode", mode)
+        await update.message.reply_text(f"⚔️ 冲突检查: `{mode}`", parse_mode='Markdown')
+
+    async def perf_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """处理 /perf 命令（各阶段最近耗时分位数）"""
+        if not await self.authorizer.check(update):
+            return
+
+        rows = tracer.snapshot()
+        if not rows:
+            await update.message.reply_text("⏱️ 暂无耗时数据")
+            return
+
+        lines = [f"{'stage':<28}{'n':>6}{'p50':>8}{'p95':>8}{'p99':>8}"]
+        for row in rows:
+            name = row["stage"]
+            if row["model"]:
+                name += f" [{row['model'].split('/')[-1]}]"
+            lines.append(
+                f"{name[:27]:<28}{row['count']:>6}"
+                f"{row['p50'] * 1000:>8.1f}{row['p95'] * 1000:>8.1f}{row['p99'] * 1000:>8.1f}"
+            )
+
+        counters = tracer.counters()
+        if counters:
+            lines.append("")
+            lines.extend(f"{name}: {value}" for name, value in sorted(counters.items()))
+
+        text = "⏱️ **最近耗时 (ms)**\n```\n" + "\n".join(lines) + "\n```"
+        await update.message.reply_text(text, parse_mode='Markdown')
+
     async def restart_singbox_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """处理 /restartsingboxupdater 命令"""
-        if not await check_auth(update, self.config.allowed_ids):
+        if not await self.authorizer.check(update):
             return
 
         if not self.zeabur_client or not self.zeabur_client.api_token:
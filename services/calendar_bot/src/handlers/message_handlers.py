@@ -1,16 +1,22 @@
 """
 Telegram 消息处理器
 """
+import asyncio
 import logging
-from collections import deque
 from io import BytesIO
 
 import pytz
 from telegram import Update, constants, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
-from .auth import check_auth
+from .auth import Authorizer
+from .streaming_reply import StreamingReply
+from .user_queue import UserWorkQueue
 from ..core.timezone_utils import get_timezone_display_name, get_chinese_weekday
+from ..core.image_preprocessor import select_photo_size
+from ..core.llm_resilience import LLMUnavailableError
+from ..integrations.google_calendar import CONFLICT_MODE_DEFERRED
+from ..monitoring import tracer
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +30,11 @@ class MessageHandlers:
         db,
         event_parser,
         google_calendar,
-        processed_ids_queue: deque
+        image_preprocessor=None,
+        debounce: float = 0.0,
+        max_pending: int = 10,
+        max_concurrency: int = 8,
+        authorizer=None
     ):
         """
         初始化处理器
@@ -34,13 +44,18 @@ class MessageHandlers:
             db: 数据库仓库
             event_parser: 事件解析器
             google_calendar: Google Calendar 客户端
-            processed_ids_queue: 已处理消息 ID 队列
+            image_preprocessor: 图片预处理器（可选）
+            debounce: 同一用户连续消息的合并窗口（秒），0 表示逐条立即处理
+            max_pending: 单个用户最多排队的消息数
+            max_concurrency: 同时处理的用户批次数上限
+            authorizer: 授权检查（未提供时按配置构建）
         """
         self.config = config
+        self.authorizer = authorizer or Authorizer.from_config(config)
         self.db = db
         self.event_parser = event_parser
         self.google_calendar = google_calendar
-        self.processed_ids = processed_ids_queue
+        self.image_preprocessor = image_preprocessor
         self.family_members = config.get_family_members()
 
         # 构建辅助数据
@@ -50,25 +65,53 @@ class MessageHandlers:
         self.category_to_icon = {m["name"]: m.get("icon", "📅") for m in self.family_members}
         self.category_to_icon["Family"] = "🏠"
 
+        # 按用户排队：同一用户的消息按顺序处理，防抖窗口内的连续文本合并为一次 AI 调用
+        self.queue = None
+        self._queued_notices = {}
+        if debounce > 0:
+            self.queue = UserWorkQueue(
+                self._process_batch,
+                debounce=debounce,
+                max_pending=max_pending,
+                max_concurrency=max_concurrency
+            )
+
     async def process_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """处理普通消息"""
-        if not await check_auth(update, self.config.allowed_ids):
+        if not await self.authorizer.check(update):
+            return
+
+        # 防止重复处理（update_id 或 chat_id + message_id 已处理过，包括重启后 Telegram 重放的消息）
+        if update.message is None:
+            return
+        is_new = await self.db.mark_update_processed(
+            update.update_id,
+            update.effective_chat.id,
+            update.message.message_id
+        )
+        if not is_new:
+            logger.info(f"⏭️ Skipping duplicate update {update.update_id}")
             return
 
-        # 防止重复处理
-        if update.update_id in self.processed_ids:
+        if self.queue is None:
+            await self._process_batch(update.effective_user.id, [(update, context)])
             return
-        self.processed_ids.append(update.update_id)
 
-        user_tz = self.db.get_user_timezone(update.effective_user.id)
+        queued = self.queue.submit(update.effective_user.id, (update, context))
+        if queued is None:
+            await update.message.reply_text("⚠️ 消息太多，请等前面的消息处理完再发送")
+        elif queued > 0:
+            notice = await update.message.reply_text(f"⏳ 已排队（{queued} 条），前面的消息处理完后继续")
+            self._queued_notices[update.update_id] = notice
 
-        # 发送 typing 状态
-        await context.bot.send_chat_action(
-            chat_id=update.effective_chat.id,
-            action=constants.ChatAction.TYPING
-        )
+    @staticmethod
+    def _extract_content(update: Update):
+        """
+        提取消息内容
 
-        # 提取内容
+        Returns:
+            (文本内容, 是否为显式事件请求)
+        """
         text_content = update.message.caption if update.message.caption else update.message.text
         text_content = text_content or ""
 
@@ -78,41 +121,97 @@ class MessageHandlers:
             is_explicit_event = True
             text_content = text_content.replace("/event", "", 1).strip()
 
-        try:
-            # 处理图片消息
-            if update.message.photo:
-                await self._handle_image_message(
-                    update,
-                    text_content,
-                    user_tz
-                )
-            # 处理文本消息
-            elif text_content:
-                await self._handle_text_message(
-                    update,
-                    text_content,
-                    user_tz,
-                    is_explicit_event
-                )
+        return text_content, is_explicit_event
+
+    async def _process_batch(self, user_id: int, items: list):
+        """
+        按到达顺序处理同一用户的一批消息
 
-        except Exception as e:
-            logger.error(f"❌ Message processing error: {e}", exc_info=True)
-            await update.message.reply_text("❌ 处理失败，请稍后重试")
+        连续的文本消息（显式与否相同）合并为一组，一次解析；图片逐条处理。
+
+        Args:
+            user_id: 用户 ID
+            items: [(update, context), ...]
+        """
+        # 移除"已排队"提示
+        for update, _ in items:
+            notice = self._queued_notices.pop(update.update_id, None)
+            if notice:
+                try:
+                    await notice.delete()
+                except Exception as e:
+                    logger.debug(f"Queued notice delete skipped: {e}")
+
+        user_tz = await self.db.get_user_timezone(user_id)
+
+        # 分组：[(最后一条 update, context, [文本, ...], 是否显式, 是否图片)]
+        groups = []
+        for update, context in items:
+            text_content, is_explicit_event = self._extract_content(update)
+            if update.message.photo:
+                groups.append((update, context, [text_content], False, True))
+            elif not text_content:
+                continue
+            elif groups and not groups[-1][4] and groups[-1][3] == is_explicit_event:
+                texts = groups[-1][2] + [text_content]
+                groups[-1] = (update, context, texts, is_explicit_event, False)
+            else:
+                groups.append((update, context, [text_content], is_explicit_event, False))
+
+        if len(items) > 1:
+            logger.info(f"📦 Coalesced {len(items)} messages into {len(groups)} batch(es) for user {user_id}")
+
+        for update, context, texts, is_explicit_event, is_photo in groups:
+            # 发送 typing 状态
+            await context.bot.send_chat_action(
+                chat_id=update.effective_chat.id,
+                action=constants.ChatAction.TYPING
+            )
+
+            try:
+                # 整个处理过程记录为根 Span，各阶段（下载、AI、日历、数据库）作为子 Span
+                with tracer.span("message.photo" if is_photo else "message.text", user=user_id, messages=len(texts)):
+                    # 处理图片消息
+                    if is_photo:
+                        await self._handle_image_message(
+                            update,
+                            texts[0],
+                            user_tz
+                        )
+                    # 处理文本消息
+                    else:
+                        await self._handle_text_message(
+                            update,
+                            texts,
+                            user_tz,
+                            is_explicit_event
+                        )
+
+            except LLMUnavailableError as e:
+                logger.error(f"❌ LLM unavailable: {e}")
+                await update.message.reply_text("⚠️ AI 服务暂时不可用，请稍后重试")
+            except Exception as e:
+                logger.error(f"❌ Message processing error: {e}", exc_info=True)
+                await update.message.reply_text("❌ 处理失败，请稍后重试")
 
     async def _handle_text_message(
         self,
         update: Update,
-        text: str,
+        texts: list,
         user_tz: str,
         is_explicit_event: bool
     ):
-        """处理文本消息"""
+        """处理文本消息（多条连续消息一次解析，回复最后一条）"""
+        # 普通聊天回复随 AI 输出渐进显示（显式事件请求不显示中间内容）
+        reply = None if is_explicit_event else StreamingReply(update.message)
+
         # 解析消息
-        msg_type, result = await self.event_parser.parse_text_message(
-            text=text,
+        msg_type, result = await self.event_parser.parse_text_messages(
+            texts=texts,
             user_timezone=user_tz,
             family_members=self.family_members,
-            is_explicit_event=is_explicit_event
+            is_explicit_event=is_explicit_event,
+            on_text=reply.update if reply else None
         )
 
         # 如果是普通聊天
@@ -120,11 +219,13 @@ class MessageHandlers:
             if is_explicit_event:
                 await update.message.reply_text(f"⚠️ 无法识别：\n{result}")
             else:
-                await update.message.reply_text(result)
+                await reply.finish(result)
             return
 
-        # 如果是事件，创建日历事件
-        await self._create_and_send_event(update, result, user_tz)
+        # 如果是事件，移除可能已显示的预览并创建日历事件
+        if reply:
+            await reply.discard()
+        await self._create_and_send_events(update, result, user_tz)
 
     async def _handle_image_message(
         self,
@@ -133,18 +234,30 @@ class MessageHandlers:
         user_tz: str
     ):
         """处理图片消息"""
-        # 下载图片
-        file = await update.message.photo[-1].get_file()
-        buffer = BytesIO()
-        await file.download_to_memory(out=buffer)
-        image_bytes = buffer.getvalue()
+        # 下载图片（有预处理器时只下载够用的最小尺寸）
+        photo = update.message.photo[-1]
+        if self.image_preprocessor:
+            photo = select_photo_size(update.message.photo, self.image_preprocessor.max_edge)
+        with tracer.span("telegram.download") as span:
+            file = await photo.get_file()
+            buffer = BytesIO()
+            await file.download_to_memory(out=buffer)
+            image_bytes = buffer.getvalue()
+            span.set(bytes=len(image_bytes))
+
+        # 缩放并重新编码
+        mime_type = "image/jpeg"
+        if self.image_preprocessor:
+            with tracer.span("image.preprocess"):
+                image_bytes, mime_type = await self.image_preprocessor.process(image_bytes)
 
         # 解析图片
         msg_type, result = await self.event_parser.parse_image_message(
             image_bytes=image_bytes,
             caption=caption,
             user_timezone=user_tz,
-            family_members=self.family_members
+            family_members=self.family_members,
+            mime_type=mime_type
         )
 
         # 如果是普通回复
@@ -153,7 +266,119 @@ class MessageHandlers:
             return
 
         # 如果是事件，创建日历事件
-        await self._create_and_send_event(update, result, user_tz)
+        await self._create_and_send_events(update, result, user_tz)
+
+    def _model_label(self, event_data: dict) -> str:
+        """回复中展示的模型（发生回退时为实际使用的模型）"""
+        return event_data.get("_model") or self.event_parser.model_name
+
+    async def _create_and_send_events(
+        self,
+        update: Update,
+        events: list,
+        user_tz: str
+    ):
+        """创建一个或多个事件并发送结果（多个事件使用批量请求）"""
+        if len(events) == 1:
+            await self._create_and_send_event(update, events[0], user_tz)
+            return
+
+        tmp = await update.message.reply_text(f"🗓 ... ({len(events)})")
+
+        default_category = self.family_members[0]['name']
+        conflict_mode = (
+            await self.db.get_user_preference(update.effective_user.id, "conflict_mode")
+            or self.config.conflict_check_mode
+        )
+
+        items = [
+            (event_data, self.config.get_calendar_id(event_data.get('category', default_category)))
+            for event_data in events
+        ]
+        results = await self.google_calendar.create_events(
+            items=items,
+            user_current_tz=user_tz,
+            default_category=default_category,
+            conflict_mode=conflict_mode
+        )
+
+        rows = []  # (事件行, 冲突列表)
+        failures = []
+        created = []
+        deferred = []  # (行序号, 日历ID, 开始, 结束, 事件ID)
+        for event_data, result in zip(events, results):
+            success, link, conflicts, dt_start, dt_end, cal_id, event_id, _, is_all_day = result
+            summary = event_data.get('summary')
+
+            if not success:
+                failures.append(f"• {summary}: {link}")
+                continue
+
+            created.append((cal_id, event_id, summary))
+            icon = self.category_to_icon.get(event_data.get('category'), '📅')
+            date_str = f"{dt_start.strftime('%Y-%m-%d')} ({get_chinese_weekday(dt_start)})"
+            if is_all_day:
+                time_str = "全天"
+            else:
+                time_str = (
+                    f"{dt_start.strftime('%H:%M')} - {dt_end.strftime('%H:%M')} "
+                    f"({get_timezone_display_name(str(dt_start.tzinfo))})"
+                )
+                if conflict_mode == CONFLICT_MODE_DEFERRED:
+                    deferred.append((len(rows), cal_id, dt_start, dt_end, event_id))
+
+            rows.append((f"{len(created)}. {icon} [{summary}]({link})\n    📅 {date_str} 🕒 {time_str}", conflicts))
+
+        if not created:
+            await tmp.edit_text("⚠️ 失败:\n" + "\n".join(failures))
+            return
+
+        # 一条批量撤回记录覆盖所有事件
+        batch_id = await self.db.save_event_history_batch(
+            user_id=update.effective_user.id,
+            items=created
+        )
+
+        def render() -> str:
+            """生成完整消息（含各事件的冲突警告）"""
+            lines = []
+            for line, conflicts in rows:
+                if conflicts:
+                    line += "\n    ⚠️ 冲突: " + "; ".join([c.replace("• ", "") for c in conflicts])
+                lines.append(line)
+
+            message_text = f"✅ 已添加 {len(created)} 个事件\n\n" + "\n".join(lines)
+            if failures:
+                message_text += "\n\n⚠️ 失败:\n" + "\n".join(failures)
+            return message_text + f"\n\n🧠 {self._model_label(events[0])}"
+
+        keyboard = InlineKeyboardMarkup([
+            [InlineKeyboardButton(f"🗑️ 全部撤回 ({len(created)})", callback_data=f"undo_batch:{batch_id}")]
+        ])
+
+        await tmp.edit_text(
+            render(),
+            parse_mode='Markdown',
+            reply_markup=keyboard,
+            disable_web_page_preview=True
+        )
+
+        # 延迟模式：先回复，再并发检查各事件的冲突（排除本批次创建的事件）并追加警告
+        if deferred:
+            batch_ids = {event_id for _, event_id, _ in created}
+            found = await asyncio.gather(*(
+                self.google_calendar.check_conflicts(cal_id, dt_start, dt_end, exclude_event_ids=batch_ids)
+                for _, cal_id, dt_start, dt_end, _ in deferred
+            ))
+            if any(found):
+                for (row, *_), conflicts in zip(deferred, found):
+                    rows[row] = (rows[row][0], conflicts)
+                await tmp.edit_text(
+                    render(),
+                    parse_mode='Markdown',
+                    reply_markup=keyboard,
+                    disable_web_page_preview=True
+                )
 
     async def _create_and_send_event(
         self,
@@ -169,6 +394,12 @@ class MessageHandlers:
         calendar_id = self.config.get_calendar_id(category)
         default_category = self.family_members[0]['name']
 
+        # 冲突检查模式（用户偏好优先，否则使用全局配置）
+        conflict_mode = (
+            await self.db.get_user_preference(update.effective_user.id, "conflict_mode")
+            or self.config.conflict_check_mode
+        )
+
         # 创建事件
         (
             success,
@@ -184,7 +415,8 @@ class MessageHandlers:
             event_data=event_data,
             calendar_id=calendar_id,
             user_current_tz=user_tz,
-            default_category=default_category
+            default_category=default_category,
+            conflict_mode=conflict_mode
         )
 
         if not success:
@@ -217,34 +449,34 @@ class MessageHandlers:
             icon = self.category_to_icon.get(category, '📅')
 
         # 保存历史
-        record_id = self.db.save_event_history(
+        record_id = await self.db.save_event_history(
             user_id=update.effective_user.id,
             calendar_id=cal_id,
             google_event_id=event_id,
             summary=event_data.get('summary')
         )
 
-        # 冲突警告
-        warning = ""
-        if conflicts:
-            warning = "\n⚠️ **冲突**: " + "; ".join([c.replace("• ", "") for c in conflicts])
-
         # 位置信息
         location_info = ""
         if event_data.get('location'):
             location_info = f"📍 {event_data['location']}\n"
 
-        # 完整消息
-        message_text = (
-            f"✅ 已添加\n\n"
-            f"{icon} **{event_data.get('summary')}**\n"
-            f"📅 {date_str} ({weekday})\n"
-            f"🕒 {time_str}\n"
-            f"{location_info}"
-            f"{warning}{fallback_msg}\n"
-            f"🔗 [查看日历]({link})\n\n"
-            f"🧠 {self.config.llm_model_name}"
-        )
+        def render(conflict_list) -> str:
+            """生成完整消息（含冲突警告）"""
+            warning = ""
+            if conflict_list:
+                warning = "\n⚠️ **冲突**: " + "; ".join([c.replace("• ", "") for c in conflict_list])
+
+            return (
+                f"✅ 已添加\n\n"
+                f"{icon} **{event_data.get('summary')}**\n"
+                f"📅 {date_str} ({weekday})\n"
+                f"🕒 {time_str}\n"
+                f"{location_info}"
+                f"{warning}{fallback_msg}\n"
+                f"🔗 [查看日历]({link})\n\n"
+                f"🧠 {self._model_label(event_data)}"
+            )
 
         # 创建撤回按钮
         keyboard = InlineKeyboardMarkup([
@@ -252,7 +484,22 @@ class MessageHandlers:
         ])
 
         await tmp.edit_text(
-            message_text,
+            render(conflicts),
             parse_mode='Markdown',
             reply_markup=keyboard
         )
+
+        # 延迟模式：先回复，再检查冲突并追加警告
+        if conflict_mode == CONFLICT_MODE_DEFERRED and not is_all_day:
+            deferred_conflicts = await self.google_calendar.check_conflicts(
+                cal_id,
+                dt_start,
+                dt_end,
+                exclude_event_id=event_id
+            )
+            if deferred_conflicts:
+                await tmp.edit_text(
+                    render(deferred_conflicts),
+                    parse_mode='Markdown',
+                    reply_markup=keyboard
+                )
@@ -0,0 +1,87 @@
+"""
+流式回复
+先发送一条消息，之后随 AI 输出节流编辑，让聊天回复尽早可见
+"""
+import time
+import logging
+from typing import Optional
+
+from telegram import Message
+from telegram.error import TelegramError
+
+logger = logging.getLogger(__name__)
+
+# Telegram 单条消息长度上限
+MAX_MESSAGE_LENGTH = 4096
+
+
+class StreamingReply:
+    """渐进编辑的回复消息"""
+
+    def __init__(self, message: Message, min_interval: float = 1.0):
+        """
+        初始化
+
+        Args:
+            message: 需要回复的用户消息
+            min_interval: 两次编辑的最小间隔（秒），避免触发 Telegram 限流
+        """
+        self.message = message
+        self.min_interval = min_interval
+        self.sent: Optional[Message] = None
+        self._shown = ""
+        self._last_edit = 0.0
+
+    async def update(self, text: str) -> None:
+        """
+        更新回复内容（首次调用立即发送，之后按间隔编辑）
+
+        Args:
+            text: 目前累计的完整文本
+        """
+        text = text.strip()[:MAX_MESSAGE_LENGTH]
+        if not text or text == self._shown:
+            return
+
+        if self.sent is None:
+            self.sent = await self.message.reply_text(text)
+            self._shown = text
+            self._last_edit = time.monotonic()
+            return
+
+        if time.monotonic() - self._last_edit < self.min_interval:
+            return
+        await self._edit(text)
+
+    async def finish(self, text: str) -> None:
+        """
+        输出最终内容（未发送过则直接发送）
+
+        Args:
+            text: 完整文本
+        """
+        if self.sent is None:
+            await self.message.reply_text(text)
+            return
+        await self._edit(text.strip()[:MAX_MESSAGE_LENGTH])
+
+    async def discard(self) -> None:
+        """删除已发送的预览（输出最终被识别为事件时）"""
+        if self.sent is None:
+            return
+        try:
+            await self.sent.delete()
+        except TelegramError as e:
+            logger.warning(f"⚠️ Failed to delete streaming preview: {e}")
+        self.sent = None
+
+    async def _edit(self, text: str) -> None:
+        """编辑消息，编辑失败（如内容未变、限流）不影响主流程"""
+        if not text or text == self._shown:
+            return
+        try:
+            await self.sent.edit_text(text)
+            self._shown = text
+        except TelegramError as e:
+            logger.debug(f"Streaming edit skipped: {e}")
+        self._last_edit = time.monotonic()
@@ -0,0 +1,124 @@
+"""
+按用户排队的工作队列
+同一用户的消息串行处理并保持顺序；空闲用户的消息立即处理，处理期间到达的
+后续消息经过防抖窗口后合并为一批，不同用户并行处理，总并发受信号量限制
+"""
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UserQueueState:
+    """单个用户的队列状态"""
+    pending: List[Any] = field(default_factory=list)
+    arrived: asyncio.Event = field(default_factory=asyncio.Event)
+    worker: Optional[asyncio.Task] = None
+    busy: bool = False
+
+
+# 批处理回调：(user_id, 按到达顺序排列的条目)
+BatchProcessor = Callable[[int, List[Any]], Awaitable[None]]
+
+
+class UserWorkQueue:
+    """按用户排队的工作队列"""
+
+    def __init__(
+        self,
+        process_batch: BatchProcessor,
+        debounce: float = 1.5,
+        max_wait: float = 5.0,
+        max_pending: int = 10,
+        max_concurrency: int = 8
+    ):
+        """
+        初始化队列
+
+        Args:
+            process_batch: 批处理回调
+            debounce: 防抖窗口（秒），只用于上一批处理期间到达的后续消息：窗口内没有新消息才开始处理
+            max_wait: 第一条消息到达后最长等待时间（秒），避免持续转发时一直不处理
+            max_pending: 单个用户最多排队的消息数，超出时拒绝
+            max_concurrency: 所有用户同时处理的批次数上限
+        """
+        self.process_batch = process_batch
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._users: Dict[int, UserQueueState] = {}
+
+    def submit(self, user_id: int, item: Any) -> Optional[int]:
+        """
+        提交一条消息
+
+        Args:
+            user_id: 用户 ID
+            item: 消息条目
+
+        Returns:
+            该用户正在处理时返回排队中的消息数（用于提示"已排队"），
+            立即处理时返回 0，队列已满返回 None
+        """
+        state = self._users.setdefault(user_id, UserQueueState())
+        if len(state.pending) >= self.max_pending:
+            return None
+
+        state.pending.append(item)
+        state.arrived.set()
+
+        if state.worker is None or state.worker.done():
+            state.worker = asyncio.create_task(self._worker(user_id, state))
+
+        return len(state.pending) if state.busy else 0
+
+    async def _worker(self, user_id: int, state: UserQueueState) -> None:
+        """用户工作协程：取出全部待处理条目 -> 处理 ->（后续消息）防抖，直到队列为空"""
+        loop = asyncio.get_running_loop()
+        # 空闲用户的第一条消息不等待，单条消息不增加延迟
+        follow_up = False
+        while state.pending:
+            deadline = loop.time() + self.max_wait
+            while follow_up:
+                state.arrived.clear()
+                timeout = min(self.debounce, deadline - loop.time())
+                if timeout <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(state.arrived.wait(), timeout)
+                except asyncio.TimeoutError:
+                    break
+
+            follow_up = True
+            batch, state.pending = state.pending, []
+            state.busy = True
+            try:
+                async with self._semaphore:
+                    await self.process_batch(user_id, batch)
+            except Exception as e:
+                logger.error(f"❌ User queue batch error (user {user_id}): {e}", exc_info=True)
+            finally:
+                state.busy = False
+
+        self._users.pop(user_id, None)
+
+    async def close(self, timeout: float = 0.0) -> None:
+        """
+        关闭队列
+
+        Args:
+            timeout: 等待已排队消息处理完毕的最长时间（秒），超时后取消剩余工作
+        """
+        workers = [s.worker for s in self._users.values() if s.worker and not s.worker.done()]
+        if workers and timeout > 0:
+            logger.info(f"⏳ Draining {len(workers)} user queue(s)...")
+            _, workers = await asyncio.wait(workers, timeout=timeout)
+
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._users.clear()
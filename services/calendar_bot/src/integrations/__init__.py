@@ -1,5 +1,6 @@
 """集成模块"""
-from .google_calendar import GoogleCalendarClient
+from .google_calendar import GoogleCalendarClient, CONFLICT_MODES
+from .freebusy_index import FreeBusyIndex
 from .zeabur_client import ZeaburClient
 
-__all__ = ["GoogleCalendarClient", "ZeaburClient"]
+__all__ = ["GoogleCalendarClient", "FreeBusyIndex", "ZeaburClient", "CONFLICT_MODES"]
@@ -0,0 +1,84 @@
+"""
+日历事件列表缓存
+按 (日历 ID, 时间范围) 缓存 events().list 结果，短 TTL，按日历整体失效；
+每次失效递增该日历的代数，查询前取得的代数已变化时不写入（避免失效前发起的查询写回旧结果）
+"""
+import time
+import threading
+from typing import Optional, List, Dict, Any, Tuple
+
+
+class EventListCache:
+    """事件列表 TTL 缓存"""
+
+    def __init__(self, ttl: float = 60.0):
+        """
+        初始化缓存
+
+        Args:
+            ttl: 过期时间（秒），0 表示不缓存
+        """
+        self.ttl = ttl
+        self._data: Dict[str, Dict[Tuple[str, str], Tuple[float, List[Dict[str, Any]]]]] = {}
+        self._lock = threading.Lock()
+        # 失效代数：按日历计数，invalidate(None) 递增全局计数
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+
+    def generation(self, calendar_id: str) -> Tuple[int, int]:
+        """当前失效代数（发起查询前获取，写入时传给 set）"""
+        with self._lock:
+            return self._epoch, self._generations.get(calendar_id, 0)
+
+    def get(self, calendar_id: str, time_min: str, time_max: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        读取缓存
+
+        Returns:
+            事件列表，未命中或已过期返回 None
+        """
+        with self._lock:
+            entry = self._data.get(calendar_id, {}).get((time_min, time_max))
+            if entry is None:
+                return None
+            expires_at, items = entry
+            if expires_at < time.monotonic():
+                del self._data[calendar_id][(time_min, time_max)]
+                return None
+            return items
+
+    def set(
+        self,
+        calendar_id: str,
+        time_min: str,
+        time_max: str,
+        items: List[Dict[str, Any]],
+        generation: Optional[Tuple[int, int]] = None
+    ) -> None:
+        """
+        写入缓存
+
+        Args:
+            generation: 查询前获取的 generation()；之后该日历被失效过时放弃写入
+        """
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != (self._epoch, self._generations.get(calendar_id, 0)):
+                return
+            self._data.setdefault(calendar_id, {})[(time_min, time_max)] = (time.monotonic() + self.ttl, items)
+
+    def invalidate(self, calendar_id: Optional[str] = None) -> None:
+        """
+        失效缓存
+
+        Args:
+            calendar_id: 日历 ID，None 表示清空全部
+        """
+        with self._lock:
+            if calendar_id is None:
+                self._data.clear()
+                self._epoch += 1
+            else:
+                self._data.pop(calendar_id, None)
+                self._generations[calendar_id] = self._generations.get(calendar_id, 0) + 1
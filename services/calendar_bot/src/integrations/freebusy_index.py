@@ -0,0 +1,307 @@
+"""
+本地忙闲索引
+按日历维护事件时间区间，用 Google Calendar 增量同步（syncToken）保持新鲜，
+并持久化到 SQLite，冲突检查直接在内存中完成，无需网络请求
+"""
+import time
+import asyncio
+import logging
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Tuple, Collection
+
+import pytz
+
+from .google_calendar import SyncTokenExpiredError, parse_event_datetime
+
+logger = logging.getLogger(__name__)
+
+
+class IntervalIndex:
+    """
+    区间索引
+
+    按开始时间排序，同时按序维护所有区间时长（删除后最长时长随之回落）。与 [lo, hi)
+    重叠的区间开始时间必然落在 [lo - 最长时长, hi) 内，两次二分即可定位候选范围，
+    查询复杂度 O(log n + m)，m 为该范围内的区间数：日常事件时长相近时 m 接近结果数 k，
+    存在多周的长事件时 m 会变大（长事件删除后恢复）。
+    """
+
+    def __init__(self):
+        self._starts: List[Tuple[float, str]] = []
+        self._events: Dict[str, Tuple[float, float, str]] = {}
+        self._durations: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def upsert(self, event_id: str, start_ts: float, end_ts: float, summary: str) -> None:
+        """新增或更新区间"""
+        self.remove(event_id)
+        insort(self._starts, (start_ts, event_id))
+        insort(self._durations, end_ts - start_ts)
+        self._events[event_id] = (start_ts, end_ts, summary)
+
+    def remove(self, event_id: str) -> None:
+        """删除区间"""
+        item = self._events.pop(event_id, None)
+        if item is None:
+            return
+        i = bisect_left(self._starts, (item[0], event_id))
+        del self._starts[i]
+        del self._durations[bisect_left(self._durations, item[1] - item[0])]
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._starts.clear()
+        self._events.clear()
+        self._durations.clear()
+
+    def overlaps(self, lo: float, hi: float) -> List[Tuple[str, str]]:
+        """
+        查询与 [lo, hi) 重叠的区间
+
+        Returns:
+            [(event_id, summary), ...]，按开始时间排序
+        """
+        max_duration = self._durations[-1] if self._durations else 0.0
+        i = bisect_left(self._starts, (lo - max_duration,))
+        j = bisect_left(self._starts, (hi,))
+
+        result = []
+        for _, event_id in self._starts[i:j]:
+            _, end_ts, summary = self._events[event_id]
+            if end_ts > lo:
+                result.append((event_id, summary))
+        return result
+
+
+def event_bounds(event: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """
+    提取有具体时间的事件的起止时间戳（全天事件返回 None）
+
+    Args:
+        event: Google Calendar 事件对象
+
+    Returns:
+        (start_ts, end_ts) 或 None
+    """
+    start = event.get('start', {})
+    end = event.get('end', {})
+    if 'dateTime' not in start or 'dateTime' not in end:
+        return None
+
+    return parse_event_datetime(start).timestamp(), parse_event_datetime(end).timestamp()
+
+
+class FreeBusyIndex:
+    """本地忙闲索引"""
+
+    def __init__(
+        self,
+        google_calendar,
+        db,
+        calendar_labels: Dict[str, str],
+        sync_interval: float = 300.0,
+        lookback_days: int = 1,
+        max_staleness: Optional[float] = None
+    ):
+        """
+        初始化索引
+
+        Args:
+            google_calendar: Google Calendar 客户端
+            db: 异步数据库仓库
+            calendar_labels: {calendar_id: 显示名称}，即需要索引的日历
+            sync_interval: 增量同步间隔（秒）
+            lookback_days: 全量同步时向前包含的天数
+            max_staleness: 距上次成功同步超过该时长（秒）视为未就绪，改用实时查询（默认 3 个同步间隔）
+        """
+        self.google_calendar = google_calendar
+        self.db = db
+        self.calendar_labels = calendar_labels
+        self.sync_interval = sync_interval
+        self.lookback_days = lookback_days
+        self.max_staleness = max_staleness if max_staleness is not None else 3 * sync_interval
+
+        self._indexes: Dict[str, IntervalIndex] = {cid: IntervalIndex() for cid in calendar_labels}
+        self._sync_tokens: Dict[str, Optional[str]] = {}
+        # 各日历上次成功同步的时间（time.monotonic）；从数据库恢复的索引在首次同步前不算就绪
+        self._synced_at: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {cid: asyncio.Lock() for cid in calendar_labels}
+        self._task: Optional[asyncio.Task] = None
+
+    def is_ready(self, calendar_id: str) -> bool:
+        """该日历最近是否同步成功（同步持续失败时索引会过期，调用方改用实时查询）"""
+        synced_at = self._synced_at.get(calendar_id)
+        if synced_at is None or self._sync_tokens.get(calendar_id) is None:
+            return False
+        return time.monotonic() - synced_at <= self.max_staleness
+
+    # ==================== 生命周期 ====================
+
+    async def load(self) -> None:
+        """从数据库恢复索引"""
+        stored = await self.db.load_calendar_index()
+        for calendar_id, (sync_token, rows) in stored.items():
+            index = self._indexes.get(calendar_id)
+            if index is None:
+                continue
+            for event_id, summary, start_ts, end_ts in rows:
+                index.upsert(event_id, start_ts, end_ts, summary)
+            self._sync_tokens[calendar_id] = sync_token
+
+        logger.info(
+            f"✅ Free/busy index loaded: "
+            f"{sum(len(i) for i in self._indexes.values())} events, "
+            f"{len(self._sync_tokens)}/{len(self._indexes)} calendars"
+        )
+
+    async def start(self) -> None:
+        """加载索引并启动后台同步"""
+        await self.load()
+        self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self) -> None:
+        """停止后台同步"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sync_loop(self) -> None:
+        """周期性增量同步"""
+        while True:
+            await self.sync_all()
+            await asyncio.sleep(self.sync_interval)
+
+    # ==================== 同步 ====================
+
+    async def sync_all(self) -> None:
+        """并发同步所有日历"""
+        await asyncio.gather(*(self.sync(cid) for cid in self._indexes))
+
+    async def sync(self, calendar_id: str) -> None:
+        """
+        同步单个日历（有 token 时增量，否则全量）
+
+        Args:
+            calendar_id: 日历 ID
+        """
+        async with self._locks[calendar_id]:
+            sync_token = self._sync_tokens.get(calendar_id)
+            try:
+                try:
+                    items, next_token = await self._fetch(calendar_id, sync_token)
+                    reset = sync_token is None
+                except SyncTokenExpiredError:
+                    logger.warning(f"⚠️ Sync token expired for {calendar_id}, full resync")
+                    items, next_token = await self._fetch(calendar_id, None)
+                    reset = True
+            except Exception as e:
+                logger.error(f"❌ Free/busy sync error ({calendar_id}): {e}")
+                return
+
+            index = self._indexes[calendar_id]
+            if reset:
+                index.clear()
+
+            upserts, deleted_ids = [], []
+            for event in items:
+                bounds = event_bounds(event)
+                if event.get('status') == 'cancelled' or bounds is None:
+                    index.remove(event['id'])
+                    deleted_ids.append(event['id'])
+                    continue
+                summary = event.get('summary', '无标题')
+                index.upsert(event['id'], bounds[0], bounds[1], summary)
+                upserts.append((event['id'], summary, bounds[0], bounds[1]))
+
+            self._sync_tokens[calendar_id] = next_token
+            self._synced_at[calendar_id] = time.monotonic()
+            await self.db.save_calendar_index(
+                calendar_id,
+                upserts,
+                deleted_ids,
+                sync_token=next_token,
+                reset=reset
+            )
+
+            if items:
+                self.google_calendar.events_cache.invalidate(calendar_id)
+                logger.info(f"🔄 Free/busy synced {calendar_id}: {len(upserts)} upserts, {len(deleted_ids)} deletions")
+
+    async def _fetch(self, calendar_id: str, sync_token: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
+        """调用 Google 增量/全量同步接口"""
+        time_min = None
+        if sync_token is None:
+            time_min = (datetime.now(pytz.utc) - timedelta(days=self.lookback_days)).isoformat()
+        return await self.google_calendar.sync_events(calendar_id, sync_token, time_min)
+
+    # ==================== 本地写穿 ====================
+
+    async def record_insert(self, calendar_id: str, event: Dict[str, Any]) -> None:
+        """记录本 bot 刚插入的事件（不等下一次同步）"""
+        index = self._indexes.get(calendar_id)
+        bounds = event_bounds(event)
+        if index is None or bounds is None:
+            return
+
+        # 与 sync 互斥：全量同步会清空索引并重写数据库，不能在其间写入
+        async with self._locks[calendar_id]:
+            summary = event.get('summary', '无标题')
+            index.upsert(event['id'], bounds[0], bounds[1], summary)
+            await self.db.save_calendar_index(calendar_id, [(event['id'], summary, bounds[0], bounds[1])], [])
+
+    async def record_delete(self, calendar_id: str, event_id: str) -> None:
+        """记录本 bot 刚删除的事件"""
+        index = self._indexes.get(calendar_id)
+        if index is None:
+            return
+
+        async with self._locks[calendar_id]:
+            index.remove(event_id)
+            await self.db.save_calendar_index(calendar_id, [], [event_id])
+
+    # ==================== 查询 ====================
+
+    def find_conflicts(
+        self,
+        calendar_id: str,
+        start_dt: datetime,
+        end_dt: datetime,
+        exclude_event_id: Optional[str] = None,
+        exclude_event_ids: Collection[str] = ()
+    ) -> List[str]:
+        """
+        在所有已同步的日历中查找冲突
+
+        目标日历的冲突显示为 "• 标题"，其他家庭成员日历显示为 "• 名称: 标题"
+
+        Args:
+            calendar_id: 目标日历 ID
+            start_dt: 开始时间（有时区）
+            end_dt: 结束时间（有时区）
+            exclude_event_id: 需要排除的事件 ID
+            exclude_event_ids: 另外需要排除的事件 ID（如同一批次创建的事件）
+
+        Returns:
+            冲突描述列表
+        """
+        lo, hi = start_dt.timestamp(), end_dt.timestamp()
+
+        conflicts = []
+        for cid, index in self._indexes.items():
+            if not self.is_ready(cid):
+                continue
+            for event_id, summary in index.overlaps(lo, hi):
+                if event_id == exclude_event_id or event_id in exclude_event_ids:
+                    continue
+                if cid == calendar_id:
+                    conflicts.append(f"• {summary}")
+                else:
+                    conflicts.append(f"• {self.calendar_labels[cid]}: {summary}")
+        return conflicts
@@ -4,125 +4,386 @@ Google Calendar 集成
 import json
 import asyncio
 import logging
-from typing import Optional, List, Dict, Any, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional, List, Dict, Any, Tuple, Callable, Collection
 from datetime import datetime, timedelta
 
+import httplib2
 from google.oauth2.service_account import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 import pytz
 
 from ..core.timezone_utils import resolve_timezone, smart_fix_year, smart_fix_end_time
 from ..core.event_validator import EventValidator, normalize_recurrence
+from ..monitoring import tracer
+from .event_cache import EventListCache
 
 logger = logging.getLogger(__name__)
 
+# 冲突检查模式
+CONFLICT_MODE_SEQUENTIAL = "sequential"  # 先查冲突再插入（两次串行请求）
+CONFLICT_MODE_PIPELINED = "pipelined"    # 查冲突与插入并发执行
+CONFLICT_MODE_DEFERRED = "deferred"      # 先插入并回复，冲突由调用方稍后检查
+CONFLICT_MODE_OFF = "off"                # 不检查冲突
+
+CONFLICT_MODES = (
+    CONFLICT_MODE_SEQUENTIAL,
+    CONFLICT_MODE_PIPELINED,
+    CONFLICT_MODE_DEFERRED,
+    CONFLICT_MODE_OFF,
+)
+
+
+def day_range(user_timezone: str, days: int = 1) -> Tuple[datetime, datetime]:
+    """
+    计算从今天 0 点开始、持续 days 天的时间范围
+
+    Args:
+        user_timezone: 用户时区
+        days: 天数
+
+    Returns:
+        (开始时间, 结束时间)
+    """
+    tz_obj = pytz.timezone(user_timezone)
+    now = datetime.now(tz_obj)
+
+    start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    end_of_range = start_of_day + timedelta(days=days) - timedelta(seconds=1)
+    return start_of_day, end_of_range
+
+
+def parse_event_datetime(part: Dict[str, Any]) -> datetime:
+    """
+    解析事件的 start/end 字段（dateTime 无偏移时使用 timeZone 字段）
+
+    Args:
+        part: 事件的 start 或 end 字典，必须包含 dateTime
+
+    Returns:
+        有时区的 datetime
+    """
+    dt = datetime.fromisoformat(part['dateTime'].replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = pytz.timezone(part.get('timeZone') or 'UTC').localize(dt)
+    return dt
+
+
+def event_start_key(event: Dict[str, Any], tzinfo=pytz.utc) -> Tuple[float, int]:
+    """
+    事件排序键：全天事件按 tzinfo 的当天 0 点计算，排在同一时刻的定时事件之前
+
+    Args:
+        event: Google Calendar 事件对象
+        tzinfo: 全天事件使用的时区
+
+    Returns:
+        (时间戳, 0=全天/1=定时)
+    """
+    start = event.get('start', {})
+    if 'dateTime' in start:
+        return parse_event_datetime(start).timestamp(), 1
+
+    dt = datetime.strptime(start.get('date', '1970-01-01'), '%Y-%m-%d').replace(tzinfo=tzinfo)
+    return dt.timestamp(), 0
+
+
+class SyncTokenExpiredError(Exception):
+    """增量同步 token 已失效（HTTP 410），需要全量同步"""
+
+
+# 单个 HTTP batch 请求最多包含的子请求数（Google 限制为 50）
+BATCH_MAX_SIZE = 50
+
+# create_event 返回值：(成功, 链接/错误信息, 冲突列表, 开始时间, 结束时间, 日历ID, 事件ID, 回退消息, 是否全天)
+CreateEventResult = Tuple[
+    bool, str, List[str], Optional[datetime], Optional[datetime], Optional[str], Optional[str], str, bool
+]
+
 
 class GoogleCalendarClient:
-    """Google Calendar 客户端"""
+    """
+    Google Calendar 客户端
+
+    googleapiclient 的 service 底层是 httplib2，不是线程安全的。
+    所有 API 调用都在专用线程池中执行，每个工作线程持有自己的 service
+    和 keep-alive HTTP 连接，因此并发请求可以安全地并行执行。
+    """
 
-    def __init__(self, credentials_json: str, event_validator: EventValidator):
+    SCOPES = ['https://www.googleapis.com/auth/calendar']
+
+    def __init__(
+        self,
+        credentials_json: str,
+        event_validator: EventValidator,
+        max_workers: int = 8,
+        http_timeout: float = 30.0,
+        events_cache_ttl: float = 60.0
+    ):
         """
         初始化客户端
 
         Args:
             credentials_json: Google 凭证 JSON 字符串
             event_validator: 事件验证器
+            max_workers: API 调用线程池大小（即最大并发连接数）
+            http_timeout: 单次 HTTP 请求超时（秒）
+            events_cache_ttl: 事件列表缓存时间（秒），0 表示不缓存
         """
         self.credentials_json = credentials_json
         self.validator = event_validator
-        self._service = None
+        self.http_timeout = http_timeout
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="gcal"
+        )
+
+        # 本地忙闲索引（可选，由 FreeBusyIndex 挂载）
+        self.freebusy = None
+
+        # 事件列表缓存（/today、/week）
+        self.events_cache = EventListCache(ttl=events_cache_ttl)
+
+    def _build_service(self):
+        """为当前线程构建独立的 service（独立凭证 + 独立 HTTP 连接）"""
+        info = json.loads(self.credentials_json)
+        creds = Credentials.from_service_account_info(info, scopes=self.SCOPES)
+        http = AuthorizedHttp(creds, http=httplib2.Http(timeout=self.http_timeout))
+        return build('calendar', 'v3', http=http, cache_discovery=False)
 
     def get_service(self):
-        """获取 Google Calendar 服务"""
-        if self._service:
-            return self._service
+        """获取当前线程的 Google Calendar 服务"""
+        service = getattr(self._local, 'service', None)
+        if service:
+            return service
 
         if not self.credentials_json:
             raise ValueError("Google credentials not configured")
 
         try:
-            info = json.loads(self.credentials_json)
-            creds = Credentials.from_service_account_info(
-                info,
-                scopes=['https://www.googleapis.com/auth/calendar']
-            )
-            self._service = build('calendar', 'v3', credentials=creds)
-            logger.info("✅ Google Calendar service initialized")
-            return self._service
+            service = self._build_service()
+            self._local.service = service
+            logger.info(f"✅ Google Calendar service initialized ({threading.current_thread().name})")
+            return service
         except Exception as e:
             logger.error(f"❌ Failed to initialize Google Calendar: {e}")
             raise
 
+    async def _run(self, func: Callable, *args) -> Any:
+        """在 API 线程池中执行阻塞调用（记录为 calendar.<方法名> 阶段，含排队时间）"""
+        loop = asyncio.get_running_loop()
+        with tracer.span(f"calendar.{func.__name__.lstrip('_')}"):
+            return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    def close(self) -> None:
+        """关闭线程池"""
+        self._executor.shutdown(wait=True)
+
     def _check_conflicts(
         self,
-        service,
         calendar_id: str,
         start_dt: datetime,
         end_dt: datetime
-    ) -> List[str]:
+    ) -> List[Dict[str, Any]]:
         """
         检查时间冲突
 
         Args:
-            service: Google Calendar 服务
             calendar_id: 日历 ID
             start_dt: 开始时间
             end_dt: 结束时间
 
         Returns:
-            冲突事件列表
+            冲突事件列表（只包含有具体时间的事件，排除全天事件）
         """
         try:
-            time_min = start_dt.isoformat()
-            time_max = end_dt.isoformat()
+            items = self._list_events(calendar_id, start_dt.isoformat(), end_dt.isoformat())
+            return [event for event in items if 'dateTime' in event['start']]
 
-            events_result = service.events().list(
-                calendarId=calendar_id,
-                timeMin=time_min,
-                timeMax=time_max,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
+        except Exception as e:
+            logger.error(f"❌ Check conflicts error: {e}")
+            return []
 
-            items = events_result.get('items', [])
+    @staticmethod
+    def _format_conflicts(
+        events: List[Dict[str, Any]],
+        exclude_event_id: Optional[str] = None,
+        exclude_event_ids: Collection[str] = ()
+    ) -> List[str]:
+        """
+        格式化冲突事件
 
-            # 只返回有具体时间的事件（排除全天事件）
-            conflicts = []
-            for event in items:
-                if 'dateTime' in event['start']:
-                    summary = event.get('summary', '无标题')
-                    conflicts.append(f"• {summary}")
+        Args:
+            events: 冲突事件列表
+            exclude_event_id: 需要排除的事件 ID（刚插入的事件自身）
+            exclude_event_ids: 另外需要排除的事件 ID（同一批次插入的事件）
 
-            return conflicts
+        Returns:
+            冲突描述列表
+        """
+        return [
+            f"• {event.get('summary', '无标题')}"
+            for event in events
+            if event.get('id') != exclude_event_id and event.get('id') not in exclude_event_ids
+        ]
 
-        except Exception as e:
-            logger.error(f"❌ Check conflicts error: {e}")
-            return []
+    async def check_conflicts(
+        self,
+        calendar_id: str,
+        start_dt: datetime,
+        end_dt: datetime,
+        exclude_event_id: Optional[str] = None,
+        exclude_event_ids: Collection[str] = ()
+    ) -> List[str]:
+        """
+        检查时间冲突（用于延迟检查模式，本地索引可用时不发起请求）
+
+        Args:
+            calendar_id: 日历 ID
+            start_dt: 开始时间
+            end_dt: 结束时间
+            exclude_event_id: 需要排除的事件 ID
+            exclude_event_ids: 另外需要排除的事件 ID（同一批次创建的事件）
 
-    def _insert_event(self, service, calendar_id: str, body: Dict) -> Dict:
+        Returns:
+            冲突描述列表
+        """
+        if self._index_ready(calendar_id):
+            return self.freebusy.find_conflicts(calendar_id, start_dt, end_dt, exclude_event_id, exclude_event_ids)
+
+        events = await self._run(self._check_conflicts, calendar_id, start_dt, end_dt)
+        return self._format_conflicts(events, exclude_event_id, exclude_event_ids)
+
+    async def _on_event_inserted(self, calendar_id: str, event: Dict[str, Any]) -> None:
+        """事件插入后：失效列表缓存并更新本地索引"""
+        self.events_cache.invalidate(calendar_id)
+        if self.freebusy:
+            await self.freebusy.record_insert(calendar_id, event)
+
+    async def _on_event_deleted(self, calendar_id: str, event_id: str) -> None:
+        """事件删除后：失效列表缓存并更新本地索引"""
+        self.events_cache.invalidate(calendar_id)
+        if self.freebusy:
+            await self.freebusy.record_delete(calendar_id, event_id)
+
+    def _index_ready(self, calendar_id: str) -> bool:
+        """本地忙闲索引是否可以回答该日历的冲突查询"""
+        return self.freebusy is not None and self.freebusy.is_ready(calendar_id)
+
+    def _insert_event(self, calendar_id: str, body: Dict) -> Dict:
         """
         插入事件
 
         Args:
-            service: Google Calendar 服务
             calendar_id: 日历 ID
             body: 事件数据
 
         Returns:
             创建的事件对象
         """
-        return service.events().insert(
+        return self.get_service().events().insert(
             calendarId=calendar_id,
             body=body
         ).execute()
 
+    def _build_event_body(
+        self,
+        event_data: Dict[str, Any],
+        user_current_tz: str
+    ) -> Tuple[Dict[str, Any], datetime, datetime, str, bool]:
+        """
+        根据 AI 输出构建 Google Calendar 事件主体
+
+        Args:
+            event_data: 已验证的事件数据
+            user_current_tz: 用户当前时区
+
+        Returns:
+            (事件主体, 开始时间, 结束时间, 回退消息, 是否全天)
+        """
+        is_all_day = event_data.get('is_all_day', False)
+
+        # 构建事件主体
+        body = {
+            'summary': event_data.get('summary', 'New Event'),
+            'description': f"{event_data.get('description', '')}\n\n[Created by CalendarBot]",
+            'location': event_data.get('location', ''),
+        }
+
+        dt_start_display = None
+        dt_end_display = None
+        fallback_msg = ""
+
+        if is_all_day:
+            # 全天事件
+            start_date_str = event_data['start_time']
+            dt_start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
+            dt_end_date = dt_start_date + timedelta(days=1)
+
+            body['start'] = {'date': start_date_str}
+            body['end'] = {'date': dt_end_date.strftime('%Y-%m-%d')}
+            body['colorId'] = '11'  # 番茄色标记全天事件
+
+            dt_start_display = dt_start_date
+            dt_end_display = dt_end_date
+
+        else:
+            # 普通事件（有具体时间）
+            raw_start_tz = event_data.get('start_timezone', event_data.get('event_timezone'))
+            final_start_tz, start_tz_obj, fb_start = resolve_timezone(raw_start_tz, user_current_tz)
+
+            raw_end_tz = event_data.get('end_timezone', raw_start_tz)
+            final_end_tz, end_tz_obj, fb_end = resolve_timezone(raw_end_tz, user_current_tz)
+
+            if fb_start or fb_end:
+                fallback_msg = f"\n⚠️ AI未识别时区，已按 {user_current_tz} 安排。"
+
+            # 解析开始时间
+            dt_start_naive = datetime.strptime(event_data['start_time'], '%Y-%m-%d %H:%M:%S')
+            dt_start_aware, dt_start_naive = smart_fix_year(dt_start_naive, start_tz_obj)
+
+            # 解析结束时间
+            if event_data.get('end_time'):
+                dt_end_naive_raw = datetime.strptime(event_data['end_time'], '%Y-%m-%d %H:%M:%S')
+                dt_end_aware = smart_fix_end_time(dt_start_aware, dt_end_naive_raw, end_tz_obj)
+            else:
+                # 默认持续 1 小时
+                dt_end_aware = dt_start_aware + timedelta(hours=1)
+                final_end_tz = final_start_tz
+
+            # 设置时间
+            body['start'] = {
+                'dateTime': dt_start_naive.isoformat(),
+                'timeZone': final_start_tz
+            }
+            body['end'] = {
+                'dateTime': dt_end_aware.strftime('%Y-%m-%dT%H:%M:%S'),
+                'timeZone': final_end_tz
+            }
+
+            dt_start_display = dt_start_aware
+            dt_end_display = dt_end_aware
+
+        # 添加重复规则
+        if recurrence := normalize_recurrence(event_data.get('recurrence')):
+            body['recurrence'] = recurrence
+
+        return body, dt_start_display, dt_end_display, fallback_msg, is_all_day
+
+    @tracer.traced("calendar.create_event")
     async def create_event(
         self,
         event_data: Dict[str, Any],
         calendar_id: str,
         user_current_tz: str,
-        default_category: str
-    ) -> Tuple[bool, str, List[str], Optional[datetime], Optional[datetime], Optional[str], Optional[str], str, bool]:
+        default_category: str,
+        conflict_mode: str = CONFLICT_MODE_PIPELINED
+    ) -> CreateEventResult:
         """
         创建日历事件
 
@@ -131,6 +392,7 @@ class GoogleCalendarClient:
             calendar_id: 目标日历 ID
             user_current_tz: 用户当前时区
             default_category: 默认分类
+            conflict_mode: 冲突检查模式（见 CONFLICT_MODES）
 
         Returns:
             (成功, 链接/错误信息, 冲突列表, 开始时间, 结束时间, 日历ID, 事件ID, 回退消息, 是否全天)
@@ -141,86 +403,44 @@ class GoogleCalendarClient:
             return False, f"数据校验失败: {err_msg}", [], None, None, None, None, "", False
 
         try:
-            service = self.get_service()
-            is_all_day = event_data.get('is_all_day', False)
-
-            # 构建事件主体
-            body = {
-                'summary': event_data.get('summary', 'New Event'),
-                'description': f"{event_data.get('description', '')}\n\n[Created by CalendarBot]",
-                'location': event_data.get('location', ''),
-            }
-
-            dt_start_display = None
-            dt_end_display = None
-            fallback_msg = ""
-            conflicts = []
-
-            if is_all_day:
-                # 全天事件
-                start_date_str = event_data['start_time']
-                dt_start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-                dt_end_date = dt_start_date + timedelta(days=1)
-
-                body['start'] = {'date': start_date_str}
-                body['end'] = {'date': dt_end_date.strftime('%Y-%m-%d')}
-                body['colorId'] = '11'  # 番茄色标记全天事件
-
-                dt_start_display = dt_start_date
-                dt_end_display = dt_end_date
+            body, dt_start_display, dt_end_display, fallback_msg, is_all_day = self._build_event_body(
+                event_data,
+                user_current_tz
+            )
 
-            else:
-                # 普通事件（有具体时间）
-                raw_start_tz = event_data.get('start_timezone', event_data.get('event_timezone'))
-                final_start_tz, start_tz_obj, fb_start = resolve_timezone(raw_start_tz, user_current_tz)
-
-                raw_end_tz = event_data.get('end_timezone', raw_start_tz)
-                final_end_tz, end_tz_obj, fb_end = resolve_timezone(raw_end_tz, user_current_tz)
-
-                if fb_start or fb_end:
-                    fallback_msg = f"\n⚠️ AI未识别时区，已按 {user_current_tz} 安排。"
-
-                # 解析开始时间
-                dt_start_naive = datetime.strptime(event_data['start_time'], '%Y-%m-%d %H:%M:%S')
-                dt_start_aware, dt_start_naive = smart_fix_year(dt_start_naive, start_tz_obj)
-
-                # 解析结束时间
-                if event_data.get('end_time'):
-                    dt_end_naive_raw = datetime.strptime(event_data['end_time'], '%Y-%m-%d %H:%M:%S')
-                    dt_end_aware = smart_fix_end_time(dt_start_aware, dt_end_naive_raw, end_tz_obj)
-                else:
-                    # 默认持续 1 小时
-                    dt_end_aware = dt_start_aware + timedelta(hours=1)
-                    final_end_tz = final_start_tz
-
-                # 检查冲突
-                conflicts = await asyncio.to_thread(
+            # 全天事件不检查冲突
+            mode = CONFLICT_MODE_OFF if is_all_day else conflict_mode
+            local_conflicts = None
+
+            # 插入事件（按模式决定是否并发检查冲突）
+            if mode in (CONFLICT_MODE_PIPELINED, CONFLICT_MODE_SEQUENTIAL) and self._index_ready(calendar_id):
+                # 本地索引可用：内存中查冲突，只剩一次插入请求
+                local_conflicts = self.freebusy.find_conflicts(calendar_id, dt_start_display, dt_end_display)
+                event = await self._run(self._insert_event, calendar_id, body)
+            elif mode == CONFLICT_MODE_PIPELINED:
+                conflict_events, event = await asyncio.gather(
+                    self._run(self._check_conflicts, calendar_id, dt_start_display, dt_end_display),
+                    self._run(self._insert_event, calendar_id, body)
+                )
+            elif mode == CONFLICT_MODE_SEQUENTIAL:
+                conflict_events = await self._run(
                     self._check_conflicts,
-                    service,
                     calendar_id,
-                    dt_start_aware,
-                    dt_end_aware
+                    dt_start_display,
+                    dt_end_display
                 )
+                event = await self._run(self._insert_event, calendar_id, body)
+            else:
+                conflict_events = []
+                event = await self._run(self._insert_event, calendar_id, body)
 
-                # 设置时间
-                body['start'] = {
-                    'dateTime': dt_start_naive.isoformat(),
-                    'timeZone': final_start_tz
-                }
-                body['end'] = {
-                    'dateTime': dt_end_aware.strftime('%Y-%m-%dT%H:%M:%S'),
-                    'timeZone': final_end_tz
-                }
-
-                dt_start_display = dt_start_aware
-                dt_end_display = dt_end_aware
-
-            # 添加重复规则
-            if recurrence := normalize_recurrence(event_data.get('recurrence')):
-                body['recurrence'] = recurrence
+            if local_conflicts is not None:
+                conflicts = local_conflicts
+            else:
+                # 并发查询可能已经看到刚插入的事件，需要排除自身
+                conflicts = self._format_conflicts(conflict_events, exclude_event_id=event['id'])
 
-            # 插入事件
-            event = await asyncio.to_thread(self._insert_event, service, calendar_id, body)
+            await self._on_event_inserted(calendar_id, event)
 
             return (
                 True,
@@ -238,6 +458,291 @@ class GoogleCalendarClient:
             logger.error(f"❌ Create event error: {e}", exc_info=True)
             return False, str(e), [], None, None, None, None, "", False
 
+    def _execute_batch(self, requests: List[Any]) -> List[Tuple[Optional[Dict], Optional[Exception]]]:
+        """
+        以 HTTP batch 方式执行多个请求（超过上限时分批）
+
+        某一批整体失败时只把该批中尚未返回结果的请求标记为失败，
+        之前各批已成功的结果照常返回（这些事件已经写入日历）
+
+        Args:
+            requests: 由 get_service() 构造的请求对象列表
+
+        Returns:
+            与 requests 一一对应的 (响应, 异常)
+        """
+        service = self.get_service()
+        results: List[Tuple[Optional[Dict], Optional[Exception]]] = [(None, None)] * len(requests)
+
+        def callback(request_id, response, exception):
+            results[int(request_id)] = (response, exception)
+
+        for offset in range(0, len(requests), BATCH_MAX_SIZE):
+            batch = service.new_batch_http_request(callback=callback)
+            chunk = range(offset, min(offset + BATCH_MAX_SIZE, len(requests)))
+            for i in chunk:
+                batch.add(requests[i], request_id=str(i))
+            try:
+                batch.execute()
+            except Exception as e:
+                logger.error(f"❌ Batch request failed for items {chunk.start}-{chunk.stop - 1}: {e}")
+                for i in chunk:
+                    if results[i] == (None, None):
+                        results[i] = (None, e)
+
+        return results
+
+    def _batch_insert_events(self, items: List[Tuple[str, Dict]]) -> List[Tuple[Optional[Dict], Optional[Exception]]]:
+        """
+        批量插入事件
+
+        Args:
+            items: [(calendar_id, body), ...]
+
+        Returns:
+            [(事件对象, 异常), ...]
+        """
+        events = self.get_service().events()
+        return self._execute_batch([
+            events.insert(calendarId=calendar_id, body=body)
+            for calendar_id, body in items
+        ])
+
+    def _batch_delete_events(self, items: List[Tuple[str, str]]) -> List[Tuple[Optional[Dict], Optional[Exception]]]:
+        """
+        批量删除事件
+
+        Args:
+            items: [(calendar_id, event_id), ...]
+
+        Returns:
+            [(响应, 异常), ...]
+        """
+        events = self.get_service().events()
+        return self._execute_batch([
+            events.delete(calendarId=calendar_id, eventId=event_id)
+            for calendar_id, event_id in items
+        ])
+
+    @tracer.traced("calendar.create_events")
+    async def create_events(
+        self,
+        items: List[Tuple[Dict[str, Any], str]],
+        user_current_tz: str,
+        default_category: str,
+        conflict_mode: str = CONFLICT_MODE_PIPELINED
+    ) -> List[CreateEventResult]:
+        """
+        用一个 HTTP batch 请求创建多个日历事件
+
+        Args:
+            items: [(事件数据, 目标日历 ID), ...]
+            user_current_tz: 用户当前时区
+            default_category: 默认分类
+            conflict_mode: 冲突检查模式（见 CONFLICT_MODES）
+
+        Returns:
+            与 items 一一对应的结果，格式同 create_event
+        """
+        results: List[Optional[CreateEventResult]] = [None] * len(items)
+        prepared = []  # (序号, 日历ID, 事件主体, 开始, 结束, 回退消息, 是否全天)
+
+        # 验证并构建事件主体
+        for i, (event_data, calendar_id) in enumerate(items):
+            is_valid, err_msg = self.validator.validate_and_fix_payload(event_data, default_category)
+            if not is_valid:
+                results[i] = (False, f"数据校验失败: {err_msg}", [], None, None, None, None, "", False)
+                continue
+            try:
+                body, dt_start, dt_end, fallback_msg, is_all_day = self._build_event_body(event_data, user_current_tz)
+            except Exception as e:
+                logger.error(f"❌ Build event error: {e}")
+                results[i] = (False, str(e), [], None, None, None, None, "", False)
+                continue
+            prepared.append((i, calendar_id, body, dt_start, dt_end, fallback_msg, is_all_day))
+
+        if not prepared:
+            return results
+
+        # 冲突检查：本地索引直接回答，否则与批量插入并发查询（延迟/关闭模式不检查）
+        check = conflict_mode in (CONFLICT_MODE_PIPELINED, CONFLICT_MODE_SEQUENTIAL)
+        local_conflicts, conflict_tasks = [], []
+        for _, calendar_id, _, dt_start, dt_end, _, is_all_day in prepared:
+            if is_all_day or not check:
+                local_conflicts.append([])
+                conflict_tasks.append(asyncio.sleep(0))
+            elif self._index_ready(calendar_id):
+                local_conflicts.append(self.freebusy.find_conflicts(calendar_id, dt_start, dt_end))
+                conflict_tasks.append(asyncio.sleep(0))
+            else:
+                local_conflicts.append(None)
+                conflict_tasks.append(self._run(self._check_conflicts, calendar_id, dt_start, dt_end))
+
+        # 冲突查询失败不影响已插入事件的结果
+        insert_results, *remote_conflicts = await asyncio.gather(
+            self._run(self._batch_insert_events, [(p[1], p[2]) for p in prepared]),
+            *conflict_tasks,
+            return_exceptions=True
+        )
+        if isinstance(insert_results, BaseException):
+            logger.error(f"❌ Batch create error: {insert_results}", exc_info=insert_results)
+            for i, *_ in prepared:
+                results[i] = (False, str(insert_results), [], None, None, None, None, "", False)
+            return results
+
+        new_ids = {event['id'] for event, _ in insert_results if event}
+
+        for (i, calendar_id, _, dt_start, dt_end, fallback_msg, is_all_day), (event, error), local, remote in zip(
+            prepared, insert_results, local_conflicts, remote_conflicts
+        ):
+            if error or not event:
+                logger.error(f"❌ Batch insert error: {error}")
+                results[i] = (False, str(error), [], None, None, None, None, "", False)
+                continue
+
+            if local is not None:
+                conflicts = local
+            elif isinstance(remote, BaseException):
+                logger.warning(f"⚠️ Conflict check error: {remote}")
+                conflicts = []
+            else:
+                # 排除本批次自己插入的事件
+                conflicts = [
+                    f"• {c.get('summary', '无标题')}"
+                    for c in (remote or [])
+                    if c.get('id') not in new_ids
+                ]
+
+            await self._on_event_inserted(calendar_id, event)
+
+            results[i] = (
+                True,
+                event.get('htmlLink'),
+                conflicts,
+                dt_start,
+                dt_end,
+                calendar_id,
+                event['id'],
+                fallback_msg,
+                is_all_day
+            )
+
+        logger.info(f"✅ Batch created {len(new_ids)}/{len(items)} events")
+        return results
+
+    async def delete_events(self, items: List[Tuple[str, str]]) -> Tuple[bool, str]:
+        """
+        用一个 HTTP batch 请求删除多个事件
+
+        Args:
+            items: [(calendar_id, event_id), ...]
+
+        Returns:
+            (全部成功, 消息)
+        """
+        try:
+            results = await self._run(self._batch_delete_events, items)
+        except Exception as e:
+            logger.error(f"❌ Batch delete error: {e}")
+            return False, str(e)
+
+        failed = 0
+        for (calendar_id, event_id), (_, error) in zip(items, results):
+            if error:
+                failed += 1
+                logger.error(f"❌ Delete event error ({event_id}): {error}")
+            else:
+                await self._on_event_deleted(calendar_id, event_id)
+
+        if failed:
+            return False, f"{failed}/{len(items)} 个事件删除失败"
+        return True, "已删除"
+
+    def _delete_event(self, calendar_id: str, event_id: str) -> None:
+        """
+        删除事件
+
+        Args:
+            calendar_id: 日历 ID
+            event_id: 事件 ID
+        """
+        self.get_service().events().delete(
+            calendarId=calendar_id,
+            eventId=event_id
+        ).execute()
+
+    def _list_events(self, calendar_id: str, time_min: str, time_max: str) -> List[Dict[str, Any]]:
+        """
+        列出时间范围内的事件
+
+        Args:
+            calendar_id: 日历 ID
+            time_min: 开始时间（ISO 格式）
+            time_max: 结束时间（ISO 格式）
+
+        Returns:
+            事件列表
+        """
+        events_result = self.get_service().events().list(
+            calendarId=calendar_id,
+            timeMin=time_min,
+            timeMax=time_max,
+            singleEvents=True,
+            orderBy='startTime'
+        ).execute()
+        return events_result.get('items', [])
+
+    def _sync_events(
+        self,
+        calendar_id: str,
+        sync_token: Optional[str],
+        time_min: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        增量同步事件（syncToken）
+
+        Args:
+            calendar_id: 日历 ID
+            sync_token: 上次同步返回的 token，None 表示全量同步
+            time_min: 全量同步的起始时间（增量同步时不可使用）
+
+        Returns:
+            (变更的事件列表, 新的 sync token)
+
+        Raises:
+            SyncTokenExpiredError: token 失效
+        """
+        service = self.get_service()
+        params = {'calendarId': calendar_id, 'singleEvents': True, 'maxResults': 2500}
+        if sync_token:
+            params['syncToken'] = sync_token
+        elif time_min:
+            params['timeMin'] = time_min
+
+        items = []
+        page_token = None
+        while True:
+            try:
+                result = service.events().list(pageToken=page_token, **params).execute()
+            except HttpError as e:
+                if e.resp.status == 410:
+                    raise SyncTokenExpiredError(calendar_id) from e
+                raise
+
+            items.extend(result.get('items', []))
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                return items, result.get('nextSyncToken')
+
+    async def sync_events(
+        self,
+        calendar_id: str,
+        sync_token: Optional[str],
+        time_min: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """增量同步事件（异步包装，参数同 _sync_events）"""
+        return await self._run(self._sync_events, calendar_id, sync_token, time_min)
+
     async def delete_event(self, calendar_id: str, event_id: str) -> Tuple[bool, str]:
         """
         删除事件
@@ -250,15 +755,71 @@ class GoogleCalendarClient:
             (成功, 消息)
         """
         try:
-            service = self.get_service()
-            await asyncio.to_thread(
-                service.events().delete(calendarId=calendar_id, eventId=event_id).execute
-            )
+            await self._run(self._delete_event, calendar_id, event_id)
+            await self._on_event_deleted(calendar_id, event_id)
             return True, "已删除"
         except Exception as e:
             logger.error(f"❌ Delete event error: {e}")
             return False, str(e)
 
+    async def list_events(self, calendar_id: str, time_min: str, time_max: str) -> List[Dict[str, Any]]:
+        """
+        列出时间范围内的事件（带短 TTL 缓存）
+
+        Args:
+            calendar_id: 日历 ID
+            time_min: 开始时间（ISO 格式）
+            time_max: 结束时间（ISO 格式）
+
+        Returns:
+            事件列表
+        """
+        cached = self.events_cache.get(calendar_id, time_min, time_max)
+        if cached is not None:
+            return cached
+
+        # 查询期间插入 / 删除事件会使缓存失效，此时不写回查询结果
+        generation = self.events_cache.generation(calendar_id)
+        items = await self._run(self._list_events, calendar_id, time_min, time_max)
+        self.events_cache.set(calendar_id, time_min, time_max, items, generation)
+        return items
+
+    async def list_events_multi(
+        self,
+        calendar_ids: List[str],
+        time_min: str,
+        time_max: str
+    ) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[str]]:
+        """
+        并发列出多个日历的事件并按开始时间合并
+
+        Args:
+            calendar_ids: 日历 ID 列表
+            time_min: 开始时间（ISO 格式）
+            time_max: 结束时间（ISO 格式）
+
+        Returns:
+            ([(calendar_id, 事件), ...] 按开始时间排序, 查询失败的日历 ID 列表)
+        """
+        results = await asyncio.gather(
+            *(self.list_events(cid, time_min, time_max) for cid in calendar_ids),
+            return_exceptions=True
+        )
+
+        merged = []
+        failed = []
+        for calendar_id, result in zip(calendar_ids, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ List events error ({calendar_id}): {result}")
+                failed.append(calendar_id)
+                continue
+            merged.extend((calendar_id, event) for event in result)
+
+        # 全天事件按查询范围的时区（time_min 的偏移）排序
+        range_tz = datetime.fromisoformat(time_min).tzinfo or pytz.utc
+        merged.sort(key=lambda item: event_start_key(item[1], range_tz))
+        return merged, failed
+
     async def list_today_events(
         self,
         calendar_id: str,
@@ -275,24 +836,8 @@ class GoogleCalendarClient:
             事件列表
         """
         try:
-            service = self.get_service()
-            tz_obj = pytz.timezone(user_timezone)
-            now = datetime.now(tz_obj)
-
-            start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            end_of_day = start_of_day + timedelta(days=1) - timedelta(seconds=1)
-
-            events_result = await asyncio.to_thread(
-                service.events().list(
-                    calendarId=calendar_id,
-                    timeMin=start_of_day.isoformat(),
-                    timeMax=end_of_day.isoformat(),
-                    singleEvents=True,
-                    orderBy='startTime'
-                ).execute
-            )
-
-            return events_result.get('items', [])
+            start_of_day, end_of_day = day_range(user_timezone)
+            return await self.list_events(calendar_id, start_of_day.isoformat(), end_of_day.isoformat())
 
         except Exception as e:
             logger.error(f"❌ List events error: {e}")
@@ -0,0 +1,4 @@
+"""监控模块"""
+from .tracing import Span, Tracer, tracer
+
+__all__ = ["Span", "Tracer", "tracer"]
@@ -0,0 +1,311 @@
+"""
+轻量级链路追踪
+记录消息处理各阶段耗时（Telegram 下载、AI 解析、冲突检查、插入事件、SQLite 等），
+输出结构化日志，并按阶段 / 模型聚合为直方图和最近窗口分位数，
+供 Prometheus /metrics 与 /perf 命令使用
+"""
+import os
+import math
+import time
+import logging
+import functools
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 直方图桶上限（秒），覆盖 SQLite 毫秒级到 AI 调用数十秒
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+PERCENTILES = (0.5, 0.95, 0.99)
+
+METRIC_PREFIX = "calendar_bot"
+
+# 当前 Span（协程 / 线程上下文内传递，子 Span 继承 trace_id）
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    """一次阶段调用"""
+    stage: str
+    trace_id: str
+    parent: Optional[str] = None
+    model: str = ""
+    status: str = "ok"
+    attrs: Dict[str, object] = field(default_factory=dict)
+    duration: float = 0.0
+
+    def set(self, **attrs) -> None:
+        """补充属性（model 单独作为聚合维度）"""
+        model = attrs.pop("model", None)
+        if model is not None:
+            self.model = model
+        self.attrs.update(attrs)
+
+
+class StageStats:
+    """单个（阶段, 模型）的耗时统计"""
+
+    def __init__(self, buckets: Tuple[float, ...], window: int):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, duration: float, error: bool) -> None:
+        index = bisect_left(self.buckets, duration)
+        if index < len(self.buckets):
+            self.bucket_counts[index] += 1
+        self.count += 1
+        self.total += duration
+        if error:
+            self.errors += 1
+        self.recent.append(duration)
+
+    def percentiles(self) -> Dict[float, float]:
+        """最近窗口内的分位数（最近邻法）"""
+        samples = sorted(self.recent)
+        if not samples:
+            return {q: 0.0 for q in PERCENTILES}
+        return {q: samples[max(0, math.ceil(q * len(samples)) - 1)] for q in PERCENTILES}
+
+
+def _escape_label(value: str) -> str:
+    """Prometheus 标签值转义"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Tracer:
+    """阶段耗时追踪器"""
+
+    def __init__(
+        self,
+        window: int = 500,
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+        log_spans: bool = False
+    ):
+        """
+        初始化追踪器
+
+        Args:
+            window: 每个阶段保留的最近样本数（用于分位数）
+            buckets: 直方图桶上限（秒）
+            log_spans: 是否以 INFO 级别输出每个 Span（否则为 DEBUG）
+        """
+        self.window = window
+        self.buckets = tuple(sorted(buckets))
+        self.log_spans = log_spans
+        self._stats: Dict[Tuple[str, str], StageStats] = {}
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, window: Optional[int] = None, log_spans: Optional[bool] = None) -> None:
+        """
+        启动时按配置调整（已有统计会被清空）
+
+        Args:
+            window: 每个阶段保留的最近样本数
+            log_spans: 是否以 INFO 级别输出每个 Span
+        """
+        if window is not None:
+            self.window = window
+        if log_spans is not None:
+            self.log_spans = log_spans
+        self.reset()
+
+    def reset(self) -> None:
+        """清空统计"""
+        with self._lock:
+            self._stats.clear()
+            self._counters.clear()
+
+    @contextmanager
+    def span(self, stage: str, model: str = "", **attrs) -> Iterator[Span]:
+        """
+        记录一个阶段的耗时（同步 / 异步代码中均可使用 with）
+
+        Args:
+            stage: 阶段名称，如 "llm.text"、"calendar.insert_event"
+            model: 模型名称（AI 调用阶段）
+            **attrs: 附加到日志的属性
+
+        Yields:
+            Span 对象，可通过 set() 补充属性
+        """
+        parent = _current_span.get()
+        span = Span(
+            stage=stage,
+            trace_id=parent.trace_id if parent else os.urandom(4).hex(),
+            parent=parent.stage if parent else None,
+            model=model,
+            attrs=attrs
+        )
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span.status = "error"
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            _current_span.reset(token)
+            self._record(span)
+
+    def traced(self, stage: str) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+        """
+        异步函数装饰器：整个调用记录为一个 Span
+
+        Args:
+            stage: 阶段名称
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.span(stage):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, stage: str, duration: float, model: str = "", error: bool = False) -> None:
+        """
+        直接记录一次耗时（无法用 with 包裹的阶段）
+
+        Args:
+            stage: 阶段名称
+            duration: 耗时（秒）
+            model: 模型名称
+            error: 是否失败
+        """
+        key = (stage, model)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = StageStats(self.buckets, self.window)
+            stats.observe(duration, error)
+
+    def count(self, name: str, value: int = 1) -> None:
+        """
+        累加计数器（如缓存命中、规则解析命中）
+
+        Args:
+            name: 计数器名称
+            value: 增量
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def _record(self, span: Span) -> None:
+        """聚合并输出结构化日志"""
+        self.observe(span.stage, span.duration, span.model, span.status != "ok")
+
+        level = logging.INFO if self.log_spans else logging.DEBUG
+        if not logger.isEnabledFor(level):
+            return
+        fields = [
+            f"trace={span.trace_id}",
+            f"stage={span.stage}",
+            f"duration_ms={span.duration * 1000:.1f}",
+            f"status={span.status}",
+        ]
+        if span.parent:
+            fields.append(f"parent={span.parent}")
+        if span.model:
+            fields.append(f"model={span.model}")
+        fields.extend(f"{k}={v}" for k, v in span.attrs.items())
+        logger.log(level, "⏱️ span " + " ".join(fields))
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        """
+        当前统计快照（按阶段、模型排序）
+
+        Returns:
+            [{"stage", "model", "count", "errors", "p50", "p95", "p99"}, ...]，分位数单位为秒
+        """
+        with self._lock:
+            items = sorted(self._stats.items())
+            rows = []
+            for (stage, model), stats in items:
+                p = stats.percentiles()
+                rows.append({
+                    "stage": stage,
+                    "model": model,
+                    "count": stats.count,
+                    "errors": stats.errors,
+                    "p50": p[0.5],
+                    "p95": p[0.95],
+                    "p99": p[0.99],
+                })
+            return rows
+
+    def counters(self) -> Dict[str, int]:
+        """计数器快照"""
+        with self._lock:
+            return dict(self._counters)
+
+    def render_prometheus(self) -> str:
+        """
+        以 Prometheus 文本格式导出
+
+        - {prefix}_stage_duration_seconds：直方图（可用 histogram_quantile 计算 p50/p95/p99）
+        - {prefix}_stage_duration_recent_seconds：最近窗口分位数（summary）
+        - {prefix}_stage_errors_total：失败次数
+        - {prefix}_events_total：计数器
+        """
+        name = f"{METRIC_PREFIX}_stage_duration_seconds"
+        recent = f"{METRIC_PREFIX}_stage_duration_recent_seconds"
+        errors = f"{METRIC_PREFIX}_stage_errors_total"
+        events = f"{METRIC_PREFIX}_events_total"
+
+        histogram_lines = [
+            f"# HELP {name} Latency of each message pipeline stage.",
+            f"# TYPE {name} histogram",
+        ]
+        summary_lines = [
+            f"# HELP {recent} Latency percentiles over the most recent spans of each stage.",
+            f"# TYPE {recent} summary",
+        ]
+        error_lines = [
+            f"# HELP {errors} Failed spans of each stage.",
+            f"# TYPE {errors} counter",
+        ]
+
+        with self._lock:
+            for (stage, model), stats in sorted(self._stats.items()):
+                labels = f'stage="{_escape_label(stage)}",model="{_escape_label(model)}"'
+
+                cumulative = 0
+                for bound, bucket_count in zip(stats.buckets, stats.bucket_counts):
+                    cumulative += bucket_count
+                    histogram_lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                histogram_lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {stats.count}')
+                histogram_lines.append(f"{name}_sum{{{labels}}} {stats.total}")
+                histogram_lines.append(f"{name}_count{{{labels}}} {stats.count}")
+
+                for q, value in stats.percentiles().items():
+                    summary_lines.append(f'{recent}{{{labels},quantile="{q}"}} {value}')
+                summary_lines.append(f"{recent}_sum{{{labels}}} {sum(stats.recent)}")
+                summary_lines.append(f"{recent}_count{{{labels}}} {len(stats.recent)}")
+
+                error_lines.append(f"{errors}{{{labels}}} {stats.errors}")
+
+            counter_lines = [
+                f"# HELP {events} Pipeline event counters (cache hits, fast-path hits, ...).",
+                f"# TYPE {events} counter",
+            ]
+            for counter, value in sorted(self._counters.items()):
+                counter_lines.append(f'{events}{{name="{_escape_label(counter)}"}} {value}')
+
+        return "\n".join(histogram_lines + summary_lines + error_lines + counter_lines) + "\n"
+
+
+# 进程内共享的追踪器（与 logging 类似，各模块直接导入使用）
+tracer = Tracer()
@@ -0,0 +1,5 @@
+"""内嵌 HTTP 服务模块"""
+from .webhook import WebhookServer
+from .metrics import MetricsServer
+
+__all__ = ["WebhookServer", "MetricsServer"]
@@ -0,0 +1,65 @@
+"""
+Prometheus 指标服务
+导出 Tracer 聚合的各阶段耗时直方图；单独监听一个端口，不暴露在公网的 Webhook 端口上
+"""
+import logging
+from typing import Optional
+
+from aiohttp import web
+
+from ..monitoring import Tracer
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def metrics_handler(tracer: Tracer):
+    """
+    生成 /metrics 请求处理函数
+
+    Args:
+        tracer: 追踪器
+
+    Returns:
+        aiohttp 处理函数
+    """
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(
+            body=tracer.render_prometheus().encode("utf-8"),
+            headers={"Content-Type": CONTENT_TYPE}
+        )
+    return handle
+
+
+class MetricsServer:
+    """独立的 /metrics 服务"""
+
+    def __init__(self, tracer: Tracer, listen: str = "0.0.0.0", port: int = 9100):
+        """
+        初始化服务
+
+        Args:
+            tracer: 追踪器
+            listen: 监听地址
+            port: 监听端口
+        """
+        self.tracer = tracer
+        self.listen = listen
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self) -> None:
+        """开始监听"""
+        app = web.Application()
+        app.router.add_get("/metrics", metrics_handler(self.tracer))
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.listen, self.port).start()
+        logger.info(f"📈 Metrics listening on {self.listen}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        """停止监听"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,144 @@
+"""
+Webhook 服务
+内嵌 aiohttp 服务器接收 Telegram 推送的 Update，校验 secret token 后放入
+Application.update_queue，处理器注册与轮询模式完全相同；收到 SIGTERM 时先停止
+接收新请求，再等待已接收的 Update 处理完毕
+"""
+import asyncio
+import hmac
+import json
+import logging
+import signal
+from typing import Optional
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """Telegram Webhook 服务"""
+
+    def __init__(
+        self,
+        application: Application,
+        webhook_url: str,
+        secret_token: str,
+        url_path: str = "/telegram",
+        listen: str = "0.0.0.0",
+        port: int = 8080
+    ):
+        """
+        初始化服务
+
+        Args:
+            application: 已注册处理器的 Telegram Application
+            webhook_url: 对外可访问的基础 URL（如 https://bot.example.com）
+            secret_token: Telegram 回调时携带的 secret token
+            url_path: 接收 Update 的路径
+            listen: 监听地址
+            port: 监听端口
+        """
+        self.application = application
+        self.webhook_url = webhook_url.rstrip("/") + url_path
+        self.secret_token = secret_token
+        self.url_path = url_path
+        self.listen = listen
+        self.port = port
+
+        self._draining = False
+        self._stop_event: Optional[asyncio.Event] = None
+
+    def build_web_app(self) -> web.Application:
+        """构建 aiohttp 应用（也供本地测试直接使用）"""
+        app = web.Application()
+        app.router.add_post(self.url_path, self._handle_update)
+        app.router.add_get("/healthz", self._handle_health)
+        return app
+
+    async def _handle_update(self, request: web.Request) -> web.Response:
+        """接收 Telegram Update"""
+        # 按字节比较：compare_digest 遇到非 ASCII 的 str 会抛出 TypeError
+        token = request.headers.get(SECRET_HEADER, "").encode("utf-8", "surrogateescape")
+        if not hmac.compare_digest(token, self.secret_token.encode("utf-8")):
+            logger.warning(f"⚠️ Webhook request with invalid secret token from {request.remote}")
+            return web.Response(status=403)
+
+        # 停机过程中让 Telegram 稍后重试（会投递到新实例）
+        if self._draining:
+            return web.Response(status=503)
+
+        try:
+            data = await request.json()
+            # Update 必须是 JSON 对象：[]、null 等会让 de_json 抛出 AttributeError 或返回 None
+            if not isinstance(data, dict):
+                raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+            update = Update.de_json(data, self.application.bot)
+        except (json.JSONDecodeError, ValueError, TypeError, KeyError) as e:
+            logger.warning(f"⚠️ Invalid webhook payload: {e}")
+            return web.Response(status=400)
+
+        await self.application.update_queue.put(update)
+        return web.Response(status=200)
+
+    async def _handle_health(self, request: web.Request) -> web.Response:
+        """健康检查"""
+        return web.Response(status=503 if self._draining else 200, text="draining" if self._draining else "ok")
+
+    def stop(self) -> None:
+        """请求停止（信号处理函数）"""
+        if self._stop_event and not self._stop_event.is_set():
+            logger.info("🛑 Stop signal received, draining...")
+            self._stop_event.set()
+
+    async def run(self) -> None:
+        """
+        运行服务直到收到 SIGTERM / SIGINT
+
+        生命周期与 run_polling 一致：initialize -> post_init -> start ->（服务）
+        -> stop -> post_stop -> shutdown -> post_shutdown
+        """
+        app = self.application
+        loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stop)
+
+        runner = web.AppRunner(self.build_web_app(), access_log=None)
+        await runner.setup()
+
+        await app.initialize()
+        try:
+            if app.post_init:
+                await app.post_init(app)
+
+            await app.start()
+            await web.TCPSite(runner, self.listen, self.port).start()
+            await app.bot.set_webhook(
+                url=self.webhook_url,
+                secret_token=self.secret_token,
+                allowed_updates=Update.ALL_TYPES
+            )
+            logger.info(f"🌐 Webhook listening on {self.listen}:{self.port}{self.url_path}")
+
+            await self._stop_event.wait()
+        finally:
+            # 先拒绝新请求，再处理已入队的 Update
+            self._draining = True
+            await runner.cleanup()
+
+            if app.running:
+                await app.stop()
+            if app.post_stop:
+                await app.post_stop(app)
+            await app.shutdown()
+            if app.post_shutdown:
+                await app.post_shutdown(app)
+
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                loop.remove_signal_handler(sig)
+            logger.info("✅ Webhook server stopped")
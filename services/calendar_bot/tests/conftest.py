@@ -0,0 +1,5 @@
+"""测试配置：把服务根目录加入导入路径（与 python -m benchmarks.X 的运行方式一致）"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
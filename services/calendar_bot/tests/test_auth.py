@@ -0,0 +1,38 @@
+"""授权列表：AUTH_FILE 重新加载"""
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from src.config import load_auth_lists
+from src.handlers import Authorizer
+
+
+def test_auth_file_reload_overrides_environment(tmp_path, caplog):
+    path = tmp_path / "allowlist.env"
+    path.write_text("ALLOWED_USER_IDS=1,2\n", encoding="utf-8")
+    config = SimpleNamespace(auth_file=str(path))
+    authorizer = Authorizer(*load_auth_lists(config), loader=lambda: load_auth_lists(config))
+    assert authorizer.user_ids == {1, 2} and authorizer.chat_ids is None
+
+    path.write_text("ALLOWED_USER_IDS=1,2,3\nALLOWED_CHAT_IDS=-100\n", encoding="utf-8")
+    with caplog.at_level(logging.INFO):
+        assert authorizer.reload()
+
+    assert authorizer.user_ids == {1, 2, 3}
+    assert authorizer.chat_ids == {-100}
+    assert "users 2 → 3" in caplog.text and "chats any → 1" in caplog.text
+
+
+def test_broken_auth_file_keeps_current_list(tmp_path):
+    path = tmp_path / "allowlist.env"
+    path.write_text("ALLOWED_USER_IDS=1\n", encoding="utf-8")
+    config = SimpleNamespace(auth_file=str(path))
+    authorizer = Authorizer(*load_auth_lists(config), loader=lambda: load_auth_lists(config))
+
+    path.write_text("ALLOWED_CHAT_IDS=-100\n", encoding="utf-8")
+    assert not authorizer.reload()
+    assert authorizer.user_ids == {1}
+
+    with pytest.raises(ValueError):
+        load_auth_lists(SimpleNamespace(auth_file=str(tmp_path / "missing.env")))
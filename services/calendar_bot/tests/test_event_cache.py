@@ -0,0 +1,62 @@
+"""事件列表缓存：失效前发起的查询不写回旧结果"""
+import asyncio
+
+from benchmarks.fakes import DEFAULT_FAMILY, InProcessCalendarClient
+from src.core import EventValidator
+from src.integrations.event_cache import EventListCache
+
+CAL = "kimi@example.com"
+RANGE = ("2030-01-02T00:00:00+08:00", "2030-01-03T00:00:00+08:00")
+
+
+def test_set_skips_after_invalidate():
+    cache = EventListCache(ttl=60)
+    generation = cache.generation(CAL)
+    cache.invalidate(CAL)
+    cache.set(CAL, *RANGE, [{"id": "old"}], generation)
+    assert cache.get(CAL, *RANGE) is None
+
+    generation = cache.generation(CAL)
+    cache.invalidate("other@example.com")
+    cache.set(CAL, *RANGE, [{"id": "fresh"}], generation)
+    assert cache.get(CAL, *RANGE) == [{"id": "fresh"}]
+
+    generation = cache.generation(CAL)
+    cache.invalidate()
+    cache.set(CAL, *RANGE, [{"id": "old"}], generation)
+    assert cache.get(CAL, *RANGE) is None
+
+
+def test_list_events_does_not_cache_stale_result():
+    calendar = InProcessCalendarClient(
+        EventValidator(valid_categories={m["name"] for m in DEFAULT_FAMILY} | {"Family"}),
+        latency=0,
+        events_cache_ttl=60
+    )
+    run = calendar._run
+
+    async def racing_run(func, *args):
+        result = await run(func, *args)
+        if func.__name__ == "_list_events":
+            # 查询返回前插入了新事件
+            calendar.store.insert(CAL, {
+                "summary": "New",
+                "start": {"dateTime": "2030-01-02T15:00:00+08:00"},
+                "end": {"dateTime": "2030-01-02T16:00:00+08:00"},
+            })
+            calendar.events_cache.invalidate(CAL)
+        return result
+
+    async def scenario():
+        calendar._run = racing_run
+        stale = await calendar.list_events(CAL, *RANGE)
+        calendar._run = run
+        return stale, await calendar.list_events(CAL, *RANGE)
+
+    try:
+        stale, fresh = asyncio.run(scenario())
+    finally:
+        calendar.close()
+
+    assert stale == []
+    assert [e["summary"] for e in fresh] == ["New"]
@@ -0,0 +1,57 @@
+"""FastPathParser：语料回归，以及取消 / 否定类消息必须交给 AI"""
+import json
+import asyncio
+from datetime import datetime
+
+import pytest
+import pytz
+
+from benchmarks.bench_fast_parser import COMPARED_FIELDS, DEFAULT_CORPUS
+from src.core import EventParser, FastPathParser
+from src.core.fast_parser import FAST_PATH_MODEL
+
+CORPUS = json.loads(DEFAULT_CORPUS.read_text(encoding="utf-8"))
+TZ = CORPUS["timezone"]
+NOW = pytz.timezone(TZ).localize(datetime.strptime(CORPUS["now"], "%Y-%m-%d %H:%M:%S"))
+
+
+def parse(text, explicit=False):
+    return FastPathParser().parse(text, TZ, CORPUS["family_members"], explicit, now=NOW)
+
+
+@pytest.mark.parametrize("case", CORPUS["cases"], ids=lambda case: case["text"])
+def test_corpus(case):
+    result = parse(case["text"], case.get("explicit", False))
+    if case["expected"] is None:
+        assert result is None
+    else:
+        assert {f: result.get(f) for f in COMPARED_FIELDS} == {f: case["expected"][f] for f in COMPARED_FIELDS}
+
+
+@pytest.mark.parametrize("text", [
+    "明天下午3点取消开会",
+    "明天下午3点 不要开会",
+    "明天下午3点不开会",
+    "明天没空",
+    "tomorrow 3pm cancel dentist",
+    "postpone dentist tomorrow 3pm",
+    "don't book gym tomorrow 6pm",
+])
+def test_cancel_and_negation_go_to_llm(text):
+    assert parse(text) is None
+
+
+def test_go_prefix_is_kept_in_summary():
+    assert parse("明天下午3点去机场接人")["summary"] == "去机场接人"
+
+
+def test_fast_path_events_are_labelled():
+    parser = EventParser(None, "llm/model", fast_parser=FastPathParser())
+
+    async def run():
+        single = await parser.parse_text_message("明天下午3点开会", TZ, CORPUS["family_members"])
+        batch = await parser.parse_text_messages(["明天下午3点开会", "后天上午10点看牙医"], TZ, CORPUS["family_members"])
+        return single, batch
+
+    (_, single), (_, batch) = asyncio.run(run())
+    assert [e["_model"] for e in single + batch] == [FAST_PATH_MODEL] * 3
@@ -0,0 +1,102 @@
+"""FreeBusyIndex 就绪状态随同步新鲜度过期"""
+import asyncio
+from bisect import bisect_left
+
+from src.integrations import freebusy_index
+from src.integrations.freebusy_index import FreeBusyIndex, IntervalIndex
+
+
+class FakeCache:
+    def invalidate(self, calendar_id=None):
+        pass
+
+
+class FakeCalendar:
+    def __init__(self):
+        self.events_cache = FakeCache()
+        self.fail = False
+
+    async def sync_events(self, calendar_id, sync_token, time_min):
+        if self.fail:
+            raise ConnectionError("offline")
+        return [], "token"
+
+
+class FakeDB:
+    async def save_calendar_index(self, *args, **kwargs):
+        pass
+
+
+def test_index_goes_stale_when_sync_keeps_failing(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(freebusy_index.time, "monotonic", lambda: now[0])
+    calendar = FakeCalendar()
+    index = FreeBusyIndex(calendar, FakeDB(), {"cal": "Me"}, sync_interval=60)
+
+    assert not index.is_ready("cal")
+    asyncio.run(index.sync("cal"))
+    assert index.is_ready("cal")
+
+    calendar.fail = True
+    now[0] += 120
+    asyncio.run(index.sync("cal"))
+    assert index.is_ready("cal")
+
+    now[0] += 61
+    asyncio.run(index.sync("cal"))
+    assert not index.is_ready("cal")
+
+    calendar.fail = False
+    asyncio.run(index.sync("cal"))
+    assert index.is_ready("cal")
+
+
+def test_removing_long_event_shrinks_scan_window():
+    index = IntervalIndex()
+    day = 86400.0
+    for n in range(100):
+        index.upsert(f"e{n}", n * day, n * day + 3600, f"Event {n}")
+    index.upsert("trip", 0.0, 60 * day, "Trip")
+    assert [e for e, _ in index.overlaps(50 * day, 50 * day + 1800)] == ["trip", "e50"]
+
+    index.remove("trip")
+    assert index._durations[-1] == 3600
+    assert [e for e, _ in index.overlaps(50 * day, 50 * day + 1800)] == ["e50"]
+    # 扫描范围只覆盖最长时长（1 小时）内开始的区间
+    assert bisect_left(index._starts, (50 * day - 3600,)) == 50
+
+    index.upsert("e50", 50 * day, 50 * day + 7200, "Longer")
+    index.remove("e50")
+    assert index._durations[-1] == 3600 and len(index._durations) == len(index) == 99
+
+
+def test_insert_during_full_resync_is_kept():
+    calendar = FakeCalendar()
+    index = FreeBusyIndex(calendar, FakeDB(), {"cal": "Me"})
+    event = {
+        "id": "new",
+        "summary": "Dentist",
+        "start": {"dateTime": "2030-01-02T15:00:00+08:00"},
+        "end": {"dateTime": "2030-01-02T16:00:00+08:00"},
+    }
+
+    async def run():
+        fetched = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_sync_events(calendar_id, sync_token, time_min):
+            # 全量同步拿到的是插入前的结果
+            fetched.set()
+            await release.wait()
+            return [], "token"
+
+        calendar.sync_events = slow_sync_events
+        sync = asyncio.create_task(index.sync("cal"))
+        await fetched.wait()
+        insert = asyncio.create_task(index.record_insert("cal", event))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(sync, insert)
+
+    asyncio.run(run())
+    assert len(index._indexes["cal"]) == 1
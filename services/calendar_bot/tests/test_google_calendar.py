@@ -0,0 +1,46 @@
+"""GoogleCalendarClient 批量创建：分批失败只影响该批"""
+import asyncio
+
+from benchmarks import fakes
+from benchmarks.fakes import DEFAULT_FAMILY, InProcessCalendarClient
+from src.core import EventValidator
+from src.integrations.google_calendar import BATCH_MAX_SIZE
+
+CAL = "kimi@example.com"
+
+
+def test_failed_chunk_keeps_earlier_results(monkeypatch):
+    execute = fakes.FakeBatchRequest.execute
+
+    def flaky_execute(batch):
+        if int(batch.requests[0][0]) >= BATCH_MAX_SIZE:
+            raise ConnectionError("batch dropped")
+        execute(batch)
+
+    monkeypatch.setattr(fakes.FakeBatchRequest, "execute", flaky_execute)
+    calendar = InProcessCalendarClient(
+        EventValidator(valid_categories={m["name"] for m in DEFAULT_FAMILY} | {"Family"}),
+        latency=0,
+        events_cache_ttl=0
+    )
+    items = [
+        ({
+            "is_event": True,
+            "summary": f"Event {n}",
+            "start_time": f"2030-01-02 {n % 24:02d}:00:00",
+            "end_time": f"2030-01-02 {n % 24:02d}:30:00",
+            "timezone": "Asia/Singapore",
+            "category": "Kimi",
+        }, CAL)
+        for n in range(BATCH_MAX_SIZE + 10)
+    ]
+
+    try:
+        results = asyncio.run(calendar.create_events(items, "Asia/Singapore", "Kimi", conflict_mode="off"))
+    finally:
+        calendar.close()
+
+    assert all(r[0] for r in results[:BATCH_MAX_SIZE])
+    assert not any(r[0] for r in results[BATCH_MAX_SIZE:])
+    assert all("batch dropped" in r[1] for r in results[BATCH_MAX_SIZE:])
+    assert len({r[6] for r in results[:BATCH_MAX_SIZE]}) == BATCH_MAX_SIZE
@@ -0,0 +1,55 @@
+"""MessageHandlers：多事件消息的延迟冲突检查"""
+import asyncio
+
+from benchmarks.fakes import DEFAULT_FAMILY, FakeConfig, InProcessCalendarClient, make_update
+from src.core import EventValidator
+from src.database import AsyncDatabaseRepository
+from src.handlers import MessageHandlers
+
+TZ = "Asia/Singapore"
+
+
+def event(summary, start, end):
+    return {
+        "is_event": True,
+        "summary": summary,
+        "start_time": f"2030-01-02 {start}:00",
+        "end_time": f"2030-01-02 {end}:00",
+        "timezone": TZ,
+        "category": "Kimi",
+    }
+
+
+def test_deferred_mode_checks_conflicts_for_batches(tmp_path):
+    config = FakeConfig()
+    config.conflict_check_mode = "deferred"
+    calendar = InProcessCalendarClient(
+        EventValidator(valid_categories={m["name"] for m in DEFAULT_FAMILY} | {"Family"}),
+        latency=0,
+        events_cache_ttl=0
+    )
+    calendar.store.insert(config.get_calendar_id("Kimi"), {
+        "summary": "Existing",
+        "start": {"dateTime": "2030-01-02T15:00:00+08:00"},
+        "end": {"dateTime": "2030-01-02T16:00:00+08:00"},
+    })
+    db = AsyncDatabaseRepository(str(tmp_path / "bot.db"))
+    handlers = MessageHandlers(config=config, db=db, event_parser=None, google_calendar=calendar)
+    handlers.event_parser = type("Parser", (), {"model_name": "fake/model"})()
+
+    update = make_update(1, "two events")
+    try:
+        asyncio.run(handlers._create_and_send_events(
+            update,
+            [event("A", "15:30", "16:30"), event("B", "16:00", "17:00")],
+            TZ
+        ))
+    finally:
+        calendar.close()
+        db.close()
+
+    text = update.message.replies[-1].text
+    assert "已添加 2 个事件" in text
+    # A 与已有事件冲突；同一批次的 A / B 之间不算冲突
+    assert text.count("⚠️ 冲突: Existing") == 1
+    assert "冲突: A" not in text and "冲突: B" not in text
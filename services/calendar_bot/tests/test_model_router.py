@@ -0,0 +1,30 @@
+"""ModelRouter 评分与排序"""
+from src.core.model_router import ModelRouter
+
+
+def _warm(router, model, latency, calls=5):
+    for _ in range(calls):
+        router.record("text", model, latency, 100)
+
+
+def test_mutual_escalation_does_not_recurse():
+    router = ModelRouter({"text": ["a", "b"], "escalation": ["b", "a"]}, explore_rate=0)
+    _warm(router, "a", 0.2)
+    _warm(router, "b", 0.1)
+    router.record_escalation("a")
+    router.record_escalation("b")
+
+    assert router.models_for("text") == ["b", "a"]
+    # a：0.2 + 1/5 × b 的基础评分 0.1
+    assert abs(router.score("a") - 0.22) < 1e-9
+
+
+def test_escalation_rate_penalises_model():
+    router = ModelRouter({"text": ["cheap", "mid"], "escalation": ["strong"]}, explore_rate=0)
+    _warm(router, "cheap", 0.1)
+    _warm(router, "mid", 0.3)
+    _warm(router, "strong", 2.0)
+    for _ in range(3):
+        router.record_escalation("cheap")
+
+    assert router.models_for("text") == ["mid", "cheap"]
@@ -0,0 +1,79 @@
+"""LLM 响应缓存：按路由缓存并保留实际使用的模型"""
+import asyncio
+import sqlite3
+
+from src.core.event_parser import EventParser
+from src.core.llm_resilience import ResilientLLM
+from src.core.response_cache import LLMResponseCache
+
+ANSWER = '{"is_event": true, "events": [{"summary": "Dentist", "start_time": "2026-10-18T15:00:00", "end_time": "2026-10-18T16:00:00"}]}'
+
+
+def test_cache_hit_keeps_fallback_model(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.db"))
+    calls = []
+
+    async def complete(messages, model, on_text):
+        calls.append(model)
+        if model == "primary":
+            raise asyncio.TimeoutError()
+        return ANSWER
+
+    parser = EventParser(
+        None,
+        "primary",
+        response_cache=cache,
+        llm=ResilientLLM(["primary", "backup"], max_attempts=1)
+    )
+    parser._complete_text = complete
+
+    async def run():
+        first = await parser.parse_text_message("dentist tomorrow 3pm", "UTC", [])
+        second = await parser.parse_text_message("dentist tomorrow 3pm", "UTC", [])
+        return first, second
+
+    try:
+        (_, first), (msg_type, second) = asyncio.run(run())
+    finally:
+        cache.close()
+
+    assert calls == ["primary", "backup"]
+    assert msg_type == "EVENT"
+    assert first[0]["_model"] == second[0]["_model"] == "backup"
+
+
+def test_cache_key_covers_route_models(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.db"))
+    a = EventParser(None, "m1", response_cache=cache, llm=ResilientLLM(["m1"]))
+    b = EventParser(None, "m1", response_cache=cache, llm=ResilientLLM(["m1", "m2"]))
+    cache.close()
+
+    assert a._route_models("text") == ["m1"]
+    assert b._route_models("text") == ["m1", "m2"]
+
+
+def test_old_cache_table_is_migrated(tmp_path):
+    path = str(tmp_path / "cache.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE llm_response_cache ("
+        " key TEXT PRIMARY KEY, content TEXT NOT NULL,"
+        " created_at REAL NOT NULL, last_used_at REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO llm_response_cache VALUES ('old', 'hello', 1e12, 1e12)")
+    conn.commit()
+    conn.close()
+
+    cache = LLMResponseCache(path)
+
+    async def run():
+        await cache.set("new", "world", "m2")
+        return await cache.get("old"), await cache.get("new")
+
+    try:
+        old, new = asyncio.run(run())
+    finally:
+        cache.close()
+
+    assert old == ("hello", None)
+    assert new == ("world", "m2")
@@ -0,0 +1,51 @@
+"""用户时区缓存：未命中回填不覆盖并发写入"""
+import asyncio
+
+from src.database import AsyncDatabaseRepository, UserTimezoneCache
+
+
+def test_fill_skips_after_concurrent_write():
+    cache = UserTimezoneCache()
+    version = cache.version
+    cache.set(1, "Europe/Paris")
+
+    assert not cache.fill(1, "Asia/Tokyo", version)
+    assert cache.get(1) == "Europe/Paris"
+
+
+def test_fill_skips_after_invalidate():
+    cache = UserTimezoneCache()
+    version = cache.version
+    cache.invalidate(2)
+
+    assert not cache.fill(1, "Asia/Tokyo", version)
+    assert cache.fill(1, "Asia/Tokyo", cache.version)
+    assert cache.get(1) == "Asia/Tokyo"
+
+
+def test_stale_read_does_not_overwrite_new_timezone(tmp_path):
+    db = AsyncDatabaseRepository(str(tmp_path / "bot.db"))
+    read = db._read
+
+    async def run():
+        await db.set_user_timezone(1, "Asia/Tokyo")
+        db.timezone_cache.invalidate(1)
+
+        async def racing_read(func):
+            row = await read(func)
+            # 读库完成、回填之前，用户修改了时区
+            await db.set_user_timezone(1, "Europe/Paris")
+            return row
+
+        db._read = racing_read
+        stale = await db.get_user_timezone(1)
+        db._read = read
+        return stale, await db.get_user_timezone(1)
+
+    try:
+        stale, current = asyncio.run(run())
+    finally:
+        db.close()
+
+    assert stale == "Asia/Tokyo"
+    assert current == "Europe/Paris"
@@ -0,0 +1,32 @@
+"""UserWorkQueue：空闲用户立即处理，处理期间的后续消息合并"""
+import asyncio
+
+from src.handlers.user_queue import UserWorkQueue
+
+
+def test_idle_user_is_not_debounced_and_follow_ups_coalesce():
+    batches = []
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        release = asyncio.Event()
+
+        async def process(user_id, items):
+            batches.append((items, loop.time() - started))
+            if items == ["first"]:
+                await release.wait()
+
+        queue = UserWorkQueue(process, debounce=0.05, max_wait=1.0)
+        queue.submit(1, "first")
+        await asyncio.sleep(0.01)
+        assert queue.submit(1, "second") == 1
+        assert queue.submit(1, "third") == 2
+        release.set()
+        await queue.close(timeout=1.0)
+
+    asyncio.run(run())
+
+    assert [items for items, _ in batches] == [["first"], ["second", "third"]]
+    # 第一条消息没有等待防抖窗口
+    assert batches[0][1] < 0.05
@@ -0,0 +1,45 @@
+"""WebhookServer secret token 校验与路由"""
+import asyncio
+
+import pytest
+from aiohttp.test_utils import make_mocked_request
+
+from src.server.webhook import SECRET_HEADER, WebhookServer
+
+
+def make_server():
+    return WebhookServer(None, "https://bot.example.com", "s3cret_token")
+
+
+def status_for(token):
+    server = make_server()
+    request = make_mocked_request("POST", "/telegram", headers={SECRET_HEADER: token})
+    return asyncio.run(server._handle_update(request)).status
+
+
+def test_wrong_token_is_rejected():
+    assert status_for("wrong") == 403
+
+
+def test_non_ascii_token_is_rejected():
+    assert status_for("s3cret_tökén") == 403
+
+
+def test_webhook_app_does_not_serve_metrics():
+    app = make_server().build_web_app()
+    paths = {resource.canonical for resource in app.router.resources()}
+    assert paths == {"/telegram", "/healthz"}
+
+
+@pytest.mark.parametrize("body", [b"[]", b"[1]", b"null", b"42", b"not json"])
+def test_non_object_payload_is_rejected(body):
+    server = make_server()
+    request = make_mocked_request(
+        "POST", "/telegram", headers={SECRET_HEADER: "s3cret_token", "Content-Type": "application/json"}
+    )
+
+    async def read_body():
+        return body
+
+    request.read = read_body
+    assert asyncio.run(server._handle_update(request)).status == 400
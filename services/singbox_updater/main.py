@@ -50,8 +50,15 @@ class SingboxAutoUpdater:
         self._log_config_sources()
         
         # 初始化组件
-        self.checker = SubscriptionChecker(self.subscription_url, self.history_dir)
-        self.updater = SingboxUpdater()
+        self.checker = SubscriptionChecker(
+            self.subscription_url,
+            self.history_dir,
+            timeout=self.config.get('download_timeout_seconds', 60),
+            max_download_bytes=self.config.get('max_download_mb', 50) * 1024 * 1024,
+            max_config_bytes=self.config.get('max_config_mb', 32) * 1024 * 1024,
+            keep_versions=self.config.get('history_keep_versions', 30)
+        )
+        self.updater = SingboxUpdater(self.config.get('region_rules'))
         self.generator = SingboxAirGenerator()
         
         # 初始化Telegram通知器（如果配置了）
@@ -153,15 +160,17 @@ class SingboxAutoUpdater:
             has_update, new_data, version_name = self.checker.check_for_updates()
             
             if not has_update:
-                self.logger.info("✅ No updates needed")
+                if self.checker.not_modified:
+                    self.logger.info("✅ Subscription not modified, skipping update")
+                else:
+                    self.logger.info("✅ No updates needed")
                 return
             
             self.logger.info(f"🆕 New version detected: {version_name}")
             
-            # 获取变更摘要
-            _, latest_data = self.checker.get_latest_version()
-            if latest_data:
-                changes = self.checker.get_changes_summary(latest_data, new_data)
+            # 获取变更摘要（检查更新时已按摘要比较，首次运行为 None）
+            changes = self.checker.last_changes
+            if changes:
                 self.logger.info(f"📊 Changes summary:")
                 self.logger.info(f"   Added: {len(changes['added'])} servers")
                 self.logger.info(f"   Removed: {len(changes['removed'])} servers")
@@ -193,6 +202,9 @@ class SingboxAutoUpdater:
             self.logger.info(f"   Air V5.9: {air_files['air_v59'].name}")
             self.logger.info(f"   Air V7.8: {air_files['air_v78'].name}")
             
+            # 新配置已生成：标记版本已生成并保存 ETag / Last-Modified，之后订阅未变化时服务器直接返回 304
+            self.checker.commit_update(version_name)
+            
             # 如果配置了Telegram通知，发送通知和文件
             if self.telegram_notifier:
                 self.logger.info("📱 Sending Telegram notification...")
@@ -205,7 +217,7 @@ class SingboxAutoUpdater:
                 
                 success = self.telegram_notifier.send_update_notification(
                     version_name,
-                    changes if latest_data else None,
+                    changes,
                     config_files
                 )
                 
@@ -216,7 +228,7 @@ class SingboxAutoUpdater:
             
             # 旧版通知（兼容）
             elif self.config.get('enable_notifications', False):
-                self._send_notification(version_name, changes if latest_data else None)
+                self._send_notification(version_name, changes)
             
         except Exception as e:
             self.logger.error(f"❌ Update failed: {e}", exc_info=True)
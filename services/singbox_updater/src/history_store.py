@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Subscription History Store
+订阅历史版本存储（SQLite 索引 + gzip 压缩内容 + 保留策略）
+"""
+
+import gzip
+import json
+import sqlite3
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+
+class HistoryStore:
+    """订阅历史存储"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS versions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            created_at TEXT NOT NULL,
+            root TEXT NOT NULL,
+            server_count INTEGER NOT NULL,
+            digests BLOB NOT NULL,
+            payload BLOB NOT NULL,
+            generated INTEGER NOT NULL DEFAULT 1
+        )
+    """
+
+    def __init__(self, db_path: Path, keep_versions: int = 30):
+        """
+        Args:
+            db_path: SQLite 文件路径
+            keep_versions: 保留的版本数（0 表示不清理）
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.keep_versions = keep_versions
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute(self.SCHEMA)
+        # 旧版数据库没有 generated 列（已有版本视为已生成配置）
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(versions)")}
+        if 'generated' not in columns:
+            self.conn.execute("ALTER TABLE versions ADD COLUMN generated INTEGER NOT NULL DEFAULT 1")
+        self.conn.commit()
+
+    @staticmethod
+    def _pack(obj) -> bytes:
+        return gzip.compress(json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+    @staticmethod
+    def _unpack(blob: bytes):
+        return json.loads(gzip.decompress(blob))
+
+    def count(self) -> int:
+        """已保存的版本数"""
+        return self.conn.execute("SELECT COUNT(*) FROM versions").fetchone()[0]
+
+    def latest(self) -> Tuple[Optional[str], Optional[Dict]]:
+        """
+        获取最新版本的索引信息（不解压订阅内容）
+
+        Returns:
+            (版本名称, {"root", "servers", "server_count", "created_at", "generated"})；没有版本时为 (None, None)
+        """
+        row = self.conn.execute(
+            "SELECT name, created_at, root, server_count, digests, generated "
+            "FROM versions ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None, None
+        name, created_at, root, server_count, digests, generated = row
+        return name, {
+            'root': root,
+            'servers': self._unpack(digests),
+            'server_count': server_count,
+            'created_at': created_at,
+            'generated': bool(generated)
+        }
+
+    def load(self, name: str) -> Optional[Dict]:
+        """读取指定版本的完整订阅"""
+        row = self.conn.execute("SELECT payload FROM versions WHERE name = ?", (name,)).fetchone()
+        return self._unpack(row[0]) if row else None
+
+    def add(
+        self,
+        data: Dict,
+        digests: Dict[str, str],
+        root: str,
+        created_at: Optional[datetime] = None,
+        generated: bool = True
+    ) -> str:
+        """
+        保存新版本，并按保留策略清理旧版本
+
+        Args:
+            data: 完整订阅
+            digests: 各服务器摘要 {tag: digest}
+            root: Merkle 根
+            created_at: 版本时间（默认当前时间）
+            generated: 是否已根据该版本生成配置（False 时需在生成后调用 mark_generated）
+
+        Returns:
+            版本名称
+        """
+        created_at = created_at or datetime.now()
+        base_name = f"subscription_{created_at.strftime('%Y%m%d_%H%M%S')}"
+        name, n = base_name, 1
+        while self.conn.execute("SELECT 1 FROM versions WHERE name = ?", (name,)).fetchone():
+            n += 1
+            name = f"{base_name}_{n}"
+
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO versions (name, created_at, root, server_count, digests, payload, generated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    name,
+                    created_at.isoformat(timespec='seconds'),
+                    root,
+                    len(data.get('outbounds', [])),
+                    self._pack(digests),
+                    self._pack(data),
+                    int(generated)
+                )
+            )
+        self.compact()
+        return name
+
+    def mark_generated(self, name: str):
+        """标记该版本的配置已生成"""
+        with self.conn:
+            self.conn.execute("UPDATE versions SET generated = 1 WHERE name = ?", (name,))
+
+    def compact(self) -> int:
+        """
+        按保留策略删除旧版本并回收空间
+
+        Returns:
+            删除的版本数
+        """
+        if self.keep_versions <= 0:
+            return 0
+        with self.conn:
+            deleted = self.conn.execute(
+                "DELETE FROM versions WHERE id NOT IN "
+                "(SELECT id FROM versions ORDER BY id DESC LIMIT ?)",
+                (self.keep_versions,)
+            ).rowcount
+        if deleted:
+            self.conn.execute("VACUUM")
+            print(f"🧹 Removed {deleted} old subscription version(s)")
+        return deleted
+
+    def close(self):
+        """关闭数据库"""
+        self.conn.close()
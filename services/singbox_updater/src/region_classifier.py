@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Region Classifier
+按规则把订阅服务器分到地区组
+
+规则来自 config/settings.json 的 region_rules，按顺序排列优先级，每条规则可包含：
+- emoji: tag 中包含的字符串（字符串或列表）
+- regex: 匹配 tag 的正则表达式
+- types: 协议类型（outbound 的 type）
+- ports: 端口（整数或 "起始-结束" 范围）
+- groups: 命中后加入的服务器组
+
+所有规则编译成一个带命名分组的组合正则：每条规则是一个 (?=.*?(?P<_ruleN>...)) 分支，
+按规则顺序尝试，一次 match 调用就通过 lastgroup 得到第一条命中的规则；
+协议 / 端口条件不满足时，用从下一条规则开始的组合正则继续匹配（按需编译并复用）
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+# 分类缓存中"尚未分类"的标记
+_MISSING = object()
+
+# 与旧版硬编码映射一致的默认规则
+DEFAULT_REGION_RULES = [
+    {'name': 'HK', 'emoji': '🇭🇰', 'groups': ['HKonly', 'AllServer']},
+    {'name': 'TW', 'emoji': '🇨🇳', 'groups': ['HKonly', 'AllServer']},
+    {'name': 'SG', 'emoji': '🇸🇬', 'groups': ['SGonly', 'AllServer']},
+    {'name': 'JP', 'emoji': '🇯🇵', 'groups': ['AllServer']},
+    {'name': 'US', 'emoji': '🇺🇸', 'groups': ['USonly', 'AllServer']},
+]
+
+
+class RegionRule:
+    """编译后的单条规则"""
+
+    def __init__(self, index: int, spec: Dict):
+        self.index = index
+        self.name = spec.get('name') or f"rule{index}"
+        self.groups = list(spec.get('groups') or [])
+        if not self.groups:
+            raise ValueError(f"region rule '{self.name}' has no groups")
+
+        emoji = spec.get('emoji') or []
+        if isinstance(emoji, str):
+            emoji = [emoji]
+        patterns = [re.escape(e) for e in emoji]
+        if spec.get('regex'):
+            re.compile(spec['regex'])  # 提前报告无效的正则
+            patterns.append(f"(?:{spec['regex']})")
+        self.pattern = '|'.join(patterns) or None
+        self.label = emoji[0] if emoji else self.name
+
+        self.types = set(spec.get('types') or []) or None
+        self.ports = self._parse_ports(spec.get('ports')) or None
+        if self.pattern is None and self.types is None and self.ports is None:
+            raise ValueError(f"region rule '{self.name}' needs emoji, regex, types or ports")
+
+    @staticmethod
+    def _parse_ports(ports) -> List[Tuple[int, int]]:
+        ranges = []
+        for port in ports or []:
+            if isinstance(port, str) and '-' in port:
+                low, high = port.split('-', 1)
+                ranges.append((int(low), int(high)))
+            else:
+                ranges.append((int(port), int(port)))
+        return ranges
+
+    def accepts(self, server: Dict) -> bool:
+        """协议 / 端口条件是否满足"""
+        if self.types is not None and server.get('type') not in self.types:
+            return False
+        if self.ports is not None:
+            port = server.get('server_port')
+            if not isinstance(port, int) or not any(low <= port <= high for low, high in self.ports):
+                return False
+        return True
+
+
+class RegionClassifier:
+    """地区分类引擎"""
+
+    def __init__(self, rules: Optional[List[Dict]] = None):
+        """
+        Args:
+            rules: 规则列表（默认使用 DEFAULT_REGION_RULES）
+        """
+        self.rules = [RegionRule(i, spec) for i, spec in enumerate(rules or DEFAULT_REGION_RULES)]
+
+        # 所有规则涉及的服务器组（按首次出现顺序）
+        self.groups = list(dict.fromkeys(g for rule in self.rules for g in rule.groups))
+
+        # 组合正则：{起始规则编号: 从该规则开始的组合正则}，0 号在初始化时编译，其余按需编译
+        self._combined: Dict[int, re.Pattern] = {}
+        self._combined_from(0)
+
+        # 有协议 / 端口条件时，分类结果还取决于 type 和端口
+        self._uses_predicates = any(r.types is not None or r.ports is not None for r in self.rules)
+
+        # 分类缓存（跨多次运行保留，每次运行只保留当前订阅中的服务器）
+        self._cache: Dict[object, Optional[int]] = {}
+
+    def _cache_key(self, server: Dict):
+        tag = server.get('tag', '')
+        if self._uses_predicates:
+            return tag, server.get('type'), server.get('server_port')
+        return tag
+
+    def _combined_from(self, start: int) -> re.Pattern:
+        """编译从第 start 条规则开始的组合正则（没有 emoji / regex 的规则总是命中）"""
+        combined = self._combined.get(start)
+        if combined is None:
+            branches = [
+                f"(?=.*?(?P<_rule{rule.index}>{rule.pattern}))" if rule.pattern else f"(?P<_rule{rule.index}>)"
+                for rule in self.rules[start:]
+            ]
+            combined = self._combined[start] = re.compile('|'.join(branches), re.DOTALL)
+        return combined
+
+    def _match(self, server: Dict) -> Optional[int]:
+        """返回命中的第一条规则（按规则顺序，需同时满足协议 / 端口条件）的编号"""
+        tag = server.get('tag', '')
+        start = 0
+        while start < len(self.rules):
+            m = self._combined_from(start).match(tag)
+            if m is None:
+                return None
+            rule = self.rules[int(m.lastgroup[len('_rule'):])]
+            if rule.accepts(server):
+                return rule.index
+            start = rule.index + 1
+        return None
+
+    def classify(self, server: Dict) -> Optional[RegionRule]:
+        """
+        分类单个服务器
+
+        Returns:
+            命中的规则，未命中时为 None
+        """
+        key = self._cache_key(server)
+        index = self._cache.get(key, _MISSING)
+        if index is _MISSING:
+            index = self._cache[key] = self._match(server)
+        return self.rules[index] if index is not None else None
+
+    def classify_all(self, outbounds: List[Dict]) -> Tuple[Dict[str, List[Dict]], Dict[str, int]]:
+        """
+        分类所有服务器
+
+        Returns:
+            ({服务器组: [服务器]}, {规则名称: 服务器数})
+        """
+        servers_by_group = {group: [] for group in self.groups}
+        counts = {rule.name: 0 for rule in self.rules}
+        previous, self._cache = self._cache, {}
+
+        for server in outbounds:
+            key = self._cache_key(server)
+            index = previous.get(key, _MISSING)
+            if index is _MISSING:
+                index = self._match(server)
+            self._cache[key] = index
+            if index is None:
+                continue
+            rule = self.rules[index]
+            for group in rule.groups:
+                servers_by_group[group].append(server)
+            counts[rule.name] += 1
+
+        return servers_by_group, counts
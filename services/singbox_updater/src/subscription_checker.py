@@ -5,7 +5,9 @@ Subscription Checker
 """
 
 import json
+import time
 import hashlib
+import urllib.error
 import urllib.request
 import zipfile
 import tempfile
@@ -13,30 +15,141 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, Optional, Tuple
 
+from .history_store import HistoryStore
+
 
 class SubscriptionChecker:
     """订阅检查器"""
     
-    def __init__(self, subscription_url: str, history_dir: Path):
+    # 条件请求校验信息（ETag / Last-Modified）的保存文件
+    VALIDATORS_FILE = 'http_validators.json'
+    # 历史版本存储
+    HISTORY_DB = 'history.db'
+    # 下载时每次读取的块大小；超过 SPOOL_SIZE 的下载内容才会落盘（自动删除的临时文件）
+    CHUNK_SIZE = 64 * 1024
+    SPOOL_SIZE = 8 * 1024 * 1024
+    
+    def __init__(
+        self,
+        subscription_url: str,
+        history_dir: Path,
+        timeout: float = 60,
+        max_download_bytes: int = 50 * 1024 * 1024,
+        max_config_bytes: int = 32 * 1024 * 1024,
+        keep_versions: int = 30
+    ):
+        """
+        Args:
+            subscription_url: 订阅地址
+            history_dir: 历史版本目录
+            timeout: 下载和解压的总时限（秒，同时作为单次网络读取的超时）
+            max_download_bytes: zip 文件大小上限
+            max_config_bytes: 解压后配置文件大小上限（防止压缩炸弹；数千个服务器的配置也只有几 MB）
+            keep_versions: 保留的历史版本数（0 表示不清理）
+        """
         self.subscription_url = subscription_url
         self.history_dir = Path(history_dir)
         self.history_dir.mkdir(parents=True, exist_ok=True)
+        self.timeout = timeout
+        self.max_download_bytes = max_download_bytes
+        self.max_config_bytes = max_config_bytes
+        self.validators_path = self.history_dir / self.VALIDATORS_FILE
+        self.store = HistoryStore(self.history_dir / self.HISTORY_DB, keep_versions=keep_versions)
+        self._import_legacy_files()
+        # 最近一次下载是否返回 304
+        self.not_modified = False
+        # 最近一次检查发现的变更摘要（首次运行或无变化时为 None）
+        self.last_changes: Optional[Dict] = None
+        # 本次下载得到、尚未确认的校验信息（处理成功后才保存）
+        self._pending_validators: Optional[Dict] = None
+    
+    def _url_fingerprint(self) -> str:
+        """订阅地址指纹（地址变更后旧的校验信息失效，文件中也不保存地址本身）"""
+        return hashlib.sha256(self.subscription_url.encode()).hexdigest()[:16]
+    
+    def load_validators(self) -> Dict:
+        """读取上次保存的 ETag / Last-Modified"""
+        try:
+            with open(self.validators_path, 'r', encoding='utf-8') as f:
+                validators = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if validators.get('url') != self._url_fingerprint():
+            return {}
+        return validators
+    
+    def commit_validators(self):
+        """
+        保存本次下载的 ETag / Last-Modified
+        
+        只在订阅处理完成（无变化，或新配置已生成）后调用；处理失败时不保存，
+        下次运行仍会完整下载
+        """
+        if not self._pending_validators:
+            return
+        with open(self.validators_path, 'w', encoding='utf-8') as f:
+            json.dump(self._pending_validators, f, indent=2)
+        self._pending_validators = None
+    
+    def commit_update(self, version_name: str):
+        """
+        新配置生成成功后调用：标记该版本已生成，并保存 ETag / Last-Modified
+        
+        生成失败时版本保持"未生成"状态，下次运行即使订阅没有变化也会重新生成
+        """
+        self.store.mark_generated(version_name)
+        self.commit_validators()
+    
+    def _conditional_headers(self) -> Dict[str, str]:
+        """条件请求头（没有已保存的版本时总是完整下载）"""
+        if not self.store.count():
+            return {}
+        validators = self.load_validators()
+        headers = {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        return headers
         
     def download_subscription(self) -> Optional[Dict]:
-        """下载订阅文件"""
+        """
+        下载订阅文件
+        
+        带上次保存的 ETag / Last-Modified 发起条件请求；服务器返回 304 时
+        不下载也不解析，返回 None 并设置 self.not_modified
+        """
+        self.not_modified = False
+        self._pending_validators = None
         try:
             print(f"📥 Downloading subscription from: {self.subscription_url[:80]}...")
             
-            # 下载zip文件
-            with tempfile.NamedTemporaryFile(suffix='.zip', delete=False) as tmp_zip:
-                urllib.request.urlretrieve(self.subscription_url, tmp_zip.name)
+            deadline = time.monotonic() + self.timeout
+            request = urllib.request.Request(self.subscription_url, headers=self._conditional_headers())
+            try:
+                response = urllib.request.urlopen(request, timeout=self.timeout)
+            except urllib.error.HTTPError as e:
+                if e.code == 304:
+                    print("✅ Subscription not modified (304)")
+                    self.not_modified = True
+                    return None
+                raise
+            
+            # 下载zip文件（内存缓冲，过大时才落到自动删除的临时文件）
+            with response, tempfile.SpooledTemporaryFile(max_size=self.SPOOL_SIZE) as buffer:
+                self._read_response(response, buffer, deadline)
+                
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                if etag or last_modified:
+                    self._pending_validators = {
+                        'url': self._url_fingerprint(),
+                        'etag': etag,
+                        'last_modified': last_modified
+                    }
                 
                 # 解压
-                with zipfile.ZipFile(tmp_zip.name, 'r') as zip_ref:
-                    # 通常第一个文件就是配置
-                    config_filename = zip_ref.namelist()[0]
-                    with zip_ref.open(config_filename) as config_file:
-                        subscription_data = json.load(config_file)
+                subscription_data = self._extract_config(buffer, deadline)
                         
             print(f"✅ Downloaded: {len(subscription_data.get('outbounds', []))} servers")
             return subscription_data
@@ -45,32 +158,161 @@ class SubscriptionChecker:
             print(f"❌ Download failed: {e}")
             return None
     
+    def _read_response(self, response, buffer, deadline: float):
+        """
+        分块读取响应到缓冲区，超过大小上限或总时限时中止
+        
+        总时限在块之间检查，单次读取由 urlopen 的 socket 超时限制，
+        因此最多超出一次读取的超时
+        
+        Args:
+            response: urlopen 响应
+            buffer: 写入的缓冲区
+            deadline: 下载和解压的截止时间（time.monotonic）
+        
+        Raises:
+            ValueError: 超过大小上限
+            TimeoutError: 超过总时限
+        """
+        length = response.headers.get('Content-Length')
+        if length and length.isdigit() and int(length) > self.max_download_bytes:
+            raise ValueError(f"subscription too large: {int(length)} bytes")
+        
+        total = 0
+        while True:
+            chunk = response.read(self.CHUNK_SIZE)
+            if not chunk:
+                break
+            total += len(chunk)
+            if total > self.max_download_bytes:
+                raise ValueError(f"subscription exceeds {self.max_download_bytes} bytes")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"download exceeded {self.timeout}s")
+            buffer.write(chunk)
+        buffer.seek(0)
+    
+    def _extract_config(self, buffer, deadline: float) -> Dict:
+        """
+        从 zip 缓冲区中解压并解析配置（通常第一个文件就是配置）
+        
+        按块解压，限制解压后的大小并与下载共用总时限，再一次性解析 JSON
+        （标准库没有流式 JSON 解析器，由 max_config_bytes 限制内存占用）
+        
+        Raises:
+            ValueError: 解压后超过大小上限
+            TimeoutError: 超过总时限
+        """
+        with zipfile.ZipFile(buffer, 'r') as zip_ref:
+            info = zip_ref.infolist()[0]
+            if info.file_size > self.max_config_bytes:
+                raise ValueError(f"config too large: {info.file_size} bytes")
+            
+            parts = []
+            total = 0
+            with zip_ref.open(info) as config_file:
+                while True:
+                    chunk = config_file.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    total += len(chunk)
+                    if total > self.max_config_bytes:
+                        raise ValueError(f"config exceeds {self.max_config_bytes} bytes")
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"download and extraction exceeded {self.timeout}s")
+                    parts.append(chunk)
+        return json.loads(b''.join(parts))
+    
+    @staticmethod
+    def outbound_digest(outbound: Dict) -> str:
+        """单个服务器的摘要（规范化 JSON：键排序、无多余空白）"""
+        canonical = json.dumps(outbound, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    
+    def calculate_digests(self, data: Dict) -> Dict[str, str]:
+        """
+        按 tag 计算每个服务器的摘要
+        
+        Returns:
+            {tag: digest}（重复的 tag 依次加 #2、#3 后缀）
+        """
+        digests = {}
+        for outbound in data.get('outbounds', []):
+            tag = outbound.get('tag', '')
+            key, n = tag, 1
+            while key in digests:
+                n += 1
+                key = f"{tag}#{n}"
+            digests[key] = self.outbound_digest(outbound)
+        return digests
+    
+    @staticmethod
+    def merkle_root(digests: Dict[str, str]) -> str:
+        """
+        由各服务器摘要计算 Merkle 根（叶子按 tag 排序，与服务器顺序无关）
+        """
+        level = [
+            hashlib.sha256(f"{tag}\0{digest}".encode('utf-8')).digest()
+            for tag, digest in sorted(digests.items())
+        ]
+        if not level:
+            return hashlib.sha256(b'').hexdigest()
+        while len(level) > 1:
+            if len(level) % 2:
+                level.append(level[-1])
+            level = [hashlib.sha256(level[i] + level[i + 1]).digest() for i in range(0, len(level), 2)]
+        return level[0].hex()
+    
     def calculate_hash(self, data: Dict) -> str:
-        """计算数据的hash值"""
-        # 只关注outbounds部分
-        outbounds = data.get('outbounds', [])
-        # 排序以确保一致性
-        sorted_data = sorted(json.dumps(outbounds, sort_keys=True).encode())
-        return hashlib.sha256(b''.join(sorted_data)).hexdigest()
+        """计算数据的hash值（只关注outbounds部分）"""
+        return self.merkle_root(self.calculate_digests(data))
+    
+    def _import_legacy_files(self):
+        """
+        把旧版的 subscription_*.json / digests_*.json 文件导入历史存储
+        
+        按时间顺序导入，导入成功后删除原文件（内容已压缩保存在数据库中）
+        """
+        legacy_files = sorted(self.history_dir.glob('subscription_*.json'))
+        if not legacy_files:
+            return
+        
+        print(f"📦 Importing {len(legacy_files)} legacy subscription version(s) into history store")
+        for path in legacy_files:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                created_at = datetime.strptime(path.stem[len('subscription_'):], '%Y%m%d_%H%M%S')
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Skipping {path.name}: {e}")
+                continue
+            digests = self.calculate_digests(data)
+            self.store.add(data, digests, self.merkle_root(digests), created_at=created_at)
+            path.unlink()
+        
+        for path in self.history_dir.glob('digests_*.json'):
+            path.unlink()
+    
+    def get_latest_digests(self) -> Tuple[Optional[str], Optional[Dict]]:
+        """
+        获取最新保存版本的摘要（不加载完整订阅）
+        
+        Returns:
+            (版本名称, {"root": ..., "servers": {tag: digest}, ...})；没有任何版本时为 (None, None)
+        """
+        return self.store.latest()
     
     def get_latest_version(self) -> Optional[Tuple[str, Dict]]:
         """获取最新保存的版本"""
-        version_files = sorted(self.history_dir.glob('subscription_*.json'), reverse=True)
-        if version_files:
-            latest_file = version_files[0]
-            with open(latest_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return latest_file.stem, data
-        return None, None
-    
-    def save_version(self, data: Dict) -> str:
-        """保存新版本"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        version_name = f"subscription_{timestamp}"
-        filepath = self.history_dir / f"{version_name}.json"
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        version_name, _ = self.store.latest()
+        if version_name is None:
+            return None, None
+        return version_name, self.store.load(version_name)
+    
+    def save_version(self, data: Dict, digests: Optional[Dict[str, str]] = None) -> str:
+        """保存新版本（同时保存各服务器摘要和 Merkle 根；配置生成成功前标记为未生成）"""
+        if digests is None:
+            digests = self.calculate_digests(data)
+        version_name = self.store.add(data, digests, self.merkle_root(digests), generated=False)
         
         print(f"💾 Saved new version: {version_name}")
         return version_name
@@ -87,49 +329,56 @@ class SubscriptionChecker:
         if not new_data:
             return False, None, None
         
-        # 获取最新保存的版本
-        latest_version, latest_data = self.get_latest_version()
+        self.last_changes = None
+        new_digests = self.calculate_digests(new_data)
+        
+        # 获取最新保存版本的摘要
+        latest_version, latest_record = self.get_latest_digests()
         
-        if latest_data is None:
+        if latest_record is None:
             # 第一次运行，保存初始版本
             print("🆕 First run, saving initial version")
-            version_name = self.save_version(new_data)
+            version_name = self.save_version(new_data, new_digests)
             return True, new_data, version_name
         
-        # 计算hash比较
-        new_hash = self.calculate_hash(new_data)
-        latest_hash = self.calculate_hash(latest_data)
+        # 比较Merkle根
+        new_hash = self.merkle_root(new_digests)
+        latest_hash = latest_record['root']
         
         if new_hash != latest_hash:
             print("🔄 Changes detected!")
             print(f"   Old hash: {latest_hash[:16]}...")
             print(f"   New hash: {new_hash[:16]}...")
             
+            self.last_changes = self.diff_digests(latest_record['servers'], new_digests)
+            
             # 保存新版本
-            version_name = self.save_version(new_data)
+            version_name = self.save_version(new_data, new_digests)
             return True, new_data, version_name
+        elif not latest_record['generated']:
+            # 上次保存了该版本但配置生成失败
+            print("⏳ Configs for the latest version were never generated, regenerating")
+            return True, new_data, latest_version
         else:
             print("✅ No changes detected")
+            self.commit_validators()
             return False, None, latest_version
     
-    def get_changes_summary(self, old_data: Dict, new_data: Dict) -> Dict:
-        """获取变更摘要"""
-        old_servers = {s['tag']: s for s in old_data.get('outbounds', [])}
-        new_servers = {s['tag']: s for s in new_data.get('outbounds', [])}
-        
-        added = set(new_servers.keys()) - set(old_servers.keys())
-        removed = set(old_servers.keys()) - set(new_servers.keys())
-        
-        # 检查配置变更
-        modified = []
-        for tag in set(old_servers.keys()) & set(new_servers.keys()):
-            if old_servers[tag] != new_servers[tag]:
-                modified.append(tag)
+    @staticmethod
+    def diff_digests(old_digests: Dict[str, str], new_digests: Dict[str, str]) -> Dict:
+        """按摘要比较两个版本"""
+        added = new_digests.keys() - old_digests.keys()
+        removed = old_digests.keys() - new_digests.keys()
+        modified = [tag for tag in old_digests.keys() & new_digests.keys() if old_digests[tag] != new_digests[tag]]
         
         return {
             'added': list(added),
             'removed': list(removed),
             'modified': modified,
-            'total_old': len(old_servers),
-            'total_new': len(new_servers)
+            'total_old': len(old_digests),
+            'total_new': len(new_digests)
         }
+    
+    def get_changes_summary(self, old_data: Dict, new_data: Dict) -> Dict:
+        """获取变更摘要"""
+        return self.diff_digests(self.calculate_digests(old_data), self.calculate_digests(new_data))
@@ -6,57 +6,35 @@ Singbox Configuration Updater
 
 import json
 from copy import deepcopy
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set
 from pathlib import Path
 
+from .region_classifier import RegionClassifier
+
 
 class SingboxUpdater:
     """Singbox配置更新器"""
     
-    # 地区映射（基于emoji）
-    REGION_MAPPING = {
-        '🇭🇰': ['HKonly', 'AllServer'],  # 香港
-        '🇨🇳': ['HKonly', 'AllServer'],  # 台湾
-        '🇸🇬': ['SGonly', 'AllServer'],  # 新加坡
-        '🇯🇵': ['AllServer'],            # 日本
-        '🇺🇸': ['USonly', 'AllServer'],  # 美国
-    }
+    # 基础配置中的订阅服务器组：即使规则不再提到也要更新，避免保留过期的服务器
+    REGION_GROUPS = ['HKonly', 'SGonly', 'USonly', 'AllServer']
     
-    def __init__(self):
+    def __init__(self, region_rules: Optional[List[Dict]] = None):
+        """
+        Args:
+            region_rules: 地区分类规则（config/settings.json 的 region_rules，默认与旧版映射一致）
+        """
         self.custom_servers = ['SGNowaHomePlus', 'SGoffice']
+        self.classifier = RegionClassifier(region_rules)
     
     def parse_servers_by_region(self, subscription_data: Dict) -> Dict[str, List[Dict]]:
         """解析订阅服务器按地区分类"""
-        servers_by_region = {
-            'HKonly': [],
-            'SGonly': [],
-            'USonly': [],
-            'AllServer': []
-        }
-        
         outbounds = subscription_data.get('outbounds', [])
-        
-        # 统计
-        stats = {'🇭🇰': 0, '🇨🇳': 0, '🇸🇬': 0, '🇯🇵': 0, '🇺🇸': 0}
-        
-        for server in outbounds:
-            tag = server.get('tag', '')
-            
-            # 根据emoji分类
-            for emoji, regions in self.REGION_MAPPING.items():
-                if emoji in tag:
-                    for region in regions:
-                        servers_by_region[region].append(server)
-                    stats[emoji] += 1
-                    break
+        servers_by_region, counts = self.classifier.classify_all(outbounds)
         
         # 打印统计
         print("\n📊 Subscription servers summary:")
-        hk_tw = stats['🇭🇰'] + stats['🇨🇳']
-        print(f"   🇭🇰 HK/TW: {hk_tw} servers")
-        print(f"   🇸🇬 SG: {stats['🇸🇬']} servers")
-        print(f"   🇯🇵 JP: {stats['🇯🇵']} servers")
-        print(f"   🇺🇸 US: {stats['🇺🇸']} servers")
+        for rule in self.classifier.rules:
+            print(f"   {rule.label} {rule.name}: {counts[rule.name]} servers")
         print(f"   🌍 Total: {len(outbounds)} servers")
         
         return servers_by_region
@@ -121,7 +99,12 @@ class SingboxUpdater:
         
         # 更新服务器组
         print("\n🔄 Updating configuration...")
-        groups_to_update = ['HKonly', 'SGonly', 'USonly', 'AllServer']
+        groups_to_update = list(dict.fromkeys(self.REGION_GROUPS + self.classifier.groups))
+        for group_tag in groups_to_update:
+            if group_tag not in self.classifier.groups and any(
+                o.get('tag') == group_tag for o in updated_config['outbounds']
+            ):
+                print(f"   ⚠️  {group_tag}: no region rule assigns servers to this group, keeping only custom servers")
         updated_groups = 0
         
         for outbound in updated_config['outbounds']:
@@ -0,0 +1,99 @@
+"""RegionClassifier 规则匹配与缓存"""
+import random
+
+from src.region_classifier import RegionClassifier
+
+# 旧版 SingboxUpdater.REGION_MAPPING
+OLD_REGION_MAPPING = {
+    '🇭🇰': ['HKonly', 'AllServer'],
+    '🇨🇳': ['HKonly', 'AllServer'],
+    '🇸🇬': ['SGonly', 'AllServer'],
+    '🇯🇵': ['AllServer'],
+    '🇺🇸': ['USonly', 'AllServer'],
+}
+
+
+def old_classify(outbounds):
+    servers = {'HKonly': [], 'SGonly': [], 'USonly': [], 'AllServer': []}
+    for server in outbounds:
+        for emoji, regions in OLD_REGION_MAPPING.items():
+            if emoji in server.get('tag', ''):
+                for region in regions:
+                    servers[region].append(server)
+                break
+    return servers
+
+
+def tags(servers_by_group):
+    return {group: [s['tag'] for s in servers] for group, servers in servers_by_group.items()}
+
+
+def test_default_rules_match_old_mapping():
+    flags = list(OLD_REGION_MAPPING) + ['🇬🇧', '']
+    rng = random.Random(7)
+    outbounds = [
+        {'tag': f"{rng.choice(flags)} node {i} {rng.choice(flags)}", 'type': 'trojan'}
+        for i in range(2000)
+    ]
+    servers_by_group, _ = RegionClassifier().classify_all(outbounds)
+    assert tags(servers_by_group) == tags(old_classify(outbounds))
+
+
+def test_regex_rule_falls_through_when_predicate_fails():
+    classifier = RegionClassifier([
+        {'name': 'HK-hy2', 'regex': '香港', 'types': ['hysteria2'], 'groups': ['HKfast']},
+        {'name': 'HK', 'regex': '香港|HK', 'groups': ['HKonly']},
+    ])
+    assert classifier.classify({'tag': '香港01', 'type': 'trojan'}).name == 'HK'
+    assert classifier.classify({'tag': '香港02', 'type': 'hysteria2'}).name == 'HK-hy2'
+
+
+def test_emoji_rule_falls_through_when_predicate_fails():
+    classifier = RegionClassifier([
+        {'name': 'HK-high', 'emoji': '🇭🇰', 'ports': ['40000-50000'], 'groups': ['HKhigh']},
+        {'name': 'HK', 'emoji': '🇭🇰', 'groups': ['HKonly']},
+    ])
+    assert classifier.classify({'tag': '🇭🇰 01', 'server_port': 443}).name == 'HK'
+    assert classifier.classify({'tag': '🇭🇰 02', 'server_port': 45000}).name == 'HK-high'
+
+
+def test_overlapping_patterns_respect_rule_order():
+    classifier = RegionClassifier([
+        {'name': 'port', 'regex': '港', 'groups': ['A']},
+        {'name': 'hk', 'regex': '香港', 'groups': ['B']},
+    ])
+    assert classifier.classify({'tag': '香港01'}).name == 'port'
+
+
+def test_cache_is_reused_and_pruned():
+    classifier = RegionClassifier([
+        {'name': 'HK-hy2', 'emoji': '🇭🇰', 'types': ['hysteria2'], 'groups': ['HKfast']},
+        {'name': 'HK', 'emoji': '🇭🇰', 'groups': ['HKonly']},
+    ])
+    first = [{'tag': '🇭🇰 01', 'type': 'hysteria2'}, {'tag': '🇭🇰 02', 'type': 'trojan'}]
+    classifier.classify_all(first)
+    assert len(classifier._cache) == 2
+
+    # 同一 tag 换了协议时不能复用旧结果
+    _, counts = classifier.classify_all([{'tag': '🇭🇰 01', 'type': 'trojan'}])
+    assert counts == {'HK-hy2': 0, 'HK': 1}
+    assert list(classifier._cache) == [('🇭🇰 01', 'trojan', None)]
+
+    calls = []
+    original = classifier._match
+    classifier._match = lambda server: calls.append(server) or original(server)
+    classifier.classify_all([{'tag': '🇭🇰 01', 'type': 'trojan'}])
+    assert calls == []
+
+
+def test_single_pass_match_with_inner_groups_and_predicate_only_rules():
+    classifier = RegionClassifier([
+        {'name': 'JP', 'regex': '(?P<city>东京|大阪)(\\d+)', 'groups': ['JPonly']},
+        {'name': 'hy2', 'types': ['hysteria2'], 'groups': ['Fast']},
+        {'name': 'US', 'emoji': '🇺🇸', 'groups': ['USonly']},
+    ])
+    assert classifier.classify({'tag': '🇺🇸 东京01', 'type': 'trojan'}).name == 'JP'
+    assert classifier.classify({'tag': '🇺🇸 01', 'type': 'hysteria2'}).name == 'hy2'
+    assert classifier.classify({'tag': '🇺🇸 02', 'type': 'trojan'}).name == 'US'
+    assert classifier.classify({'tag': '🇬🇧 03', 'type': 'trojan'}) is None
+    assert set(classifier._combined) == {0, 2}
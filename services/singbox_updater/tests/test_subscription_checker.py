@@ -0,0 +1,151 @@
+"""SubscriptionChecker 版本保存与配置生成状态"""
+import io
+import json
+import sqlite3
+import urllib.error
+import zipfile
+
+from src import subscription_checker
+from src.history_store import HistoryStore
+from src.subscription_checker import SubscriptionChecker
+
+SUBSCRIPTION = {'outbounds': [{'tag': '🇭🇰 HK 01', 'type': 'vmess', 'server_port': 443}]}
+
+
+def make_checker(tmp_path, data):
+    checker = SubscriptionChecker('https://example.com/sub', tmp_path)
+
+    def download():
+        checker._pending_validators = {'url': checker._url_fingerprint(), 'etag': '"v1"', 'last_modified': None}
+        return data
+
+    checker.download_subscription = download
+    return checker
+
+
+def test_failed_generation_is_retried(tmp_path):
+    checker = make_checker(tmp_path, SUBSCRIPTION)
+    has_update, _, version = checker.check_for_updates()
+    assert has_update
+    # 配置生成失败：不调用 commit_update
+
+    has_update, data, retry_version = checker.check_for_updates()
+    assert has_update and data == SUBSCRIPTION
+    assert retry_version == version
+    assert checker.store.count() == 1
+    assert checker.load_validators() == {}
+
+    checker.commit_update(retry_version)
+    assert checker.load_validators()['etag'] == '"v1"'
+
+    has_update, _, latest = checker.check_for_updates()
+    assert not has_update and latest == version
+
+
+def test_old_history_db_counts_as_generated(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / SubscriptionChecker.HISTORY_DB))
+    conn.execute(
+        "CREATE TABLE versions (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE,"
+        " created_at TEXT NOT NULL, root TEXT NOT NULL, server_count INTEGER NOT NULL,"
+        " digests BLOB NOT NULL, payload BLOB NOT NULL)"
+    )
+    digests = {o['tag']: SubscriptionChecker.outbound_digest(o) for o in SUBSCRIPTION['outbounds']}
+    conn.execute(
+        "INSERT INTO versions (name, created_at, root, server_count, digests, payload) VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            'subscription_20260101_000000', '2026-01-01T00:00:00', SubscriptionChecker.merkle_root(digests), 1,
+            HistoryStore._pack(digests), HistoryStore._pack(SUBSCRIPTION)
+        )
+    )
+    conn.commit()
+    conn.close()
+
+    checker = make_checker(tmp_path, SUBSCRIPTION)
+    has_update, _, latest = checker.check_for_updates()
+    assert not has_update and latest == 'subscription_20260101_000000'
+
+
+class FakeResponse:
+    def __init__(self, body, headers=None):
+        self.body = io.BytesIO(body)
+        self.headers = headers or {}
+
+    def read(self, size=-1):
+        return self.body.read(size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def zipped(data, name='config.json'):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(name, json.dumps(data))
+    return buffer.getvalue()
+
+
+def fake_urlopen(monkeypatch, responses, requests=None):
+    def urlopen(request, timeout=None):
+        if requests is not None:
+            requests.append(request)
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(subscription_checker.urllib.request, 'urlopen', urlopen)
+
+
+def test_not_modified_uses_saved_validators(tmp_path, monkeypatch):
+    requests = []
+    fake_urlopen(monkeypatch, [
+        FakeResponse(zipped(SUBSCRIPTION), {'ETag': '"v1"'}),
+        urllib.error.HTTPError('https://example.com/sub', 304, 'Not Modified', {}, None),
+    ], requests)
+    checker = SubscriptionChecker('https://example.com/sub', tmp_path)
+
+    has_update, _, version = checker.check_for_updates()
+    assert has_update
+    checker.commit_update(version)
+
+    assert checker.check_for_updates() == (False, None, None)
+    assert checker.not_modified
+    assert requests[1].get_header('If-none-match') == '"v1"'
+
+
+def test_download_size_limit(tmp_path, monkeypatch, capsys):
+    body = zipped(SUBSCRIPTION)
+    fake_urlopen(monkeypatch, [
+        FakeResponse(body, {'Content-Length': str(len(body))}),
+        FakeResponse(body),
+    ])
+    checker = SubscriptionChecker('https://example.com/sub', tmp_path, max_download_bytes=len(body) - 1)
+
+    assert checker.download_subscription() is None
+    assert 'subscription too large' in capsys.readouterr().out
+    assert checker.download_subscription() is None
+    assert 'subscription exceeds' in capsys.readouterr().out
+
+
+def test_config_size_limit(tmp_path, monkeypatch, capsys):
+    servers = {'outbounds': [{'tag': f'server {n}', 'type': 'vmess'} for n in range(5000)]}
+    fake_urlopen(monkeypatch, [FakeResponse(zipped(servers))])
+    checker = SubscriptionChecker('https://example.com/sub', tmp_path, max_config_bytes=64 * 1024)
+
+    assert checker.download_subscription() is None
+    assert 'config too large' in capsys.readouterr().out
+
+
+def test_time_limit_covers_extraction(tmp_path, monkeypatch, capsys):
+    servers = {'outbounds': [{'tag': f'server {n}', 'type': 'vmess'} for n in range(5000)]}
+    fake_urlopen(monkeypatch, [FakeResponse(zipped(servers))])
+    checker = SubscriptionChecker('https://example.com/sub', tmp_path, timeout=3)
+    # 每次读取时钟前进 1 秒：下载只有一块，解压需要多块
+    clock = iter(range(0, 10000))
+    monkeypatch.setattr(subscription_checker.time, 'monotonic', lambda: next(clock))
+
+    assert checker.download_subscription() is None
+    assert 'download and extraction exceeded' in capsys.readouterr().out
@@ -0,0 +1,21 @@
+"""SingboxUpdater 服务器组更新"""
+from src.updater import SingboxUpdater
+
+
+def test_groups_without_rules_are_still_cleared(capsys):
+    updater = SingboxUpdater([{'name': 'HK', 'emoji': '🇭🇰', 'groups': ['HKonly', 'AllServer']}])
+    config = {'outbounds': [
+        {'tag': 'HKonly', 'type': 'selector', 'outbounds': ['🇭🇰 old']},
+        {'tag': 'USonly', 'type': 'selector', 'outbounds': ['🇺🇸 stale', 'SGoffice']},
+        {'tag': 'AllServer', 'type': 'urltest', 'outbounds': ['🇭🇰 old', '🇺🇸 stale']},
+        {'tag': 'SGoffice', 'type': 'vless'},
+    ]}
+    subscription = {'outbounds': [{'tag': '🇭🇰 new', 'type': 'trojan'}, {'tag': '🇺🇸 new', 'type': 'trojan'}]}
+
+    updated = updater.update_config(config, updater.parse_servers_by_region(subscription))
+    groups = {o['tag']: o.get('outbounds') for o in updated['outbounds']}
+
+    assert groups['HKonly'] == ['🇭🇰 new']
+    assert groups['USonly'] == ['SGoffice']
+    assert groups['AllServer'] == ['🇭🇰 new']
+    assert 'USonly: no region rule' in capsys.readouterr().out